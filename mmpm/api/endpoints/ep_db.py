@@ -1,13 +1,14 @@
 #!/usr/bin/env python3
+from threading import Thread
 
-from flask import Blueprint, Response
+from flask import Blueprint, Response, request
 
 from mmpm.api.constants import http
 from mmpm.api.endpoints.endpoint import Endpoint
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.magicmirror import MagicMirror
-from mmpm.utils import update_available
+from mmpm.utils import run_phases, update_available
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -26,22 +27,75 @@ class Db(Endpoint):
         @self.blueprint.route("/update", methods=[http.GET])
         def update() -> Response:
             """
-            A Flask route method for updating the MagicMirror database.
+            A Flask route method for updating the MagicMirror database. The database, MMPM, and MagicMirror
+            are checked concurrently, for at most 'deadline' seconds (60 by default). When the 'prefetch' query
+            parameter is 'true', the changes of upgradable packages are downloaded in the background, unless
+            checking them just did.
+
+            Installed packages checked within 'max_age' seconds (900 by default) are skipped, unless 'force' is
+            'true', and 'only' limits the checks to a comma separated list of package titles.
 
             Parameters:
                 None
 
             Returns:
-                Response: A Flask Response object indicating the success or failure of the database update.
+                Response: A Flask Response object containing the upgradable packages and applications, and the timing
+                of each check in 'phases'. If the database could not be refreshed, the previously found packages are returned.
             """
-            if not self.db.load(update=True):
+            phases = run_phases(
+                {
+                    "database": lambda token: self.db.load(update=True, token=token),
+                    "mmpm": update_available,
+                    "MagicMirror": lambda token: self.magicmirror.update(token=token),
+                },
+                deadline=request.args.get("deadline", default=60.0, type=float),
+            )
+
+            timings = {name: {key: phase[key] for key in ("seconds", "completed", "timed_out")} for name, phase in phases.items()}
+            can_upgrade_mmpm = bool(phases["mmpm"]["result"])
+            can_upgrade_magicmirror = bool(phases["MagicMirror"]["result"])
+
+            if not phases["database"]["completed"]:
+                logger.error("Unable to refresh the database, returning partial results")
+                upgradable = self.db.upgradable()
+                upgradable.update({"mmpm": can_upgrade_mmpm, "MagicMirror": can_upgrade_magicmirror, "phases": timings})
+                return self.success(upgradable)
+
+            if not phases["database"]["result"]:
                 return self.failure("Failed to update database. See logs for details.")
 
-            can_upgrade_mmpm = update_available()
-            can_upgrade_magicmirror = self.magicmirror.update()
-            self.db.update(can_upgrade_mmpm=can_upgrade_mmpm, can_upgrade_magicmirror=can_upgrade_magicmirror)
+            prefetch = request.args.get("prefetch", "false").lower() == "true"
+            force = request.args.get("force", "false").lower() == "true"
+            only = request.args.get("only")
+
+            self.db.update(
+                can_upgrade_mmpm=can_upgrade_mmpm,
+                can_upgrade_magicmirror=can_upgrade_magicmirror,
+                prefetch=prefetch,
+                max_age=None if force else request.args.get("max_age", default=15 * 60.0, type=float),
+                only=only.split(",") if only else None,
+            )
+
+            return self.success({**self.db.upgradable(), "phases": timings})
+
+        @self.blueprint.route("/enrich", methods=[http.GET])
+        def enrich() -> Response:
+            """
+            A Flask route method for collecting the stars, forks, and last update of all packages in the background,
+            which are used to sort and filter packages.
+
+            Parameters:
+                None
+
+            Returns:
+                Response: A Flask Response object indicating the collection was started.
+            """
+
+            if not self.db.is_initialized():
+                self.db.load()
 
-            return self.success(self.db.upgradable())
+            Thread(target=self.db.enrich, daemon=True).start()
+            return self.success("Collecting remote metadata of packages in the background")
 
         @self.blueprint.route("/upgradable", methods=[http.GET])
         def upgradable() -> Response:
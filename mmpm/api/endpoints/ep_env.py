@@ -1,11 +1,8 @@
 #!/usr/bin/env python3
-import json
-
 from flask import Blueprint, Response, request
 
 from mmpm.api.constants import http
 from mmpm.api.endpoints.endpoint import Endpoint
-from mmpm.constants import paths
 from mmpm.env import MMPM_DEFAULT_ENV, MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
 
@@ -67,13 +64,12 @@ class Env(Endpoint):
 
             updated_env = request.get_json()["env"]
 
-            with open(paths.MMPM_ENV_FILE, "w", encoding="utf-8") as env:
-                try:
-                    json.dump(updated_env, env, indent=2)
-                except Exception as error:
-                    message = f"Failed to updated env: {error}"
-                    logger.error(message)
-                    return self.failure(message)
+            try:
+                self.env.write(updated_env)
+            except Exception as error:
+                message = f"Failed to updated env: {error}"
+                logger.error(message)
+                return self.failure(message)
 
             logger.info(f"Updating MMPM Env with {updated_env}")
             return self.success({"updated": True})
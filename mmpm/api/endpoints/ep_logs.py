@@ -1,14 +1,11 @@
 #!/usr/bin/env python3
-from datetime import datetime
-from os import chdir
-from shutil import make_archive
-
-from flask import Blueprint, Response, send_file
+from flask import Blueprint, Response, request
 
 from mmpm.api.constants import http
 from mmpm.api.endpoints.endpoint import Endpoint
-from mmpm.constants import paths
+from mmpm.log.archive import LogArchive, archive_name
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.log.query import LogQuery
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -25,20 +22,47 @@ class Logs(Endpoint):
         super().__init__()
         self.name = "logs"
         self.blueprint = Blueprint(self.name, __name__, url_prefix=f"/api/{self.name}")
+        self.log_query = LogQuery()  # keeps the sparse indexes of the log files between requests
+        self.log_archive = LogArchive()  # keeps the compressed log files, until they change
 
         @self.blueprint.route("/archive", methods=[http.GET])
         def archive() -> Response:
             """
-            Handles a GET request to create and serve a ZIP archive of log files.
+            Handles a GET request for a ZIP archive of the log files, streamed while it's being generated.
 
             Returns:
                 Response: A Flask Response object that enables the client to download the ZIP archive.
             """
-            logger.debug("Creating zip of log files")
-            chdir("/tmp")
-            today = datetime.now()
-            zip_file_name = f"mmpm-logs-{today.year}-{today.month}-{today.day}"
-            logger.debug(f"Creating zip of log files named '{zip_file_name}'")
-            archive_name = make_archive(zip_file_name, "zip", paths.MMPM_LOG_DIR)
-            logger.debug(f"Archive created: {bool(archive_name)}")
-            return send_file(f"/tmp/{zip_file_name}.zip", f"{zip_file_name}.zip", as_attachment=True)
+            file_name = archive_name()
+            logger.debug(f"Streaming zip of log files named '{file_name}'")
+
+            return Response(
+                self.log_archive.stream(),
+                mimetype="application/zip",
+                headers={"Content-Disposition": f"attachment; filename={file_name}"},
+            )
+
+        @self.blueprint.route("/query", methods=[http.GET])
+        def query() -> Response:
+            """
+            Handles a GET request for the log records matching the 'since', 'until', 'level', 'logger', and 'grep'
+            query parameters, limited to the most recent 'limit' records (1000 by default).
+
+            Returns:
+                Response: A Flask Response object containing the matching records, oldest first.
+            """
+
+            try:
+                records = self.log_query.query(
+                    since=request.args.get("since"),
+                    until=request.args.get("until"),
+                    level=request.args.get("level"),
+                    logger=request.args.get("logger"),
+                    grep=request.args.get("grep"),
+                    limit=request.args.get("limit", default=1000, type=int),
+                )
+            except ValueError as error:
+                logger.error(f"Invalid log query: {error}")
+                return self.failure(str(error), 400)
+
+            return self.success(records)
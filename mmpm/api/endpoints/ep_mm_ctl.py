@@ -7,6 +7,7 @@ from mmpm.api.endpoints.endpoint import Endpoint
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.controller import MagicMirrorController
 from mmpm.magicmirror.magicmirror import MagicMirror
+from mmpm.utils import operation
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -26,7 +27,8 @@ class MmCtl(Endpoint):
         @self.blueprint.route("/install", methods=[http.GET])
         def install() -> Response:
             """
-            A Flask route method for installing MagicMirror.
+            A Flask route method for installing MagicMirror. The installation can be cancelled with
+            /api/mmpm/cancel, using the id given in the 'operation' query parameter.
 
             Parameters:
                 None
@@ -36,8 +38,10 @@ class MmCtl(Endpoint):
             """
 
             logger.info("Received request to install MagicMirror")
-            if self.magicmirror.install():
-                return self.success("MagicMirror installed")
+
+            with operation(request.args.get("operation")) as token:
+                if self.magicmirror.install(token):
+                    return self.success("MagicMirror installed")
 
             return self.failure("Failed to install MagicMirror. See logs for details.")
 
@@ -62,7 +66,8 @@ class MmCtl(Endpoint):
         @self.blueprint.route("/upgrade", methods=[http.GET])
         def upgrade() -> Response:
             """
-            A Flask route method for upgrading MagicMirror.
+            A Flask route method for upgrading MagicMirror. The upgrade can be cancelled with
+            /api/mmpm/cancel, using the id given in the 'operation' query parameter.
 
             Parameters:
                 None
@@ -72,8 +77,10 @@ class MmCtl(Endpoint):
             """
 
             logger.info("Received request to upgrade MagicMirror")
-            if self.magicmirror.upgrade():
-                return self.success("MagicMirror updated")
+
+            with operation(request.args.get("operation")) as token:
+                if self.magicmirror.upgrade(token):
+                    return self.success("MagicMirror updated")
 
             return self.failure("Failed to update MagicMirror. See logs for details.")
 
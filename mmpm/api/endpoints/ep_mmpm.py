@@ -1,5 +1,5 @@
 #!/usr/bin/env python3
-from flask import Blueprint, Response
+from flask import Blueprint, Response, request
 
 import mmpm.__version__
 import mmpm.utils
@@ -51,3 +51,26 @@ class Mmpm(Endpoint):
                 return self.success("Upgrade MMPM")
 
             return self.failure("Failed to upgrade MMPM. See logs for details.")
+
+        @self.blueprint.route("/cancel", methods=[http.GET])
+        def cancel() -> Response:
+            """
+            A Flask route method for cancelling a running operation, such as the installation of packages,
+            killing the commands it's running (ie. a long running 'npm install'). The operation is identified
+            by the 'operation' query parameter, matching the one it was requested with.
+
+            Parameters:
+                None
+
+            Returns:
+                Response: A Flask Response object indicating whether the operation was cancelled.
+            """
+            operation_id = request.args.get("operation")
+
+            if not operation_id:
+                return self.failure("The 'operation' query parameter is required", 400)
+
+            if not mmpm.utils.cancel_operation(operation_id):
+                return self.failure(f"No running operation '{operation_id}'", 404)
+
+            return self.success(f"Cancelled operation '{operation_id}'")
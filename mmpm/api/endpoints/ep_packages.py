@@ -1,12 +1,17 @@
 #!/usr/bin/env python3
+from threading import Thread
+
 from flask import Blueprint, Response, request
 
 from mmpm.api.constants import http
 from mmpm.api.endpoints.endpoint import Endpoint
+from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.magicmirror.controller import MagicMirrorController
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.magicmirror import MagicMirror
-from mmpm.magicmirror.package import MagicMirrorPackage, RemotePackage
+from mmpm.magicmirror.package import MagicMirrorPackage, RemotePackage, blue_green_upgrade, empty_trash, fetch_remote_details
+from mmpm.utils import operation
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -21,11 +26,15 @@ class Packages(Endpoint):
         self.blueprint = Blueprint(self.name, __name__, url_prefix=f"/api/{self.name}")
         self.db = MagicMirrorDatabase()
         self.magicmirror = MagicMirror()
+        self.controller = MagicMirrorController()
+        self.env = MMPMEnv()
 
         @self.blueprint.route("/", methods=[http.GET])
         def retrieve() -> Response:
             """
-            A Flask route method for retrieving a list of all MagicMirror packages.
+            A Flask route method for retrieving a list of all MagicMirror packages. The optional 'sort' ('stars' or
+            'updated'), 'min_stars', and 'updated_within' (days) query parameters sort and filter the packages by the
+            metadata collected by /api/db/enrich.
 
             Parameters:
                 None
@@ -48,7 +57,12 @@ class Packages(Endpoint):
             # it if we want the user to have information about the status of the packages on the web app
             # also, the data isn't THAT large, so it's fine, but it's definitely kinda gross
             upgradable = [MagicMirrorPackage(**pkg) for pkg in self.db.upgradable()["packages"]]
-            pkgs = self.db.packages
+            pkgs = self.db.select(
+                self.db.packages,
+                sort=request.args.get("sort"),
+                min_stars=request.args.get("min_stars", type=int),
+                updated_within=request.args.get("updated_within", type=int),
+            )
 
             for pkg in pkgs:
                 if pkg in upgradable:
@@ -59,7 +73,8 @@ class Packages(Endpoint):
         @self.blueprint.route("/install", methods=[http.POST])
         def install() -> Response:
             """
-            A Flask route method for installing selected MagicMirror packages.
+            A Flask route method for installing selected MagicMirror packages. The installation can be
+            cancelled with /api/mmpm/cancel, using the id given in the 'operation' query parameter.
 
             Parameters:
                 None
@@ -72,16 +87,16 @@ class Packages(Endpoint):
             success = []
             failure = []
 
-            for package in packages:
-                pkg = MagicMirrorPackage(**package)
+            with operation(request.args.get("operation")) as token:
+                for package in packages:
+                    pkg = MagicMirrorPackage(**package)
 
-                if pkg.install():
-                    logger.debug(f"Installed {pkg.title}")
-                    success.append(package)
-                else:
-                    logger.debug(f"Removing {pkg.title} due to installation failure. Please try reinstalling manually.")
-                    failure.append(package)
-                    pkg.remove()
+                    if pkg.install(token):
+                        logger.debug(f"Installed {pkg.title}")
+                        success.append(package)
+                    else:
+                        logger.debug(f"Failed to install {pkg.title}. The staged copy is kept, and will be reused when retrying.")
+                        failure.append(package)
 
             return self.success({"success": success, "failure": failure})
 
@@ -111,12 +126,19 @@ class Packages(Endpoint):
                     logger.debug(f"Failed to remove {pkg.title}")
                     failure.append(package)
 
+            if success:
+                Thread(target=empty_trash, daemon=True).start()
+
             return self.success({"success": success, "failure": failure})
 
         @self.blueprint.route("/upgrade", methods=[http.POST])
         def upgrade() -> Response:
             """
-            A Flask route method for upgrading selected MagicMirror packages.
+            A Flask route method for upgrading selected MagicMirror packages. When 'blue_green' is set in
+            the request, the packages are built next to their live copies, swapped in together, and
+            MagicMirror is restarted once, with the resulting downtime included in the response. MagicMirror can't
+            be restarted from within a Docker image, so a warning is included in the response instead. The upgrade
+            can be cancelled with /api/mmpm/cancel, using the id given in the 'operation' query parameter.
 
             Parameters:
                 None
@@ -129,14 +151,62 @@ class Packages(Endpoint):
             success = []
             failure = []
 
+            with operation(request.args.get("operation")) as token:
+                if request.get_json().get("blue_green", False):
+                    pkgs = {MagicMirrorPackage(**package): package for package in packages}
+                    restart, warning = self.controller.restart, None
+
+                    if self.env.MMPM_IS_DOCKER_IMAGE.get():
+                        warning = "Cannot restart MagicMirror from within a Docker image. Restart MagicMirror for the changes to take effect"
+                        logger.warning(warning)
+                        restart = None
+
+                    upgraded, downtime = blue_green_upgrade(pkgs.keys(), restart, token)
+
+                    for pkg, package in pkgs.items():
+                        if pkg in upgraded:
+                            success.append(package)
+                        else:
+                            failure.append(package)
+
+                    return self.success({"success": success, "failure": failure, "downtime": downtime, "warning": warning})
+
+                for package in packages:
+                    pkg = MagicMirrorPackage(**package)
+
+                    if pkg.upgrade(token=token):
+                        logger.debug(f"Upgraded {pkg.title}")
+                        success.append(package)
+                    else:
+                        logger.debug(f"Failed to upgrade {pkg.title}")
+                        failure.append(package)
+
+            return self.success({"success": success, "failure": failure})
+
+        @self.blueprint.route("/rollback", methods=[http.POST])
+        def rollback() -> Response:
+            """
+            A Flask route method for restoring the previous version of selected MagicMirror packages.
+
+            Parameters:
+                None
+
+            Returns:
+                Response: A Flask Response object containing the status of each rollback attempt.
+            """
+
+            packages = request.get_json()["packages"]
+            success = []
+            failure = []
+
             for package in packages:
                 pkg = MagicMirrorPackage(**package)
 
-                if pkg.upgrade():
-                    logger.debug(f"Upgraded {pkg.title}")
+                if pkg.rollback():
+                    logger.debug(f"Rolled back {pkg.title}")
                     success.append(package)
                 else:
-                    logger.debug(f"Failed to upgrade {pkg.title}")
+                    logger.debug(f"Failed to roll back {pkg.title}")
                     failure.append(package)
 
             return self.success({"success": success, "failure": failure})
@@ -200,16 +270,49 @@ class Packages(Endpoint):
 
             package = request.get_json()["packages"][0]
             remote = RemotePackage(MagicMirrorPackage(**package))
-            health = remote.health()
-
-            for status in health.values():
-                if status["error"]:
-                    message = status["error"]
-                    logger.error(message)
-                    return self.failure(message, code=400)
-                elif status["warning"]:
-                    message = status["warning"]
-                    logger.warning(message)
-                    return self.failure(message, code=400)
+
+            # cached details are served without contacting the remote APIs
+            if remote.cache.get(remote.package.repository) is None:
+                health = remote.health()
+
+                for status in health.values():
+                    if status["error"]:
+                        message = status["error"]
+                        logger.error(message)
+                        return self.failure(message, code=400)
+                    elif status["warning"]:
+                        message = status["warning"]
+                        logger.warning(message)
+                        return self.failure(message, code=400)
 
             return self.success(remote.serialize())
+
+        @self.blueprint.route("/details/batch", methods=[http.POST])
+        def details_batch() -> Response:
+            """
+            A Flask route method for retrieving detailed information about many MagicMirror packages at once. The
+            packages are selected by the 'packages' list of the request, or all packages of a 'category', or all
+            'installed' packages.
+
+            Parameters:
+                None
+
+            Returns:
+                Response: A Flask Response object containing the packages, each with its remote 'details'.
+            """
+
+            body = request.get_json() or {}
+
+            if body.get("category") or body.get("installed"):
+                self.db.load()
+                packages = [
+                    package
+                    for package in self.db.packages
+                    if (not body.get("category") or package.category == body["category"]) and (not body.get("installed") or package.is_installed)
+                ]
+            else:
+                packages = [MagicMirrorPackage(**package) for package in body.get("packages", [])]
+
+            details = fetch_remote_details(packages, cached=not body.get("refresh", False))
+
+            return self.success([{**package.serialize(full=True), "details": details[package.repository]} for package in packages])
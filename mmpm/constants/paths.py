@@ -1,22 +1,85 @@
 #!/usr/bin/env python3
+"""
+Paths of the MMPM directories and files. The directories and files are created the first time any of
+the paths is accessed, rather than at import time, so processes that never use them (ie. `mmpm --help`)
+skip the filesystem work entirely.
+"""
+
 from pathlib import Path
+from threading import Lock
+from typing import Dict
 
 HOME_DIR = Path.home()
-MMPM_CONFIG_DIR = HOME_DIR / ".config" / "mmpm"
-MMPM_LOG_DIR = MMPM_CONFIG_DIR / "log"
-MMPM_CLI_LOG_FILE = MMPM_LOG_DIR / "mmpm-cli.log"
-MMPM_ENV_FILE = MMPM_CONFIG_DIR / "mmpm-env.json"
-MMPM_CUSTOM_PACKAGES_FILE = MMPM_CONFIG_DIR / "mmpm-custom-packages.json"
-MMPM_AVAILABLE_UPGRADES_FILE = MMPM_CONFIG_DIR / "mmpm-available-upgrades.json"
-MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE = MMPM_CONFIG_DIR / "MagicMirror-3rd-party-packages-db.json"
-MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE = MMPM_CONFIG_DIR / "MagicMirror-3rd-party-packages-db-last-update.json"
-
-# Setup the directories and files
-MMPM_CONFIG_DIR.mkdir(exist_ok=True, parents=True)
-MMPM_LOG_DIR.mkdir(exist_ok=True)
-MMPM_CLI_LOG_FILE.touch(exist_ok=True)
-MMPM_ENV_FILE.touch(exist_ok=True)
-MMPM_CUSTOM_PACKAGES_FILE.touch(exist_ok=True)
-MMPM_AVAILABLE_UPGRADES_FILE.touch(exist_ok=True)
-MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE.touch(exist_ok=True)
-MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE.touch(exist_ok=True)
+
+__lock__ = Lock()
+
+
+def __paths__() -> Dict[str, Path]:
+    """
+    Builds the paths of the MMPM directories and files.
+
+    Parameters:
+        None
+
+    Returns:
+        Dict[str, Path]: the paths, keyed by the name of their module attribute
+    """
+
+    config_dir = HOME_DIR / ".config" / "mmpm"
+    log_dir = config_dir / "log"
+
+    return {
+        "MMPM_CONFIG_DIR": config_dir,
+        "MMPM_LOG_DIR": log_dir,
+        "MMPM_CLI_LOG_FILE": log_dir / "mmpm-cli.log",
+        "MMPM_ENV_FILE": config_dir / "mmpm-env.json",
+        "MMPM_DAEMON_SOCKET": config_dir / "mmpm-daemon.sock",
+        "MMPM_CUSTOM_PACKAGES_FILE": config_dir / "mmpm-custom-packages.json",
+        "MMPM_AVAILABLE_UPGRADES_FILE": config_dir / "mmpm-available-upgrades.json",
+        "MMPM_UPDATE_CHECKS_FILE": config_dir / "mmpm-update-checks.json",
+        "MMPM_VERSION_CHECK_FILE": config_dir / "mmpm-version-check.json",
+        "MMPM_COMPLETION_INDEX_FILE": config_dir / "mmpm-completion-index.json",
+        "MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE": config_dir / "MagicMirror-3rd-party-packages-db.json",
+        "MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE": config_dir / "MagicMirror-3rd-party-packages-db-last-update.json",
+        "MAGICMIRROR_3RD_PARTY_PACKAGES_REMOTE_METADATA_FILE": config_dir / "MagicMirror-3rd-party-packages-remote-metadata.json",
+    }
+
+
+def __getattr__(name: str) -> Path:
+    """
+    Called for module attributes that aren't set yet. On first use, creates the directories and files, and
+    stores every path as a module attribute, so later accesses are plain attribute lookups.
+
+    Parameters:
+        name (str): the name of the attribute
+
+    Returns:
+        Path: the requested path
+
+    Raises:
+        AttributeError: if the name isn't a known path
+    """
+
+    with __lock__:
+        existing = globals().get(name)
+
+        if isinstance(existing, Path):  # another thread finished the setup while this one was waiting
+            return existing
+
+        paths = __paths__()
+
+        if name not in paths:
+            raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+        for key, path in paths.items():
+            if key.endswith("_DIR"):
+                path.mkdir(exist_ok=True, parents=True)
+
+        for key, path in paths.items():
+            # touching an existing file would bump its modification time, which is used to detect changes
+            if key.endswith("_FILE") and not path.exists():
+                path.touch(exist_ok=True)
+
+        globals().update(paths)
+
+    return paths[name]
@@ -1,7 +1,5 @@
 #!/usr/bin/env python3
-from mmpm.utils import get_host_ip
-
-HOST = f"{get_host_ip()}"
+from functools import lru_cache
 
 MMPM_UI_PORT = 7890
 MMPM_API_SERVER_PORT = 7891
@@ -15,3 +13,40 @@ MMPM_WIKI_URL = "https://github.com/Bee-Mar/mmpm/wiki"
 MAGICMIRROR_WIKI_URL: str = "https://github.com/MichMich/MagicMirror/wiki"
 MAGICMIRROR_DOCUMENTATION_URL: str = "https://docs.magicmirror.builders/"
 MAGICMIRROR_MODULES_URL: str = "https://github.com/MichMich/MagicMirror/wiki/3rd-party-modules"
+
+
+@lru_cache(maxsize=None)
+def __host__() -> str:
+    """
+    Determines the IP address of the host the first time it's needed, since it requires opening a socket.
+
+    Parameters:
+        None
+
+    Returns:
+        str: the IP address of the host
+    """
+
+    from mmpm.utils import get_host_ip  # pylint: disable=import-outside-toplevel
+
+    return f"{get_host_ip()}"
+
+
+def __getattr__(name: str) -> str:
+    """
+    Computes the attributes depending on the host, ie. HOST, on first use rather than at import time.
+
+    Parameters:
+        name (str): the name of the attribute
+
+    Returns:
+        str: the value of the attribute
+
+    Raises:
+        AttributeError: if the name isn't a known attribute
+    """
+
+    if name == "HOST":
+        return __host__()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Thin client of the MMPM daemon. Only imports the standard library, so the CLI can hand queries to a running
+daemon without loading the database layer.
+"""
+
+import json
+import socket
+from typing import Any, Dict, List, Optional
+
+from mmpm.__version__ import version
+from mmpm.constants import paths
+
+# the subcommands the daemon answers, which only read the database and installed packages
+DAEMON_SUBCOMMANDS = ("search", "list", "show")
+
+
+def handles(argv: List[str]) -> bool:
+    """
+    Checks if the daemon can answer the command given by the arguments.
+
+    Parameters:
+        argv (List[str]): the arguments of the command, excluding the name of the program
+
+    Returns:
+        bool: True if the command can be sent to the daemon, False otherwise
+    """
+
+    return bool(argv) and argv[0] in DAEMON_SUBCOMMANDS
+
+
+def __send__(request: Dict[str, Any], connect_timeout: float, timeout: float) -> Optional[Dict[str, Any]]:
+    """
+    Sends a request to the daemon, and waits for the response.
+
+    Parameters:
+        request (Dict[str, Any]): the request
+        connect_timeout (float): the number of seconds to wait for the daemon to accept the connection
+        timeout (float): the number of seconds to wait for the daemon to respond
+
+    Returns:
+        Optional[Dict[str, Any]]: the response, or None if the daemon isn't running or didn't respond
+    """
+
+    socket_path = paths.MMPM_DAEMON_SOCKET
+
+    if not socket_path.exists():
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(connect_timeout)
+            connection.connect(str(socket_path))
+            connection.settimeout(timeout)
+            connection.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+            with connection.makefile("rb") as stream:
+                response = json.loads(stream.readline())
+    except (OSError, ValueError):
+        return None
+
+    return response if isinstance(response, dict) else None
+
+
+def ping(timeout: float = 1.0) -> Optional[Dict[str, Any]]:
+    """
+    Checks if the daemon is running.
+
+    Parameters:
+        timeout (float): the number of seconds to wait for the daemon to respond
+
+    Returns:
+        Optional[Dict[str, Any]]: the 'version' and 'pid' of the daemon, or None if it isn't running
+    """
+
+    return __send__({"ping": True}, connect_timeout=timeout, timeout=timeout)
+
+
+def query(argv: List[str], connect_timeout: float = 0.5, timeout: float = 60.0) -> Optional[Dict[str, Any]]:
+    """
+    Sends a command to the daemon, and waits for its output.
+
+    Parameters:
+        argv (List[str]): the arguments of the command, excluding the name of the program
+        connect_timeout (float): the number of seconds to wait for the daemon to accept the connection
+        timeout (float): the number of seconds to wait for the daemon to respond
+
+    Returns:
+        Optional[Dict[str, Any]]: the 'stdout', 'stderr', and exit 'code' of the command, or None if the
+        daemon isn't running or can't answer, in which case the command should be executed in-process
+    """
+
+    response = __send__({"version": version, "argv": argv}, connect_timeout, timeout)
+
+    if response is not None and "error" in response:
+        return None
+
+    return response
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+The MMPM daemon: a long-lived process keeping the database and the installed packages loaded in memory, which
+answers the read-only subcommands (see client.DAEMON_SUBCOMMANDS) sent by the CLI over a Unix socket.
+"""
+
+import io
+import json
+import logging
+import os
+import signal
+import socketserver
+import threading
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Any, Dict, List, Optional, Tuple, cast
+
+from mmpm.__version__ import version
+from mmpm.constants import paths
+from mmpm.daemon import client
+from mmpm.entrypoint import build_parser
+from mmpm.env import MMPMEnv
+from mmpm.log.factory import MMPMLogFactory, StdoutFormatter
+from mmpm.magicmirror.database import MagicMirrorDatabase
+from mmpm.subcommands.sub_cmd import SubCmd
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+
+class MMPMDaemon:
+    """
+    Executes the commands sent by the CLI against the in-memory database. Before each command, the database is
+    reloaded if the database files, the env file, or the MagicMirror modules directory changed since it was loaded.
+
+    Attributes:
+        app_name (str): the name of the application
+        database (MagicMirrorDatabase): the database kept in memory
+        env (MMPMEnv): the MMPM environment variables
+
+    Methods:
+        refresh(): Reloads the database if anything it depends on changed
+        execute(request): Executes a command sent by the CLI
+    """
+
+    def __init__(self, app_name: str = "mmpm"):
+        self.app_name = app_name
+        self.database = MagicMirrorDatabase()
+        self.env = MMPMEnv()
+        self.__lock = threading.Lock()
+        self.__state: Optional[Tuple[float, ...]] = None
+
+    def __state__(self) -> Tuple[float, ...]:
+        """
+        Returns the modification times of everything the loaded database depends on. A missing file counts as 0.
+
+        Parameters:
+            None
+
+        Returns:
+            Tuple[float, ...]: the modification times
+        """
+
+        files = [
+            paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE,
+            paths.MMPM_CUSTOM_PACKAGES_FILE,
+            paths.MMPM_ENV_FILE,
+            self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules",  # installing or removing a package changes its mtime
+        ]
+
+        state = []
+
+        for file in files:
+            try:
+                state.append(os.stat(file).st_mtime)
+            except OSError:
+                state.append(0.0)
+
+        return tuple(state)
+
+    def refresh(self) -> None:
+        """
+        Reloads the database if anything it depends on changed since it was loaded.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        state = self.__state__()
+
+        if state != self.__state:
+            logger.debug("Loading database into the daemon")
+            self.database.load()
+            self.__state = state
+
+    def execute(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Executes a command sent by the CLI, capturing what it prints and logs.
+
+        Parameters:
+            request (Dict[str, Any]): the 'version' of the client, and the 'argv' of the command, or 'ping'
+
+        Returns:
+            Dict[str, Any]: the 'stdout', 'stderr', and exit 'code' of the command, or an 'error' if the daemon can't run it.
+            A ping is answered with the 'version' and 'pid' of the daemon.
+        """
+
+        if request.get("ping"):
+            return {"version": version, "pid": os.getpid()}
+
+        argv: List[str] = request.get("argv") or []
+
+        if request.get("version") != version:
+            return {"error": f"Client version {request.get('version')} does not match daemon version {version}"}
+
+        if not argv or argv[0] not in client.DAEMON_SUBCOMMANDS:
+            return {"error": f"The daemon only handles: {', '.join(client.DAEMON_SUBCOMMANDS)}"}
+
+        # subcommands print to stdout, so commands are executed one at a time
+        with self.__lock:
+            self.refresh()
+            return self.__run__(argv)
+
+    def __run__(self, argv: List[str]) -> Dict[str, Any]:
+        stdout, stderr = io.StringIO(), io.StringIO()
+
+        # forward what the command logs to the client, the way the CLI would print it. Every module logs through
+        # its own child of the "mmpm" logger, so the handler is attached to the parent of all of them
+        handler = logging.StreamHandler(stderr)
+        handler.setFormatter(StdoutFormatter())
+        handler.setLevel(self.env.MMPM_LOG_LEVEL.get())
+        handler.addFilter(lambda record: record.thread == threading.get_ident())
+        parent = logging.getLogger("mmpm")
+        parent.addHandler(handler)
+
+        code = 0
+
+        try:
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                parser, loader = build_parser(self.app_name, argv)
+                args, extra = parser.parse_known_args(argv)
+                cast(SubCmd, loader.objects[args.subcmd]).exec(args, extra)
+        except SystemExit as exit_:  # ie. argparse errors, or --help
+            code = exit_.code if isinstance(exit_.code, int) else int(exit_.code is not None)
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            logger.error(f"Daemon failed to execute '{' '.join(argv)}': {error}")
+            code = 1
+        finally:
+            parent.removeHandler(handler)
+
+        return {"stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "code": code}
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Reads one JSON request per connection, and writes back the JSON response.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        self.wfile.write(json.dumps(self.server.daemon.execute(request)).encode("utf-8") + b"\n")
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """
+    The Unix socket server of the daemon.
+
+    Attributes:
+        daemon (MMPMDaemon): executes the requests
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, daemon: MMPMDaemon):
+        self.daemon = daemon
+        super().__init__(socket_path, DaemonRequestHandler)
+
+
+def serve() -> None:
+    """
+    Loads the database, and serves requests on MMPM_DAEMON_SOCKET until interrupted or terminated. A socket left behind by a
+    daemon that didn't exit cleanly is replaced, but a socket belonging to a running daemon is left alone.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
+
+    socket_path = paths.MMPM_DAEMON_SOCKET
+
+    if socket_path.exists():
+        if client.ping():
+            logger.error(f"The daemon is already running, listening on {socket_path}")
+            return
+
+        socket_path.unlink()
+
+    daemon = MMPMDaemon()
+    daemon.refresh()
+
+    try:
+        with DaemonServer(str(socket_path), daemon) as server:
+            os.chmod(socket_path, 0o600)
+            # shutdown() blocks until serve_forever() returns, so it can't be called from the main thread itself
+            signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+            logger.info(f"Daemon listening on {socket_path}")
+            server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Daemon stopped")
+    finally:
+        socket_path.unlink(missing_ok=True)
@@ -1,35 +1,35 @@
 #!/usr/bin/env python3
+import os
 import sys
 from argparse import ArgumentParser
+from typing import List, Optional, Tuple
 
 import argcomplete
 
-import mmpm.subcommands
 from mmpm.constants import urls
+from mmpm.daemon import client
 from mmpm.log.factory import MMPMLogFactory
-from mmpm.subcommands.loader import Loader
+from mmpm.profiling import PROFILE_STARTUP_ENV_VAR, profile_startup
+from mmpm.subcommands.completers import PACKAGE_COMPLETERS
+from mmpm.subcommands.loader import LazyLoader
+from mmpm.subcommands.manifest import SUBCOMMANDS
 
 logger = MMPMLogFactory.get_logger(__name__)
 
 
-# for the console script
-def main():
+def build_parser(app_name: str, argv: Optional[List[str]] = None) -> Tuple[ArgumentParser, LazyLoader]:
     """
-    Initializes all subcommand and their options.
+    Creates the main parser, and registers the subcommands with it. Only the subcommand invoked by the
+    arguments is imported and has its options registered.
 
     Parameters:
-        None
+        app_name (str): the name of the application
+        argv (Optional[List[str]]): the arguments being parsed, defaults to the arguments of the current invocation
 
     Returns:
-        None
+        Tuple[ArgumentParser, LazyLoader]: the parser, and the loader holding the invoked subcommand
     """
 
-    if "--help" in sys.argv or "-h" in sys.argv:
-        # close up any SocketIO connection in the logger that could linger before it becomes a problem
-        MMPMLogFactory.shutdown()
-
-    app_name = "mmpm"
-
     parser = ArgumentParser(
         prog=app_name,
         usage=f"{app_name} <subcommand> [option(s)]",
@@ -47,15 +47,44 @@ def main():
         metavar="",
     )
 
-    loader = Loader(
-        module_path=mmpm.subcommands.__path__,
-        module_name="mmpm.subcommands",
-        app_name=app_name,
-        prefix="_sub_cmd",
-    )
+    # only the invoked subcommand is imported, keeping `--help` and tab-completion fast
+    loader = LazyLoader(manifest=SUBCOMMANDS, module_name="mmpm.subcommands", app_name=app_name, completers=PACKAGE_COMPLETERS)
+    loader.register(subparser, argv)
+
+    return parser, loader
+
+
+# for the console script
+def main():
+    """
+    Initializes all subcommands, and the options of the invoked subcommand. Queries the daemon can
+    answer are sent to it when it's running, and executed in-process otherwise.
+
+    Parameters:
+        None
+
+    Returns:
+        None
+    """
 
-    for subcommand in loader.objects.values():
-        subcommand.register(subparser)
+    profile = os.environ.get(PROFILE_STARTUP_ENV_VAR, "")
+
+    if profile and profile != "0":
+        sys.exit(profile_startup(sys.argv[1:], limit=int(profile) if profile.isdigit() and int(profile) > 1 else 30))
+
+    if "--help" in sys.argv or "-h" in sys.argv:
+        # close up any SocketIO connection in the logger that could linger before it becomes a problem
+        MMPMLogFactory.shutdown()
+    elif "_ARGCOMPLETE" not in os.environ and client.handles(sys.argv[1:]):
+        response = client.query(sys.argv[1:])
+
+        if response is not None:
+            sys.stdout.write(response["stdout"])
+            sys.stderr.write(response["stderr"])
+            sys.exit(response["code"])
+
+    app_name = "mmpm"
+    parser, loader = build_parser(app_name)
 
     argcomplete.autocomplete(parser)
 
@@ -1,11 +1,9 @@
 #!/usr/bin/env python3
 import json
-from os.path import getmtime
+import os
 from pathlib import Path
-
-from pygments import highlight
-from pygments.formatters.terminal import TerminalFormatter
-from pygments.lexers.data import JsonLexer
+from threading import Lock
+from time import monotonic
 
 from mmpm.constants import color, paths
 from mmpm.singleton import Singleton
@@ -19,39 +17,129 @@ MMPM_DEFAULT_ENV: dict = {
     "MMPM_LOG_LEVEL": "INFO",
 }
 
+# credentials are only read from the process environment, so they're never written to the MMPM_ENV_FILE, nor
+# sent by the API. A value left in the MMPM_ENV_FILE by hand is ignored.
+MMPM_SECRET_ENV = ("MMPM_GITHUB_TOKEN",)
+
+
+class EnvSnapshot:
+    """
+    The parsed contents of the MMPM_ENV_FILE, shared by every EnvVar. The file is stat'ed at most once every
+    `interval` seconds, and only re-read and re-parsed when its modification time, size, or inode changed, so
+    reading an environment variable is usually a dictionary lookup. Each re-read creates a new dictionary, so
+    readers can tell the contents changed by comparing identities.
+
+    Attributes:
+        interval (float): the minimum number of seconds between two checks of the MMPM_ENV_FILE
+
+    Methods:
+        values(): Returns the parsed environment variables, re-reading the MMPM_ENV_FILE if it changed
+        update(values): Replaces the snapshot with the given environment variables
+    """
+
+    __slots__ = "interval", "__values", "__stamp", "__checked", "__lock"
+
+    def __init__(self, interval: float = 1.0):
+        self.interval: float = interval
+        self.__values: dict = {}
+        self.__stamp: tuple = None
+        self.__checked: float = None
+        self.__lock = Lock()
+
+    def values(self) -> dict:
+        """
+        Returns the parsed environment variables. The returned dictionary is shared, and must not be modified.
+
+        Parameters:
+            None
+
+        Returns:
+            dict: the environment variables found in the MMPM_ENV_FILE
+        """
+
+        now = monotonic()
+
+        if self.__checked is not None and now - self.__checked < self.interval:
+            return self.__values
+
+        with self.__lock:
+            stat = os.stat(paths.MMPM_ENV_FILE)
+            stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+            if stamp != self.__stamp:
+                with open(paths.MMPM_ENV_FILE, "r", encoding="utf-8") as env:
+                    try:
+                        values = json.load(env)
+                    except json.JSONDecodeError:
+                        env.seek(0)
+
+                        # the file of a fresh install is empty until the defaults are written
+                        if env.read().strip():
+                            print(color.b_yellow("WARNING:"), "Unable to parse environment variables file.")
+
+                        values = {}
+
+                self.__values = values if isinstance(values, dict) else {}
+                self.__stamp = stamp
+
+            self.__checked = now
+
+        return self.__values
+
+    def update(self, values: dict) -> None:
+        """
+        Replaces the snapshot after this process wrote the MMPM_ENV_FILE, so the change is visible immediately,
+        rather than after the next check of the file.
+
+        Parameters:
+            values (dict): the environment variables that were written
+
+        Returns:
+            None
+        """
+
+        with self.__lock:
+            stat = os.stat(paths.MMPM_ENV_FILE)
+            self.__values = dict(values)
+            self.__stamp = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+            self.__checked = monotonic()
+
+
+snapshot = EnvSnapshot()
+
 
 class EnvVar:
     """
     Represents a re-readable environment variable stored in the MMPM_ENV_FILE.
-    When a change in the last-modified time of the MMPM_ENV_FILE, the value is
-    re-read. The __slots__ are predefined to improve efficiency.
+    The value is read from the EnvSnapshot shared by all environment variables,
+    and converted to the type of the default again only when the snapshot changed.
+    The __slots__ are predefined to improve efficiency.
 
     Attributes:
         name (str): the name of the environment variable
         default (Any): the default value
         __tipe (object): the class the environment should be initialized as
-        __mtime (object): the last modified time of the MMPM_ENV_FILE
-        __value (object): the value read from the MMPM_ENV_FILE
+        __source (dict): the snapshot contents the value was read from
+        __value (object): the value read from the snapshot
 
     Methods:
         get(): Returns the value of the environment variable
     """
 
-    __slots__ = "name", "default", "__tipe", "__value", "__mtime"
+    __slots__ = "name", "default", "__tipe", "__value", "__source"
 
-    def __init__(self, name: str = "", default=None, mtime: float = None):
+    def __init__(self, name: str = "", default=None):
         self.name: str = name
         self.default = default
         self.__tipe = type(default)  # avoid name clashing with 'type'
-        self.__mtime: float = mtime
+        self.__source: dict = None
         self.__value = None
 
     def get(self):
         """
-        Reads environment variables from the MMPM_ENV_FILE. In order to ensure
-        hot-reloading is usable in the UI, the environment variables need to be
-        re-read from the file each time. Otherwise, cached data will be sent back
-        to the user.
+        Reads the environment variable from the shared snapshot of the MMPM_ENV_FILE. In order to ensure
+        hot-reloading is usable in the UI, the snapshot is refreshed when the file changes. Otherwise,
+        cached data will be sent back to the user.
 
         Parameters:
             None
@@ -60,25 +148,13 @@ class EnvVar:
             value:  the value of the environment variable key
         """
 
-        mtime: float = getmtime(paths.MMPM_ENV_FILE)
-
-        if mtime != self.__mtime or self.__value is None:  # cache the value until the file modification time changes
-            with open(paths.MMPM_ENV_FILE, "r", encoding="utf-8") as env:
-                env_vars = {}
-
-                try:
-                    env_vars = json.load(env)
-                except json.JSONDecodeError:
-                    print(
-                        color.b_yellow("WARNING:"),
-                        "Unable to parse environment variables file.",
-                    )
+        env_vars = snapshot.values()
 
-                # make sure we construct the expected type using from parsed data, otherwise instead of
-                # something like a Path object we would return a string
-                self.__value = self.__tipe(self.default if self.name not in env_vars else env_vars.get(self.name))
-
-            self.__mtime = mtime
+        if env_vars is not self.__source:  # cache the value until the snapshot changes
+            # make sure we construct the expected type using from parsed data, otherwise instead of
+            # something like a Path object we would return a string
+            self.__value = self.__tipe(env_vars.get(self.name, self.default))
+            self.__source = env_vars
 
         return self.__value
 
@@ -101,6 +177,7 @@ class MMPMEnv(Singleton):
     Methods:
         __init__(): Initializes the MMPMEnv instance, loading environment variables from MMPM_ENV_FILE.
         get(): Retrieves the current environment variables as a dictionary.
+        write(env_vars): Writes the environment variables to the MMPM_ENV_FILE.
         display(): Prints the current environment variables in a formatted JSON structure for easy viewing.
     """
 
@@ -115,36 +192,56 @@ class MMPMEnv(Singleton):
         self.MMPM_IS_DOCKER_IMAGE: EnvVar = None
         self.MMPM_LOG_LEVEL: EnvVar = None
 
-        env_vars = {}
+        env_vars = snapshot.values()
 
-        with open(paths.MMPM_ENV_FILE, "r", encoding="utf-8") as env_file:
-            try:
-                env_vars = json.load(env_file)
-            except json.JSONDecodeError:
-                pass
+        # only write the file when it lacks some of the defaults, rather than on every start
+        if any(key not in env_vars for key in MMPM_DEFAULT_ENV):
+            self.write({**MMPM_DEFAULT_ENV, **env_vars})
 
-            for key, value in MMPM_DEFAULT_ENV.items():
-                if key not in env_vars:
-                    env_vars[key] = value
+        for key, value in MMPM_DEFAULT_ENV.items():
+            if hasattr(self, key):
+                setattr(self, key, EnvVar(name=key, default=value))
 
-        env_vars["MMPM_MAGICMIRROR_ROOT"] = str(env_vars["MMPM_MAGICMIRROR_ROOT"])
+    def get(self) -> dict:
+        """
+        Retrieves the current environment variables, other than the MMPM_SECRET_ENV.
 
-        with open(paths.MMPM_ENV_FILE, "w", encoding="utf-8") as env:
-            json.dump(env_vars, env, indent=2)
+        Parameters:
+            None
 
-        mtime: float = getmtime(paths.MMPM_ENV_FILE)
+        Returns:
+            dict: a copy of the environment variables found in the MMPM_ENV_FILE
+        """
 
-        for key, value in MMPM_DEFAULT_ENV.items():
-            if hasattr(self, key):
-                setattr(self, key, EnvVar(name=key, default=value, mtime=mtime))
+        return {key: value for key, value in snapshot.values().items() if key not in MMPM_SECRET_ENV}
 
-    def get(self) -> dict:
-        current_env = {}
+    def write(self, env_vars: dict) -> None:
+        """
+        Writes the environment variables to the MMPM_ENV_FILE, and updates the shared snapshot, so the new values
+        are used by this process right away. The file is written under a temporary name, and renamed into place,
+        so other processes never read a partial file. The MMPM_SECRET_ENV are never written.
+
+        Parameters:
+            env_vars (dict): the environment variables to write
 
-        with open(paths.MMPM_ENV_FILE, "r", encoding="utf-8") as env:
-            current_env = json.load(env)
+        Returns:
+            None
+        """
+
+        env_vars = {key: str(value) if isinstance(value, Path) else value for key, value in env_vars.items() if key not in MMPM_SECRET_ENV}
 
-        return current_env
+        temp_file = paths.MMPM_ENV_FILE.with_name(f"{paths.MMPM_ENV_FILE.name}.{os.getpid()}.tmp")
+
+        with open(temp_file, "w", encoding="utf-8") as env:
+            json.dump(env_vars, env, indent=2)
+
+        os.replace(temp_file, paths.MMPM_ENV_FILE)
+        snapshot.update(env_vars)
 
     def display(self) -> None:  # pragma: no cover
+        # pygments is only needed here, and every process imports this module, including the thin daemon client
+        from pygments import highlight  # pylint: disable=import-outside-toplevel
+        from pygments.formatters.terminal import TerminalFormatter  # pylint: disable=import-outside-toplevel
+        from pygments.lexers.data import JsonLexer  # pylint: disable=import-outside-toplevel
+
         print(highlight(json.dumps(self.get(), indent=2), JsonLexer(), TerminalFormatter()))
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Zip archives of the MMPM log directory, generated as they are streamed, without writing a temporary file. The
+compressed members of the log files are kept in memory, keyed on the size and modification time of each file,
+and sent again as long as their file doesn't change. The current CLI log file is written to by every request,
+so it's always compressed again. Rotated log files are already compressed with gzip when they rotate (see
+MMPMLogFactory), so they are stored in the archive as they are, rather than compressed again.
+
+zipfile.ZipFile has no way of writing a member that is already compressed, so the archives are written by
+ZipWriter, which writes the few records of the format (https://pkware.cachefly.net/webdocs/APPNOTE/APPNOTE-6.3.9.TXT)
+itself. Since the archive is streamed, the sizes and CRC of each member are written after its data, in a data
+descriptor, so a member doesn't depend on where it's written, other than its offset in the central directory.
+"""
+
+import datetime
+import os
+import struct
+import time
+import zlib
+from functools import partial
+from pathlib import Path
+from threading import Lock
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from mmpm.constants import paths
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+
+# the largest size, or offset, of the format without the ZIP64 extensions, which log files are well below
+ZIP_LIMIT = 0xFFFFFFFF
+
+
+def archive_name(today: Optional[datetime.date] = None) -> str:
+    """
+    Creates the file name of a log archive, which includes the date.
+
+    Parameters:
+        today (Optional[datetime.date]): the date, defaults to today
+
+    Returns:
+        str: the file name (ie. 'mmpm-logs-2024-1-31.zip')
+    """
+
+    today = today or datetime.date.today()
+    return f"mmpm-logs-{today.year}-{today.month}-{today.day}.zip"
+
+
+class ZipEntry(NamedTuple):
+    """
+    The central directory entry of a member, other than its offset.
+
+    Attributes:
+        name (bytes): the encoded path of the member
+        flags (int): the general purpose bit flags
+        method (int): the compression method, ZIP_STORED or ZIP_DEFLATED
+        dos_time (int): the modification time, in MS-DOS format
+        dos_date (int): the modification date, in MS-DOS format
+        crc (int): the CRC-32 of the uncompressed data
+        compressed_size (int): the size of the compressed data
+        size (int): the size of the uncompressed data
+        external_attr (int): the Unix file mode, in the high 16 bits
+    """
+
+    name: bytes
+    flags: int
+    method: int
+    dos_time: int
+    dos_date: int
+    crc: int
+    compressed_size: int
+    size: int
+    external_attr: int
+
+
+class ZipWriter:
+    """
+    Writes the records of a zip archive, without the ZIP64 extensions. The bytes of each member are returned to
+    the caller as they're generated, and the entries of the central directory are kept until the archive is closed.
+
+    Attributes:
+        offset (int): the number of bytes of the archive written so far
+        entries (List[Tuple[ZipEntry, int]]): the entry, and offset of each member written so far
+    """
+
+    VERSION = 20  # 2.0, deflate and data descriptors
+    MADE_BY_UNIX = 3 << 8
+
+    LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+    DATA_DESCRIPTOR = struct.Struct("<IIII")
+    CENTRAL_HEADER = struct.Struct("<IHHHHHHIIIHHHHHII")
+    END_OF_CENTRAL_DIRECTORY = struct.Struct("<IHHHHIIH")
+
+    FLAG_DATA_DESCRIPTOR = 1 << 3
+    FLAG_UTF8 = 1 << 11
+
+    def __init__(self) -> None:
+        self.offset = 0
+        self.entries: List[Tuple[ZipEntry, int]] = []
+
+    @staticmethod
+    def dos_datetime(mtime: float) -> Tuple[int, int]:
+        """
+        Converts a modification time to the MS-DOS format of the format, in local time, as zipfile does.
+
+        Parameters:
+            mtime (float): the modification time, in seconds since the epoch
+
+        Returns:
+            Tuple[int, int]: the time, and date
+        """
+
+        local = time.localtime(mtime)
+        dos_time = local.tm_hour << 11 | local.tm_min << 5 | local.tm_sec // 2
+        dos_date = (max(local.tm_year, 1980) - 1980) << 9 | local.tm_mon << 5 | local.tm_mday
+        return dos_time, dos_date
+
+    def member(self, name: str, stat: os.stat_result, method: int, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """
+        Compresses a member, yielding its local header, compressed data, and data descriptor.
+
+        Parameters:
+            name (str): the path of the member in the archive
+            stat (os.stat_result): the status of the file, for its modification time and mode
+            method (int): the compression method, ZIP_STORED or ZIP_DEFLATED
+            chunks (Iterator[bytes]): the uncompressed data
+
+        Returns:
+            Iterator[bytes]: the bytes of the member
+        """
+
+        flags = self.FLAG_DATA_DESCRIPTOR | (0 if name.isascii() else self.FLAG_UTF8)
+        encoded = name.encode("utf-8")
+        dos_time, dos_date = self.dos_datetime(stat.st_mtime)
+
+        header = self.LOCAL_HEADER.pack(0x04034B50, self.VERSION, flags, method, dos_time, dos_date, 0, 0, 0, len(encoded), 0)
+        yield header + encoded
+
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15) if method == ZIP_DEFLATED else None
+        crc, size, compressed_size = 0, 0, 0
+
+        for data in chunks:
+            crc = zlib.crc32(data, crc)
+            size += len(data)
+            data = compressor.compress(data) if compressor is not None else data
+            compressed_size += len(data)
+
+            if data:
+                yield data
+
+        if compressor is not None:
+            data = compressor.flush()
+            compressed_size += len(data)
+            yield data
+
+        yield self.DATA_DESCRIPTOR.pack(0x08074B50, crc, compressed_size, size)
+
+        entry = ZipEntry(encoded, flags, method, dos_time, dos_date, crc, compressed_size, size, (stat.st_mode & 0xFFFF) << 16)
+        self.append(entry, len(header) + len(encoded) + compressed_size + self.DATA_DESCRIPTOR.size)
+
+    def append(self, entry: ZipEntry, length: int) -> None:
+        """
+        Adds a member to the central directory, once its bytes are written.
+
+        Parameters:
+            entry (ZipEntry): the entry of the member
+            length (int): the number of bytes of the member, from its local header to its data descriptor
+
+        Returns:
+            None
+        """
+
+        self.entries.append((entry, self.offset))
+        self.offset += length
+
+    def close(self) -> bytes:
+        """
+        Creates the central directory, and the end of central directory record, which end the archive.
+
+        Parameters:
+            None
+
+        Returns:
+            bytes: the end of the archive
+        """
+
+        records = []
+
+        for entry, offset in self.entries:
+            records.append(
+                self.CENTRAL_HEADER.pack(
+                    0x02014B50,
+                    self.MADE_BY_UNIX | self.VERSION,
+                    self.VERSION,
+                    entry.flags,
+                    entry.method,
+                    entry.dos_time,
+                    entry.dos_date,
+                    entry.crc,
+                    entry.compressed_size,
+                    entry.size,
+                    len(entry.name),
+                    0,
+                    0,
+                    0,
+                    0,
+                    entry.external_attr,
+                    offset,
+                )
+            )
+            records.append(entry.name)
+
+        directory = b"".join(records)
+        count = len(self.entries)
+        return directory + self.END_OF_CENTRAL_DIRECTORY.pack(0x06054B50, 0, 0, count, count, len(directory), self.offset, 0)
+
+
+class ArchiveMember(NamedTuple):
+    """
+    A compressed member of a previous archive.
+
+    Attributes:
+        size (int): the size of the log file when it was compressed
+        mtime_ns (int): the modification time of the log file when it was compressed, in nanoseconds
+        entry (ZipEntry): the entry of the member in the central directory
+        data (bytes): the local header, compressed data, and data descriptor of the member
+    """
+
+    size: int
+    mtime_ns: int
+    entry: ZipEntry
+    data: bytes
+
+
+class LogArchive:
+    """
+    Generates zip archives of the MMPM log directory.
+
+    Attributes:
+        chunk_size (int): the number of bytes of a log file compressed at once
+        max_cache_size (int): the most bytes of compressed members kept in memory
+    """
+
+    def __init__(self, chunk_size: int = 64 * 1024, max_cache_size: int = 32 * 1024 * 1024):
+        self.chunk_size = chunk_size
+        self.max_cache_size = max_cache_size
+        self.__members: Dict[str, ArchiveMember] = {}
+        self.__lock = Lock()
+
+    @staticmethod
+    def fingerprint() -> Tuple[Tuple[str, int, int], ...]:
+        """
+        Lists the files of the log directory, with their sizes, and modification times.
+
+        Parameters:
+            None
+
+        Returns:
+            Tuple[Tuple[str, int, int], ...]: the path of each file relative to the log directory, its size, and its
+            modification time in nanoseconds, sorted by path
+        """
+
+        files = []
+
+        for directory, _, names in os.walk(paths.MMPM_LOG_DIR):
+            for name in names:
+                path = Path(directory) / name
+
+                try:
+                    stat = path.stat()
+                except OSError:  # ie. a log file that was just rotated
+                    continue
+
+                if path.is_file():
+                    files.append((path.relative_to(paths.MMPM_LOG_DIR).as_posix(), stat.st_size, stat.st_mtime_ns))
+
+        return tuple(sorted(files))
+
+    def stream(self) -> Iterator[bytes]:
+        """
+        Generates a zip archive of the log directory, yielding the compressed bytes as soon as they're available.
+        The members of files that didn't change since the last archive are sent again, instead of compressing the
+        files again.
+
+        Parameters:
+            None
+
+        Returns:
+            Iterator[bytes]: the bytes of the archive
+        """
+
+        active = paths.MMPM_CLI_LOG_FILE.name
+        writer = ZipWriter()
+        members: Dict[str, ArchiveMember] = {}
+        cache_size = 0
+
+        with self.__lock:
+            cached = dict(self.__members)
+
+        for name, size, mtime_ns in self.fingerprint():
+            member = cached.get(name)
+
+            if member is not None and (member.size, member.mtime_ns) == (size, mtime_ns):
+                writer.append(member.entry, len(member.data))
+                members[name] = member
+                cache_size += len(member.data)
+                yield member.data
+                continue
+
+            if size >= ZIP_LIMIT or writer.offset + size >= ZIP_LIMIT:
+                continue
+
+            try:
+                log_file = open(paths.MMPM_LOG_DIR / name, "rb")  # pylint: disable=consider-using-with
+            except OSError:
+                continue
+
+            written: List[bytes] = []
+
+            with log_file:
+                stat = os.fstat(log_file.fileno())
+                # rotated logs are already compressed
+                method = ZIP_STORED if name.endswith(".gz") else ZIP_DEFLATED
+
+                for data in writer.member(name, stat, method, iter(partial(log_file.read, self.chunk_size), b"")):
+                    written.append(data)
+                    yield data
+
+            compressed = b"".join(written)
+            unchanged = (stat.st_size, stat.st_mtime_ns) == (size, mtime_ns) and writer.entries[-1][0].size == size
+
+            # only keep members of files that didn't change while they were compressed
+            if name != active and unchanged and cache_size + len(compressed) <= self.max_cache_size:
+                members[name] = ArchiveMember(size, mtime_ns, writer.entries[-1][0], compressed)
+                cache_size += len(compressed)
+
+        yield writer.close()
+
+        with self.__lock:
+            self.__members = members
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+A bounded backlog of the most recent log records relayed by the SocketIO log server, replayed to clients that
+connect after the records were emitted (ie. the UI, opened in the middle of an install).
+"""
+
+import json
+import logging
+from collections import deque
+from typing import List, Optional
+
+
+class LogBacklog:
+    """
+    A ring buffer of JSON log records, as formatted by the JsonFormatter. Records are stored as received, and only
+    parsed when a replay is filtered.
+
+    Attributes:
+        records (deque): the most recent records, oldest first
+    """
+
+    def __init__(self, size: int = 1000):
+        """
+        Initializes the LogBacklog.
+
+        Parameters:
+            size (int): The maximum number of records kept, older ones are discarded first.
+        """
+
+        self.records: deque = deque(maxlen=size)
+
+    def append(self, record: str) -> None:
+        """
+        Stores a record, discarding the oldest one if the backlog is full.
+
+        Parameters:
+            record (str): the JSON log record
+
+        Returns:
+            None
+        """
+
+        self.records.append(record)
+
+    def replay(self, level: Optional[str] = None, logger: Optional[str] = None, limit: Optional[int] = None) -> List[str]:
+        """
+        Retrieves the stored records, optionally filtered by level and logger.
+
+        Parameters:
+            level (Optional[str]): the minimum level of the records (ie. 'WARNING')
+            logger (Optional[str]): the name of a logger, matching its records, and those of its children
+            limit (Optional[int]): the maximum number of records, keeping the most recent ones
+
+        Returns:
+            List[str]: the matching records, oldest first
+
+        Raises:
+            ValueError: if the level is unknown, or the limit is negative
+        """
+
+        threshold = None
+
+        if level:
+            threshold = logging.getLevelName(str(level).upper())
+
+            if not isinstance(threshold, int):
+                raise ValueError(f"Unknown log level '{level}'")
+
+        if limit is not None:
+            limit = int(limit)
+
+            if limit < 0:
+                raise ValueError(f"Invalid limit '{limit}'")
+
+        records = list(self.records)
+
+        if threshold is not None or logger:
+            records = [record for record in records if self.__matches__(record, threshold, logger)]
+
+        return records if limit is None else records[max(len(records) - limit, 0) :]
+
+    @staticmethod
+    def __matches__(record: str, threshold: Optional[int], logger: Optional[str]) -> bool:
+        try:
+            data = json.loads(record)
+        except (TypeError, ValueError):
+            return False
+
+        if not isinstance(data, dict):
+            return False
+
+        if threshold is not None:
+            levelno = logging.getLevelName(str(data.get("level", "")))
+
+            if not isinstance(levelno, int) or levelno < threshold:
+                return False
+
+        name = str(data.get("logger_name", ""))
+
+        return not logger or name == logger or name.startswith(f"{logger}.")
@@ -1,18 +1,23 @@
 #!/usr/bin/env python3
-import datetime
+import atexit
+import copy
 import json
 import logging
 import logging.handlers
 import os
+import queue
 import shutil
-from threading import Lock
-
-import socketio
+import time
+from threading import Lock, RLock, Thread
+from typing import TYPE_CHECKING, List, Optional
 
 from mmpm.__version__ import version
 from mmpm.constants import paths
 from mmpm.env import MMPMEnv
 
+if TYPE_CHECKING:
+    import socketio
+
 
 class JsonFormatter(logging.Formatter):
     """
@@ -47,30 +52,78 @@ class JsonFormatter(logging.Formatter):
             "line": record.lineno,
         }
 
+        # structured data provided through the 'extra' argument of a logging call, ie. resource usage of a command
+        if hasattr(record, "metrics"):
+            log_data["metrics"] = record.metrics
+
         return json.dumps(log_data, ensure_ascii=False)
 
 
 class SocketIOHandler(logging.Handler):
-    """A logging handler that emits records with SocketIO."""
+    """
+    A logging handler that emits records with SocketIO. The client is created, and connected, when the first
+    record is emitted rather than when the handler is created, so processes that never log don't pay for
+    importing socketio or connecting. Failed connections are retried at most once every `retry_interval` seconds,
+    and records emitted while disconnected are dropped. Batches of records, as handed over by the LogListener, are
+    sent with a single 'logs-batch' event.
+    """
 
-    def __init__(self, host, port):
+    def __init__(self, host, port, retry_interval: float = 30.0):
         """
         Initializes the SocketIOHandler with a specified host and port for the SocketIO server.
 
         Parameters:
             host (str): The host name of the SocketIO server.
             port (int): The port number of the SocketIO server.
+            retry_interval (float): The minimum number of seconds between connection attempts.
         """
 
         super().__init__()
         self.formatter = JsonFormatter()
-        self.sio = socketio.Client()
+        self.url = f"http://{host}:{port}"
+        self.retry_interval = retry_interval
+        self.sio: Optional["socketio.Client"] = None
+        self.__last_attempt: float = 0.0
+
+    @property
+    def connected(self) -> bool:
+        return self.sio is not None and self.sio.connected
+
+    def connect(self) -> bool:
+        """
+        Connects to the SocketIO server, unless already connected, or the last attempt was too recent.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if connected, False otherwise
+        """
+
+        if self.connected:
+            return True
+
+        now = time.monotonic()
+
+        if self.__last_attempt and now - self.__last_attempt < self.retry_interval:
+            return False
+
+        self.__last_attempt = now
+
+        import socketio  # pylint: disable=import-outside-toplevel
+
+        sio = self.sio
+
+        if sio is None:
+            sio = self.sio = socketio.Client()
 
         try:
-            self.sio.connect(f"http://{host}:{port}", wait=False)
+            sio.connect(self.url, wait=False)
         except socketio.exceptions.ConnectionError:
             pass
 
+        return self.connected
+
     def emit(self, record):
         """
         Emits the log record to the connected SocketIO server.
@@ -79,12 +132,34 @@ class SocketIOHandler(logging.Handler):
             record (logging.LogRecord): The log record to be emitted.
         """
 
-        if self.sio.connected:
+        if self.connect() and self.sio is not None:
             try:
                 self.sio.emit("logs", self.formatter.format(record))
             except Exception:
                 pass
 
+    def handle_batch(self, records: List[logging.LogRecord]) -> None:
+        """
+        Emits the records that pass the filters of the handler to the connected SocketIO server, as one event.
+
+        Parameters:
+            records (List[logging.LogRecord]): The log records to be emitted.
+
+        Returns:
+            None
+        """
+
+        records = [record for record in records if self.filter(record)]
+
+        if not records or not self.connect() or self.sio is None:
+            return
+
+        with self.lock:
+            try:
+                self.sio.emit("logs-batch", [self.formatter.format(record) for record in records])
+            except Exception:
+                pass
+
     def close(self):
         """
         Closes the connection to the SocketIO server and performs any necessary cleanup.
@@ -93,9 +168,247 @@ class SocketIOHandler(logging.Handler):
             None
         """
 
-        if self.sio.connected:
+        if self.connected:
             self.sio.disconnect()
-            super().close()
+
+        super().close()
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """
+    A logging handler that puts records on a bounded queue, for a LogListener to hand them to the slow handlers
+    (ie. the log file, and SocketIO) on a background thread. The caller never waits: when the queue is full, a
+    record is dropped according to the drop policy, and counted.
+
+    Attributes:
+        drop_policy (str): DROP_OLDEST to make room for the new record, or DROP_NEWEST to discard the new record
+        dropped (int): the number of records dropped so far
+    """
+
+    DROP_OLDEST = "oldest"
+    DROP_NEWEST = "newest"
+
+    def __init__(self, maxsize: int = 10000, drop_policy: str = DROP_OLDEST):
+        """
+        Initializes the BoundedQueueHandler.
+
+        Parameters:
+            maxsize (int): The maximum number of records waiting on the queue.
+            drop_policy (str): Which record to drop when the queue is full, BoundedQueueHandler.DROP_OLDEST or BoundedQueueHandler.DROP_NEWEST.
+
+        Raises:
+            ValueError: if the drop policy is unknown
+        """
+
+        if drop_policy not in (BoundedQueueHandler.DROP_OLDEST, BoundedQueueHandler.DROP_NEWEST):
+            raise ValueError(f"Unknown drop policy '{drop_policy}'")
+
+        # None is the sentinel stopping the LogListener
+        self.queue: "queue.Queue[Optional[logging.LogRecord]]" = queue.Queue(maxsize)
+        super().__init__(self.queue)
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self.__dropped_lock = Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Merges the arguments into the message of a copy of the record, and drops the traceback, so the record doesn't
+        keep the frames of the caller alive while it waits on the queue. Unlike the default implementation, the record
+        isn't formatted, leaving that to the handlers on the background thread.
+
+        Parameters:
+            record (logging.LogRecord): The log record to be queued.
+
+        Returns:
+            logging.LogRecord: The record to put on the queue.
+        """
+
+        record = copy.copy(record)
+
+        try:
+            record.msg, record.args = record.getMessage(), None
+        except TypeError:
+            pass  # the JsonFormatter reports the raw message and arguments instead
+
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """
+        Puts the record on the queue without blocking, applying the drop policy if the queue is full.
+
+        Parameters:
+            record (logging.LogRecord): The log record to be queued.
+
+        Returns:
+            None
+        """
+
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+
+        if self.drop_policy == BoundedQueueHandler.DROP_OLDEST:
+            try:
+                self.queue.get_nowait()
+                self.queue.put_nowait(record)
+            except (queue.Empty, queue.Full):
+                pass  # the listener emptied the queue, or other threads filled it again, either way one record is lost
+
+        with self.__dropped_lock:
+            self.dropped += 1
+
+
+class LogListener:
+    """
+    Hands the records of a BoundedQueueHandler to the given handlers, on a background thread. Every record that
+    queued up while the previous ones were being handled is taken at once, up to `batch_size`, and given in one
+    call to the handlers that support batches (ie. the SocketIOHandler). Records dropped by the queue handler are
+    reported with a warning, once per batch.
+    """
+
+    __sentinel = None
+
+    def __init__(self, queue_handler: BoundedQueueHandler, *handlers: logging.Handler, batch_size: int = 256):
+        """
+        Initializes the LogListener.
+
+        Parameters:
+            queue_handler (BoundedQueueHandler): The handler whose queue is read.
+            handlers (logging.Handler): The handlers the records are given to.
+            batch_size (int): The maximum number of records handled at once.
+        """
+
+        self.queue_handler = queue_handler
+        self.handlers = handlers
+        self.batch_size = batch_size
+        self.__reported_drops = 0
+        self.__thread: Thread = None
+
+    def start(self) -> None:
+        """
+        Starts handling records on a background thread.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        self.__thread = Thread(target=self.__monitor__, name="mmpm-log-listener", daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Handles the records that are already queued, and stops the background thread.
+
+        Parameters:
+            timeout (float): The maximum number of seconds to wait for the queued records to be handled.
+
+        Returns:
+            None
+        """
+
+        if self.__thread is None:
+            return
+
+        try:
+            self.queue_handler.queue.put(LogListener.__sentinel, timeout=timeout)
+        except queue.Full:
+            pass
+
+        self.__thread.join(timeout)
+        self.__thread = None
+
+    def handle(self, records: List[logging.LogRecord]) -> None:
+        """
+        Gives the records to each handler whose level they meet.
+
+        Parameters:
+            records (List[logging.LogRecord]): The log records to be handled.
+
+        Returns:
+            None
+        """
+
+        dropped = self.queue_handler.dropped
+
+        if dropped > self.__reported_drops:
+            message = f"Dropped {dropped - self.__reported_drops} log records, the log queue was full"
+            records = [*records, logging.makeLogRecord({"name": __name__, "levelno": logging.WARNING, "levelname": "WARNING", "msg": message})]
+            self.__reported_drops = dropped
+
+        for handler in self.handlers:
+            accepted = [record for record in records if record.levelno >= handler.level]
+
+            if not accepted:
+                continue
+
+            if hasattr(handler, "handle_batch"):
+                handler.handle_batch(accepted)
+            else:
+                for record in accepted:
+                    handler.handle(record)
+
+    def __monitor__(self) -> None:
+        records_queue = self.queue_handler.queue
+        running = True
+
+        while running:
+            batch: List[Optional[logging.LogRecord]] = [records_queue.get()]
+
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(records_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            running = LogListener.__sentinel not in batch
+            records = [record for record in batch if record is not LogListener.__sentinel]
+
+            if records:
+                self.handle(records)
+
+
+def __compressed_name__(name: str) -> str:
+    """
+    Names the rotated copies of a log file, which are compressed with gzip.
+
+    Parameters:
+        name (str): the default name of the rotated copy (ie. mmpm-cli.log.1)
+
+    Returns:
+        str: the name of the compressed copy (ie. mmpm-cli.log.1.gz)
+    """
+
+    return f"{name}.gz"
+
+
+def __compress_rotated__(source: str, destination: str) -> None:
+    """
+    Rotates a log file by compressing it with gzip. The compressed copy is written under a temporary name first,
+    so readers never find it incomplete.
+
+    Parameters:
+        source (str): the log file
+        destination (str): the name of the compressed copy
+
+    Returns:
+        None
+    """
+
+    import gzip  # pylint: disable=import-outside-toplevel
+
+    partial = f"{destination}.partial"
+
+    with open(source, "rb") as log_file, gzip.open(partial, "wb") as compressed:
+        shutil.copyfileobj(log_file, compressed)
+
+    os.replace(partial, destination)
+    os.remove(source)
 
 
 class StdoutFormatter(logging.Formatter):
@@ -119,71 +432,126 @@ class StdoutFormatter(logging.Formatter):
         return f"[{label}] {record.getMessage()}"
 
 
+class SetupHandler(logging.Handler):
+    """
+    The handler of the 'mmpm' logger until the first record is logged, which sets up the actual handlers (see
+    MMPMLogFactory), and passes the record on to them. Importing modules that log therefore doesn't touch the
+    log directory, or start the LogListener.
+    """
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        for handler in MMPMLogFactory.__setup__():
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.handle(record)
+
+
 class MMPMLogFactory:
     """
     A custom logging class for MMPM, providing functionalities for logging to files, stdout, and SocketIO.
-    Logs can be found in ~/.config/mmpm/log.
+    Logs can be found in ~/.config/mmpm/log. Records are written to stdout right away, while the log file and
+    SocketIO are handled by a LogListener on a background thread, so a slow disk or log server never slows down
+    the caller. Each module logs through its own child of the 'mmpm' logger, which holds the handlers, so records
+    keep the name of the module they came from.
     """
 
     __logger: logging.Logger = None
+    __file_handler: logging.Handler = None
     __socketio_handler: SocketIOHandler = None
-    __lock: Lock = Lock()
+    __queue_handler: BoundedQueueHandler = None
+    __listener: LogListener = None
+    __lock: RLock = RLock()
 
     @staticmethod
-    def __setup__(name: str) -> None:
-        MMPMLogFactory.__logger = logging.getLogger(name)
+    def __setup__() -> List[logging.Handler]:
+        """
+        Sets up the handlers of the 'mmpm' logger, unless they already are. Called by the SetupHandler when the
+        first record is logged.
 
-        file_handler = logging.handlers.RotatingFileHandler(
-            paths.MMPM_CLI_LOG_FILE,
-            mode="a",
-            maxBytes=1024 * 1024,
-            backupCount=2,
-            encoding="utf-8",
-            delay=False,
-        )
+        Parameters:
+            None
 
-        level = MMPMEnv().MMPM_LOG_LEVEL.get()
-        MMPMLogFactory.__logger.setLevel(logging.DEBUG)  # set the main logging handler set to the lowest level possible
+        Returns:
+            List[logging.Handler]: the handlers of the 'mmpm' logger, other than the SetupHandler
+        """
 
-        file_handler.setFormatter(JsonFormatter())
-        file_handler.setLevel(logging.DEBUG)  # always have the log files be DEBUG
-        MMPMLogFactory.__logger.addHandler(file_handler)
+        with MMPMLogFactory.__lock:
+            if MMPMLogFactory.__file_handler is None:
+                # the log file is only opened once the first record is written to it
+                file_handler = logging.handlers.RotatingFileHandler(
+                    paths.MMPM_CLI_LOG_FILE,
+                    mode="a",
+                    maxBytes=1024 * 1024,
+                    backupCount=2,
+                    encoding="utf-8",
+                    delay=True,
+                )
 
-        stdout_handler = logging.StreamHandler()
-        stdout_handler.setFormatter(StdoutFormatter())
-        stdout_handler.setLevel(level)
+                # rotated log files are compressed once, rather than every time the logs are archived
+                file_handler.namer = __compressed_name__
+                file_handler.rotator = __compress_rotated__
+                file_handler.setFormatter(JsonFormatter())
+                file_handler.setLevel(logging.DEBUG)  # always have the log files be DEBUG
+                MMPMLogFactory.__file_handler = file_handler
 
-        MMPMLogFactory.__logger.addHandler(stdout_handler)
+                stdout_handler = logging.StreamHandler()
+                stdout_handler.setFormatter(StdoutFormatter())
+                stdout_handler.setLevel(MMPMEnv().MMPM_LOG_LEVEL.get())
 
-        socketio_handler = SocketIOHandler("localhost", 6789)
+                # connects lazily, when the first record is emitted
+                MMPMLogFactory.__socketio_handler = SocketIOHandler("localhost", 6789)
+                MMPMLogFactory.__socketio_handler.setLevel(logging.DEBUG)
 
-        if socketio_handler.sio.connected:
-            MMPMLogFactory.__socketio_handler = socketio_handler
-            MMPMLogFactory.__socketio_handler.setLevel(logging.DEBUG)
-            MMPMLogFactory.__logger.addHandler(MMPMLogFactory.__socketio_handler)
-        else:
-            MMPMLogFactory.__logger.debug("Failed to connect to SocketIO server")
+                MMPMLogFactory.__queue_handler = BoundedQueueHandler()
+                MMPMLogFactory.__queue_handler.setLevel(logging.DEBUG)
+
+                MMPMLogFactory.__listener = LogListener(MMPMLogFactory.__queue_handler, file_handler, MMPMLogFactory.__socketio_handler)
+                MMPMLogFactory.__listener.start()
+
+                # replaces the SetupHandler. The list is replaced rather than changed, since the logger may be iterating over it
+                MMPMLogFactory.__logger.handlers = [stdout_handler, MMPMLogFactory.__queue_handler]
+
+                # make sure queued records reach the log file when the process exits without calling shutdown()
+                atexit.register(MMPMLogFactory.shutdown)
+
+            return [handler for handler in MMPMLogFactory.__logger.handlers if not isinstance(handler, SetupHandler)]
 
     @staticmethod
     def shutdown() -> None:
         """
-        Shuts down the logger, closing any SocketIO connections.
+        Shuts down the logger, writing the queued records, and closing any SocketIO connections. Records logged
+        afterwards are written to the log file directly.
 
         Parameters:
             None
         """
 
-        if MMPMLogFactory.__socketio_handler is not None:
-            MMPMLogFactory.__logger.debug("Disconnecting from SocketIO server")
-            MMPMLogFactory.__socketio_handler.close()
+        with MMPMLogFactory.__lock:
+            if MMPMLogFactory.__listener is not None:
+                if MMPMLogFactory.__socketio_handler.connected:
+                    MMPMLogFactory.__logger.debug("Disconnecting from SocketIO server")
+
+                MMPMLogFactory.__listener.stop()
+                MMPMLogFactory.__listener = None
+                MMPMLogFactory.__logger.removeHandler(MMPMLogFactory.__queue_handler)
+                MMPMLogFactory.__logger.addHandler(MMPMLogFactory.__file_handler)
+
+            if MMPMLogFactory.__socketio_handler is not None and MMPMLogFactory.__socketio_handler.connected:
+                MMPMLogFactory.__socketio_handler.close()
 
     @staticmethod
     def get_logger(name: str) -> logging.Logger:
         """
-        Retrieves a logger instance with the given name, initializing it if necessary.
+        Retrieves the logger of a module, a child of the 'mmpm' logger. Names outside of the 'mmpm' hierarchy are
+        placed under it, so their records reach its handlers too. The handlers are only set up when the first
+        record is logged, so retrieving a logger creates no files, and starts no threads.
 
         Parameters:
-            name (str): The name of the logger.
+            name (str): The name of the logger, usually the name of the module (ie. 'mmpm.magicmirror.database').
 
         Returns:
             logging.Logger: The logger instance associated with the given name.
@@ -192,9 +560,15 @@ class MMPMLogFactory:
         if MMPMLogFactory.__logger is None:
             with MMPMLogFactory.__lock:
                 if MMPMLogFactory.__logger is None:
-                    MMPMLogFactory.__setup__(name)
+                    parent = logging.getLogger("mmpm")
+                    parent.setLevel(logging.DEBUG)  # set the main logging handler set to the lowest level possible
+                    parent.addHandler(SetupHandler())
+                    MMPMLogFactory.__logger = parent
+
+        if name != "mmpm" and not name.startswith("mmpm."):
+            name = f"mmpm.{name}"
 
-        return MMPMLogFactory.__logger
+        return logging.getLogger(name)
 
     @classmethod
     def display(cls, tail: bool = False) -> None:
@@ -223,14 +597,16 @@ class MMPMLogFactory:
         Returns:
             None
         """
-        today = datetime.datetime.now()
+        from mmpm.log.archive import LogArchive, archive_name  # pylint: disable=import-outside-toplevel
 
-        file_name: str = f"mmpm-logs-{today.year}-{today.month}-{today.day}"
+        file_name: str = archive_name()
 
         try:
-            shutil.make_archive(file_name, "zip", paths.MMPM_LOG_DIR)
+            with open(file_name, "wb") as archive:
+                for data in LogArchive().stream():
+                    archive.write(data)
         except Exception as error:
             MMPMLogFactory.__logger.error(f"{error}")
             return
 
-        MMPMLogFactory.__logger.info(f"Compressed MMPM log files to {os.getcwd()}/{file_name}.zip ")
+        MMPMLogFactory.__logger.info(f"Compressed MMPM log files to {os.getcwd()}/{file_name}")
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+Queries over the JSON lines log files of the MMPM CLI, the current mmpm-cli.log, and the copies rotated to
+mmpm-cli.log.1.gz, mmpm-cli.log.2.gz, etc. (or mmpm-cli.log.1, etc. before rotated files were compressed), which
+are decompressed in memory when a query reaches them. Files are read backwards from the end, newest first, in fixed size chunks.
+A sparse index of timestamps to byte offsets, kept for each file, narrows the reads down to the part of a file
+covering the requested time range, and reading stops as soon as records older than the range are found.
+"""
+
+import gzip
+import io
+import json
+import logging
+import os
+import re
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from pathlib import Path
+from threading import Lock
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from mmpm.constants import paths
+
+__relative_time_pattern__ = re.compile(r"^(\d+)\s*([smhdw])$")
+__timestamp_pattern__ = re.compile(rb'"timestamp": "([^"]+)"')
+
+__units__ = {"s": "seconds", "m": "minutes", "h": "hours", "d": "days", "w": "weeks"}
+
+
+def parse_time(value: str, now: Optional[datetime] = None) -> str:
+    """
+    Converts a point in time to the format of the timestamps in the log files (ie. '2024-01-31 18:00:00,000'),
+    which sort like the times they represent.
+
+    Parameters:
+        value (str): an ISO 8601 date and time (ie. '2024-01-31T18:00'), or a duration before now (ie. '30m', '2h', '1d')
+        now (Optional[datetime]): the time durations are relative to, defaults to the current time
+
+    Returns:
+        str: the timestamp
+
+    Raises:
+        ValueError: if the value is neither a date and time, nor a duration
+    """
+
+    value = str(value).strip()
+    match = __relative_time_pattern__.match(value)
+
+    if match:
+        moment = (now or datetime.now()) - timedelta(**{__units__[match.group(2)]: int(match.group(1))})
+    else:
+        try:
+            moment = datetime.fromisoformat(value)
+        except ValueError as error:
+            raise ValueError(f"Invalid time '{value}', expected a date and time (ie. 2024-01-31T18:00), or a duration (ie. 30m, 2h, 1d)") from error
+
+        if moment.tzinfo is not None:  # the log files use the local time
+            moment = moment.astimezone().replace(tzinfo=None)
+
+    return f"{moment.strftime('%Y-%m-%d %H:%M:%S')},{moment.microsecond // 1000:03d}"
+
+
+def log_files() -> List[Path]:
+    """
+    Lists the CLI log file and its rotated copies, newest first. Uncompressed rotated copies, left over from
+    before rotated files were compressed, are older than the compressed ones.
+
+    Parameters:
+        None
+
+    Returns:
+        List[Path]: the paths of the log files that exist
+    """
+
+    current = paths.MMPM_CLI_LOG_FILE
+    rotated = []
+
+    for path in current.parent.glob(f"{current.name}.*"):
+        suffix = path.name[len(current.name) + 1 :]
+        compressed = suffix.endswith(".gz")
+        number = suffix[: -len(".gz")] if compressed else suffix
+
+        if number.isdigit():
+            rotated.append((not compressed, int(number), path))
+
+    return ([current] if current.exists() else []) + [path for _, _, path in sorted(rotated)]
+
+
+class SparseIndex(NamedTuple):
+    """
+    The timestamps of the records found at regular intervals in a log file, and their byte offsets.
+
+    Attributes:
+        size (int): the number of bytes of the file covered by the index
+        timestamps (List[str]): the timestamps, in increasing order
+        offsets (List[int]): the offset of the start of each record
+    """
+
+    size: int
+    timestamps: List[str]
+    offsets: List[int]
+
+
+class LogQuery:
+    """
+    Filters the records of the CLI log files. The sparse indexes are kept between queries, keyed on the device and
+    inode of each file, so they stay valid when a file is rotated, and are only extended as a file grows.
+
+    Attributes:
+        interval (int): the number of bytes between two entries of a sparse index
+        chunk_size (int): the number of bytes read at once when reading backwards
+    """
+
+    def __init__(self, interval: int = 32 * 1024, chunk_size: int = 64 * 1024):
+        self.interval = interval
+        self.chunk_size = chunk_size
+        self.__indexes: Dict[Tuple[int, int], SparseIndex] = {}
+        self.__lock = Lock()
+
+    def query(
+        self,
+        *,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        level: Optional[str] = None,
+        logger: Optional[str] = None,
+        grep: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Retrieves the records matching all of the given filters.
+
+        Parameters:
+            since (Optional[str]): only records logged at, or after this time (see parse_time)
+            until (Optional[str]): only records logged at, or before this time (see parse_time)
+            level (Optional[str]): the minimum level of the records (ie. 'WARNING')
+            logger (Optional[str]): the name of a logger, matching its records, and those of its children
+            grep (Optional[str]): a regular expression the message of the records must contain a match for
+            limit (Optional[int]): the maximum number of records, keeping the most recent ones
+
+        Returns:
+            List[dict]: the matching records, oldest first
+
+        Raises:
+            ValueError: if a filter is invalid
+        """
+
+        since = parse_time(since) if since else None
+        until = parse_time(until) if until else None
+        threshold = None
+
+        if level:
+            threshold = logging.getLevelName(str(level).upper())
+
+            if not isinstance(threshold, int):
+                raise ValueError(f"Unknown log level '{level}'")
+
+        try:
+            pattern = re.compile(grep) if grep else None
+        except re.error as error:
+            raise ValueError(f"Invalid pattern '{grep}': {error}") from error
+
+        if limit is not None and int(limit) <= 0:
+            return []
+
+        files = log_files()
+        records: List[dict] = []  # newest first
+
+        with self.__lock:
+            for path in files:
+                try:
+                    done, complete = self.__query_file__(
+                        path, since=since, until=until, threshold=threshold, logger=logger, pattern=pattern, limit=limit, records=records
+                    )
+                except OSError:  # the file was rotated away in the meantime
+                    continue
+
+                if done or not complete:
+                    break
+
+            self.__prune__(files)
+
+        records.reverse()
+        return records
+
+    def __query_file__(
+        self,
+        path: Path,
+        *,
+        since: Optional[str],
+        until: Optional[str],
+        threshold: Optional[int],
+        logger: Optional[str],
+        pattern: Optional[re.Pattern],
+        limit: Optional[int],
+        records: List[dict],
+    ) -> Tuple[bool, bool]:
+        """
+        Adds the matching records of one log file to `records`, newest first.
+
+        Parameters:
+            path (Path): the log file
+            since (Optional[str]): the timestamp of the oldest records to match
+            until (Optional[str]): the timestamp of the newest records to match
+            threshold (Optional[int]): the minimum level of the records
+            logger (Optional[str]): the name of the logger of the records
+            pattern (Optional[re.Pattern]): the pattern the messages must contain a match for
+            limit (Optional[int]): the maximum number of records
+            records (List[dict]): the records matched so far, in the previous files
+
+        Returns:
+            Tuple[bool, bool]: whether the limit, or a record older than `since` was reached, and whether the file
+            was read down to its first record
+        """
+
+        stat = os.stat(path)
+
+        file: BinaryIO
+
+        if path.suffix == ".gz":  # rotated files never change, and are small enough to decompress at once
+            file = io.BytesIO(gzip.decompress(path.read_bytes()))
+            size = len(file.getbuffer())
+        else:
+            file = open(path, "rb")  # pylint: disable=consider-using-with
+            size = os.fstat(file.fileno()).st_size
+
+        with file:
+            index = self.__build_index__(file, (stat.st_dev, stat.st_ino), size)
+            lower, upper = 0, size
+
+            if until:
+                position = bisect_right(index.timestamps, until)
+                upper = index.offsets[position] if position < len(index.offsets) else upper
+
+            if since:
+                position = bisect_left(index.timestamps, since) - 1
+                lower = index.offsets[position] if position >= 0 else lower
+
+            for line in self.__backwards__(file, lower, upper):
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # ie. a record that's still being written
+
+                if not isinstance(record, dict):
+                    continue
+
+                timestamp = str(record.get("timestamp", ""))
+
+                if since and timestamp < since:
+                    return True, False
+
+                if until and timestamp > until:
+                    continue
+
+                if self.__matches__(record, threshold, logger, pattern):
+                    records.append(record)
+
+                    if limit is not None and len(records) >= int(limit):
+                        return True, False
+
+        return False, lower == 0
+
+    @staticmethod
+    def __matches__(record: dict, threshold: Optional[int], logger: Optional[str], pattern: Optional[re.Pattern]) -> bool:
+        if threshold is not None:
+            levelno = logging.getLevelName(str(record.get("level", "")))
+
+            if not isinstance(levelno, int) or levelno < threshold:
+                return False
+
+        if logger:
+            name = str(record.get("logger_name", ""))
+
+            if name != logger and not name.startswith(f"{logger}."):
+                return False
+
+        return pattern is None or bool(pattern.search(str(record.get("message", ""))))
+
+    def __backwards__(self, file: BinaryIO, lower: int, upper: int) -> Iterator[bytes]:
+        """
+        Reads the lines between two offsets of a file, starting from the last one.
+
+        Parameters:
+            file (BinaryIO): the file
+            lower (int): the offset of the start of the first line
+            upper (int): the offset following the end of the last line
+
+        Returns:
+            Iterator[bytes]: the lines, without their line breaks
+        """
+
+        position = upper
+        remainder = b""
+
+        while position > lower:
+            size = min(self.chunk_size, position - lower)
+            position -= size
+            file.seek(position)
+
+            lines = (file.read(size) + remainder).split(b"\n")
+            remainder = lines.pop(0)  # the line may have started in the previous chunk
+
+            for line in reversed(lines):
+                if line:
+                    yield line
+
+        if remainder:
+            yield remainder
+
+    def __build_index__(self, file: BinaryIO, key: Tuple[int, int], size: int) -> SparseIndex:
+        """
+        Retrieves the sparse index of a file, indexing the bytes added since the last query. Only the line found
+        after each multiple of the interval is read.
+
+        Parameters:
+            file (BinaryIO): the file
+            key (Tuple[int, int]): the device and inode of the file
+            size (int): the size of the (decompressed) file
+
+        Returns:
+            SparseIndex: the index
+        """
+
+        index = self.__indexes.get(key)
+
+        if index is None or index.size > size:  # a new file, or a file that was truncated
+            index = SparseIndex(0, [], [])
+
+        timestamps, offsets = index.timestamps, index.offsets
+        boundary = -(-index.size // self.interval) * self.interval  # the first multiple of the interval not indexed yet
+        indexed = size
+
+        while boundary < size:
+            file.seek(boundary)
+
+            if boundary:
+                file.readline()  # skip the end of the line the boundary falls into
+
+            offset = file.tell()
+            line = file.readline()
+
+            if not line.endswith(b"\n"):  # the last record is still being written, index it next time
+                indexed = boundary
+                break
+
+            match = __timestamp_pattern__.search(line)
+
+            if match and (not offsets or offset > offsets[-1]):
+                timestamp = match.group(1).decode("utf-8", errors="replace")
+
+                if not timestamps or timestamp >= timestamps[-1]:
+                    timestamps.append(timestamp)
+                    offsets.append(offset)
+
+            boundary += self.interval
+
+        index = SparseIndex(indexed, timestamps, offsets)
+        self.__indexes[key] = index
+        return index
+
+    def __prune__(self, files: List[Path]) -> None:
+        """
+        Drops the indexes of files that no longer exist.
+
+        Parameters:
+            files (List[Path]): the current log files
+
+        Returns:
+            None
+        """
+
+        current = set()
+
+        for path in files:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            current.add((stat.st_dev, stat.st_ino))
+
+        for key in set(self.__indexes) - current:
+            del self.__indexes[key]
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """
-An incredibly simplistic SocketIO server used for repeating logs from the MMPM CLI to the UI.
+An incredibly simplistic SocketIO server used for repeating logs from the MMPM CLI to the UI. The most recent
+records are kept in a backlog, which clients replay by emitting a 'replay' event after connecting.
 """
 from gevent import monkey
 
@@ -8,6 +9,7 @@ monkey.patch_all()
 
 import socketio
 
+from mmpm.log.backlog import LogBacklog
 from mmpm.log.factory import MMPMLogFactory
 
 logger = MMPMLogFactory.get_logger(__name__)
@@ -16,6 +18,7 @@ logger = MMPMLogFactory.get_logger(__name__)
 # Function to create the SocketIO server
 def create():
     server = socketio.Server(cors_allowed_origins="*", async_mode="gevent")
+    backlog = LogBacklog()
 
     @server.event
     def connect(sid, environ):  # pylint: disable=unused-argument
@@ -23,8 +26,35 @@ def create():
 
     @server.event
     def logs(sid, data):
+        backlog.append(data)
         server.emit("logs", data, skip_sid=sid)
 
+    @server.on("logs-batch")
+    def logs_batch(sid, data):
+        # the UI expects one record per event
+        for record in data:
+            backlog.append(record)
+            server.emit("logs", record, skip_sid=sid)
+
+    @server.event
+    def replay(sid, data=None):
+        """
+        Sends the backlog to the client as 'logs' events, optionally filtered with the 'level', 'logger', and
+        'limit' keys of the data. The acknowledgement holds the number of records sent, or an error.
+        """
+
+        filters = data if isinstance(data, dict) else {}
+
+        try:
+            records = backlog.replay(level=filters.get("level"), logger=filters.get("logger"), limit=filters.get("limit"))
+        except ValueError as error:
+            return {"error": str(error)}
+
+        for record in records:
+            server.emit("logs", record, to=sid)
+
+        return {"replayed": len(records)}
+
     @server.event
     def disconnect(sid):
         logger.debug("Client disconnected:", sid)
@@ -0,0 +1,442 @@
+#!/usr/bin/env python3
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from mmpm.constants import paths
+from mmpm.log.factory import MMPMLogFactory
+from mmpm.singleton import Singleton
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+
+class JsonFileCache(Singleton):
+    """
+    Base class of the caches persisted as a JSON file of named sections, shared by the CLI and the API. The file
+    is read again whenever it changes on disk. Changes are merged into its latest contents under a file lock, and
+    written to a temporary file renamed into place, so processes neither overwrite each other's entries, nor see
+    a partial file. Within a `batch`, changes are written once, when the batch ends.
+
+    Attributes:
+        path (Path): the cache file
+        sections (Tuple[str, ...]): the top-level keys of the file, each holding a dictionary
+        _data (Dict[str, Dict[str, Any]]): the cached sections, loaded on first use
+        _lock (Lock): guards the data, since caches are accessed from background threads
+
+    Methods:
+        batch(): Defers writing changes to the cache file until the end of the block
+    """
+
+    sections: Tuple[str, ...] = ()
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self._data: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock: Lock = Lock()
+        self.__changes: Dict[str, Dict[str, Any]] = {}
+        self.__stat: Optional[Tuple[int, int, int]] = None
+        self.__batches: int = 0
+
+    @contextmanager
+    def batch(self) -> Iterator[None]:
+        """
+        Defers writing changes to the cache file until the end of the block, so a bulk refresh writes it once.
+
+        Parameters:
+            None
+
+        Returns:
+            Iterator[None]: the context of the batch
+        """
+
+        with self._lock:
+            self.__batches += 1
+
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.__batches -= 1
+
+                if not self.__batches:
+                    self.__save__()
+
+    def __stat__(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def __read__(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Reads the sections of the cache file, along with the changes not written to it yet.
+
+        Parameters:
+            None
+
+        Returns:
+            Dict[str, Dict[str, Any]]: the sections
+        """
+
+        data: Dict[str, Dict[str, Any]] = {}
+
+        try:
+            if self.path.stat().st_size:
+                with open(self.path, "r", encoding="utf-8") as cache:
+                    contents = json.load(cache)
+
+                if isinstance(contents, dict):
+                    data = contents
+                else:
+                    logger.warning(f"Unable to read {self.path}, starting with an empty cache: not a JSON object")
+        except FileNotFoundError:
+            pass
+        except (OSError, json.JSONDecodeError) as error:
+            logger.warning(f"Unable to read {self.path}, starting with an empty cache: {error}")
+
+        for section in self.sections:
+            if not isinstance(data.get(section), dict):
+                data[section] = {}
+
+        for section, values in self.__changes.items():
+            data.setdefault(section, {}).update(values)
+
+        return data
+
+    def __load__(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Retrieves the cached sections, reading the cache file again if it changed since it was last read.
+
+        Parameters:
+            None
+
+        Returns:
+            Dict[str, Dict[str, Any]]: the cached sections
+        """
+
+        stat = self.__stat__()
+
+        if self._data is None or stat != self.__stat:
+            self._data = self.__read__()
+            self.__stat = stat
+
+        return self._data
+
+    def __entry__(self, section: str, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves an entry of a section. Anything other than an object (ie. a hand edited entry) is ignored.
+
+        Parameters:
+            section (str): the section of the entry
+            key (str): the name of the entry
+
+        Returns:
+            Optional[Dict[str, Any]]: the entry, or None if there is none
+        """
+
+        entry = self.__load__()[section].get(key)
+        return entry if isinstance(entry, dict) else None
+
+    def __update__(self, section: str, values: Dict[str, Any], defer: bool = False) -> None:
+        """
+        Changes entries of a section, and writes them to the cache file, unless a batch is in progress.
+
+        Parameters:
+            section (str): the section of the entries
+            values (Dict[str, Any]): the entries, keyed by name
+            defer (bool): If True, the entries are only written along with the next change, or at the end of a batch.
+
+        Returns:
+            None
+        """
+
+        self.__load__()[section].update(values)
+        self.__changes.setdefault(section, {}).update(values)
+
+        if not self.__batches and not defer:
+            self.__save__()
+
+    def __save__(self) -> None:
+        """
+        Merges the changes into the latest contents of the cache file, and writes it to a temporary file renamed
+        into place. The file is locked meanwhile, so changes made by other processes at the same time aren't lost.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        if not self.__changes:
+            return
+
+        temp_file = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+
+        try:
+            with open(self.path.with_name(f"{self.path.name}.lock"), "a", encoding="utf-8") as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                data = self.__read__()
+
+                with open(temp_file, "w", encoding="utf-8") as cache:
+                    json.dump(data, cache)
+
+                os.replace(temp_file, self.path)
+        except OSError as error:
+            logger.error(f"Failed to write {self.path}: {error}")
+            return
+
+        self._data, self.__stat = data, self.__stat__()
+        self.__changes = {}
+
+
+class RemoteMetadataCache(JsonFileCache):
+    """
+    A persistent cache of the details (stars, forks, issues, etc) retrieved by RemotePackage from the
+    GitHub, GitLab, and Bitbucket APIs. Entries are keyed by repository URL, and stored alongside the
+    database in MAGICMIRROR_3RD_PARTY_PACKAGES_REMOTE_METADATA_FILE. Stale entries are still served, but
+    flagged, so the caller can refresh them in the background.
+
+    The GitHub API rate limit, as reported by the headers of every response, and the results of the
+    last health check are stored in the same file, so they are shared between the CLI and the API.
+
+    Attributes:
+        ttl (int): the number of seconds an entry is considered fresh
+        health_ttl (int): the number of seconds a health check result is considered fresh
+        __refreshing (set): repositories currently being refreshed, used to prevent duplicate requests
+
+    Methods:
+        get(repository): Returns the cached entry of a repository
+        set(repository, details): Caches the details of a repository and writes the cache to disk
+        is_stale(repository): Returns True if the entry of a repository is missing or older than the ttl
+        claim(repository): Marks a repository as being refreshed
+        release(repository): Marks a repository as no longer being refreshed
+        track_rate_limit(host, headers): Records the rate limit reported by the headers of an API response
+        rate_limit(host): Returns the last known rate limit of a host, if it hasn't been reset since
+        get_health(): Returns the cached health check results, if they are still fresh
+        set_health(health): Caches the results of a health check
+    """
+
+    sections = ("repositories", "rate_limits", "health")
+
+    def __init__(self, ttl: int = 60 * 60 * 12, health_ttl: int = 60 * 5):
+        super().__init__(paths.MAGICMIRROR_3RD_PARTY_PACKAGES_REMOTE_METADATA_FILE)
+        self.ttl: int = ttl
+        self.health_ttl: int = health_ttl
+        self.__refreshing: set = set()
+
+    def get(self, repository: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the cached entry of a repository, containing the 'details' and the 'timestamp' they were retrieved.
+
+        Parameters:
+            repository (str): the URL of the repository
+
+        Returns:
+            Optional[Dict[str, Any]]: the cached entry, or None if the repository isn't cached
+        """
+
+        with self._lock:
+            return self.__entry__("repositories", repository)
+
+    def set(self, repository: str, details: Dict[str, Any], **extra) -> None:
+        """
+        Caches the details of a repository, and writes the cache to disk.
+
+        Parameters:
+            repository (str): the URL of the repository
+            details (Dict[str, Any]): the details retrieved from the remote API
+            extra: additional data to store with the entry
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.__update__("repositories", {repository: {"details": details, "timestamp": time.time(), **extra}})
+
+    def is_stale(self, repository: str) -> bool:
+        """
+        Checks if the entry of a repository is missing or older than the ttl.
+
+        Parameters:
+            repository (str): the URL of the repository
+
+        Returns:
+            bool: True if the entry needs to be refreshed, False otherwise
+        """
+
+        entry = self.get(repository)
+        return entry is None or time.time() - entry.get("timestamp", 0) > self.ttl
+
+    def claim(self, repository: str) -> bool:
+        """
+        Marks a repository as being refreshed, unless a refresh is already in progress.
+
+        Parameters:
+            repository (str): the URL of the repository
+
+        Returns:
+            bool: True if the caller should refresh the repository, False if another thread already is
+        """
+
+        with self._lock:
+            if repository in self.__refreshing:
+                return False
+
+            self.__refreshing.add(repository)
+            return True
+
+    def release(self, repository: str) -> None:
+        """
+        Marks a repository as no longer being refreshed.
+
+        Parameters:
+            repository (str): the URL of the repository
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.__refreshing.discard(repository)
+
+    def track_rate_limit(self, host: str, headers: Mapping[str, str]) -> None:
+        """
+        Records the remaining request quota and reset time reported by the headers of an API response.
+        Responses without rate limit headers are ignored. The cache file is only written right away when a
+        new quota window starts, or the quota runs out, otherwise the quota is written with the next change.
+
+        Parameters:
+            host (str): the host the response came from (ie. 'github')
+            headers (Mapping[str, str]): the headers of the response
+
+        Returns:
+            None
+        """
+
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+
+        if remaining is None or reset is None:
+            return
+
+        rate = {"remaining": int(remaining), "reset": int(reset)}
+
+        with self._lock:
+            known = self.__entry__("rate_limits", host)
+
+            if rate != known:
+                urgent = known is None or known["reset"] != rate["reset"] or rate["remaining"] <= 0
+                self.__update__("rate_limits", {host: rate}, defer=not urgent)
+
+    def rate_limit(self, host: str) -> Optional[Dict[str, int]]:
+        """
+        Returns the last known rate limit of a host, unless the quota has been reset since it was recorded.
+
+        Parameters:
+            host (str): the host to retrieve the rate limit of (ie. 'github')
+
+        Returns:
+            Optional[Dict[str, int]]: the 'remaining' requests and the 'reset' time as a UNIX timestamp, or None if unknown
+        """
+
+        with self._lock:
+            rate = self.__entry__("rate_limits", host)
+
+        if rate is None or rate.get("reset", 0) <= time.time():
+            return None
+
+        return {"remaining": int(rate.get("remaining", 0)), "reset": int(rate["reset"])}
+
+    def get_health(self) -> Optional[Dict[str, Dict[str, str]]]:
+        """
+        Returns the results of the last health check, if they are still fresh.
+
+        Parameters:
+            None
+
+        Returns:
+            Optional[Dict[str, Dict[str, str]]]: the health of each host, or None if a new check is required
+        """
+
+        with self._lock:
+            health = self.__load__()["health"]
+
+        results = health.get("results")
+
+        if not isinstance(results, dict) or time.time() - health.get("timestamp", 0) > self.health_ttl:
+            return None
+
+        return results
+
+    def set_health(self, results: Dict[str, Dict[str, str]]) -> None:
+        """
+        Caches the results of a health check.
+
+        Parameters:
+            results (Dict[str, Dict[str, str]]): the health of each host
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.__update__("health", {"results": results, "timestamp": time.time()})
+
+
+class UpdateCheckCache(JsonFileCache):
+    """
+    A persistent record of the last update check of each installed package, containing the local HEAD, the
+    remote HEAD seen at the time, and when the check happened. A record only applies while the local HEAD is
+    unchanged, so upgrading, or otherwise modifying, a package invalidates it.
+
+    Methods:
+        get(directory, local): Returns the last check of a package, if its local HEAD hasn't changed since
+        set(directory, local, remote): Records the result of checking a package
+    """
+
+    sections = ("packages",)
+
+    def __init__(self):
+        super().__init__(paths.MMPM_UPDATE_CHECKS_FILE)
+
+    def get(self, directory: str, local: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the last update check of a package, unless its local HEAD changed since.
+
+        Parameters:
+            directory (str): the directory of the package
+            local (str): the current local HEAD of the package
+
+        Returns:
+            Optional[Dict[str, Any]]: the 'local' and 'remote' HEADs and the 'timestamp' of the check, or None if there is no valid check
+        """
+
+        with self._lock:
+            check = self.__entry__("packages", directory)
+
+        return check if check is not None and check["local"] == local else None
+
+    def set(self, directory: str, local: str, remote: str) -> None:
+        """
+        Records the result of checking a package for updates.
+
+        Parameters:
+            directory (str): the directory of the package
+            local (str): the local HEAD of the package
+            remote (str): the remote HEAD of the package
+
+        Returns:
+            None
+        """
+
+        with self._lock:
+            self.__update__("packages", {directory: {"local": local, "remote": remote, "timestamp": time.time()}})
@@ -3,7 +3,7 @@ import datetime
 import json
 import os
 from pathlib import Path, PosixPath
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import requests
 from bs4 import BeautifulSoup
@@ -11,9 +11,10 @@ from bs4 import BeautifulSoup
 from mmpm.constants import color, paths, urls
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
-from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.magicmirror.cache import RemoteMetadataCache, UpdateCheckCache
+from mmpm.magicmirror.package import MagicMirrorPackage, fetch_remote_details
 from mmpm.singleton import Singleton
-from mmpm.utils import run_cmd
+from mmpm.utils import CancellationToken, HTTPClient, run_cmd
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -45,9 +46,10 @@ class MagicMirrorDatabase(Singleton):
         packages: List[MagicMirrorPackage] = []
 
         try:
-            response = requests.get(urls.MAGICMIRROR_MODULES_URL, timeout=10)
-        except requests.exceptions.RequestException:
-            logger.fatal("Unable to retrieve MagicMirror modules.")
+            response = HTTPClient().get(urls.MAGICMIRROR_MODULES_URL)
+        except requests.exceptions.RequestException as error:
+            logger.fatal(f"Unable to retrieve MagicMirror modules: {error}")
+            return packages
 
         soup = BeautifulSoup(response.text, "html.parser")
         table_soup = soup.find_all("table")
@@ -113,8 +115,7 @@ class MagicMirrorDatabase(Singleton):
         packages_found: List[MagicMirrorPackage] = []
 
         for package_dir in package_directories:
-            os.chdir(package_dir)
-            error_code, remote_origin_url, _ = run_cmd(["git", "config", "--get", "remote.origin.url"], progress=False)
+            error_code, remote_origin_url, _ = run_cmd(["git", "-C", str(package_dir), "config", "--get", "remote.origin.url"], progress=False)
 
             if error_code:
                 logger.error(f"Unable to communicate with git server to retrieve information about {package_dir}")
@@ -130,26 +131,43 @@ class MagicMirrorDatabase(Singleton):
 
         return packages_found
 
-    def update(self, can_upgrade_mmpm: bool = False, can_upgrade_magicmirror: bool = False) -> int:
+    def update(
+        self,
+        can_upgrade_mmpm: bool = False,
+        can_upgrade_magicmirror: bool = False,
+        prefetch: bool = False,
+        max_age: Optional[float] = None,
+        only: Optional[List[str]] = None,
+    ) -> int:
         """
         Updates the list of upgradable packages and writes them to the available upgrades file.
 
         Parameters:
             can_upgrade_mmpm (bool): Indicates if MMPM can be upgraded.
             can_upgrade_magicmirror (bool): Indicates if MagicMirror can be upgraded.
+            prefetch (bool): If True, the changes of each upgradable package are fetched in the background, unless
+                checking the package just fetched them.
+            max_age (Optional[float]): Reuse update checks of packages younger than this many seconds. If None, every package is checked.
+            only (Optional[List[str]]): Only check the packages with these titles. Other packages keep their previous status.
 
         Returns:
             int: The count of upgradable items, including MMPM, MagicMirror, and packages.
         """
 
         upgradable: List[MagicMirrorPackage] = []
+        fetched: List[MagicMirrorPackage] = []
+        previously_upgradable = [MagicMirrorPackage(**package) for package in self.upgradable()["packages"]]
+        wanted = {title.lower() for title in only} if only is not None else None
 
-        for package in filter(lambda pkg: pkg.is_installed, self.packages):
-            print(f"Retrieving: {package.repository} [{color.n_cyan(package.title)}]")
-            package.update()
+        with UpdateCheckCache().batch():
+            for package in filter(lambda pkg: pkg.is_installed, self.packages):
+                if wanted is not None and package.title.lower() not in wanted:
+                    package.is_upgradable = package in previously_upgradable
+                elif package.update(max_age=max_age):
+                    fetched.append(package)
 
-            if package.is_upgradable:
-                upgradable.append(package)
+                if package.is_upgradable:
+                    upgradable.append(package)
 
         configuration = self.upgradable()
 
@@ -160,6 +178,11 @@ class MagicMirrorDatabase(Singleton):
         with open(paths.MMPM_AVAILABLE_UPGRADES_FILE, mode="w", encoding="utf-8") as upgrade_file:
             json.dump(configuration, upgrade_file)
 
+        if prefetch:
+            for package in upgradable:
+                if package not in fetched:
+                    package.prefetch()
+
         return int(can_upgrade_mmpm) + int(can_upgrade_magicmirror) + len(upgradable)
 
     def info(self) -> Dict[str, Any]:
@@ -221,37 +244,120 @@ class MagicMirrorDatabase(Singleton):
 
         return [package for package in self.packages if match(query, package)]
 
-    def load(self, update: bool = False) -> bool:
+    def select(
+        self,
+        packages: List[MagicMirrorPackage],
+        sort: Optional[str] = None,
+        min_stars: Optional[int] = None,
+        updated_within: Optional[int] = None,
+    ) -> List[MagicMirrorPackage]:
+        """
+        Sorts and filters packages by the remote metadata stored in the database by `enrich`, without any
+        network access. Packages without the metadata a filter relies on are excluded, and sorted last.
+
+        Parameters:
+            packages (List[MagicMirrorPackage]): The packages to sort and filter.
+            sort (Optional[str]): 'stars' to sort by most starred, or 'updated' to sort by most recently updated.
+            min_stars (Optional[int]): Excludes packages with fewer stars.
+            updated_within (Optional[int]): Excludes packages not updated within this many days.
+
+        Returns:
+            List[MagicMirrorPackage]: The selected packages.
+        """
+
+        if min_stars is not None:
+            packages = [package for package in packages if package.stars is not None and package.stars >= min_stars]
+
+        if updated_within is not None:
+            cutoff = (datetime.date.today() - datetime.timedelta(days=updated_within)).isoformat()
+            packages = [package for package in packages if package.last_updated is not None and package.last_updated >= cutoff]
+
+        if sort == "stars":
+            packages = sorted(packages, key=lambda package: -1 if package.stars is None else package.stars, reverse=True)
+        elif sort == "updated":
+            packages = sorted(packages, key=lambda package: package.last_updated or "", reverse=True)
+
+        return list(packages)
+
+    def enrich(self, max_per_host: int = 4) -> int:
+        """
+        Collects the stars, forks, and last updated date of every package in bulk, and stores them in the database
+        file, so packages can be sorted and filtered by them without any network access. Details that are still
+        fresh in the RemoteMetadataCache are reused, so repeated runs only request what is stale, as far as the
+        remote rate limits allow.
+
+        Parameters:
+            max_per_host (int): The maximum number of concurrent requests made to each remote API.
+
+        Returns:
+            int: The number of packages with remote metadata.
+        """
+
+        details = fetch_remote_details(self.packages, max_per_host=max_per_host)
+
+        for package in self.packages:
+            package.enrich(details.get(package.repository, {}))
+
+        custom_packages = self.custom_packages()
+
+        with open(paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE, "w", encoding="utf-8") as db:
+            json.dump(
+                [package for package in self.packages if package not in custom_packages],
+                db,
+                default=lambda package: package.serialize(),
+            )
+
+        enriched = sum(1 for package in self.packages if package.stars is not None)
+        logger.debug(f"Collected remote metadata of {enriched} of {len(self.packages)} packages")
+
+        return enriched
+
+    def load(self, update: bool = False, token: Optional[CancellationToken] = None) -> bool:
         """
         Loads the MagicMirror packages from the database. Optionally forces an update
-        of the database from the 3rd party wiki.
+        of the database from the 3rd party wiki. The packages are only replaced once loading is done, so
+        a cancelled load, like an update that timed out, leaves the database, and its files, as they were.
 
         Parameters:
             update (bool): Flag to force database update.
+            token (Optional[CancellationToken]): a token checked before anything is written
 
         Returns:
             bool: True if successful, False otherwise.
         """
-        self.packages = []  # this is really related to the API, needing to clear the list out
-
         db_file = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE
         db_exists = db_file.exists() and bool(db_file.stat().st_size)
         db_last_update = paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE
 
         should_update = update or not db_exists or not db_last_update.exists() or not db_last_update.stat().st_size
+        packages: List[MagicMirrorPackage] = []
+        last_update = self.last_update
 
         if should_update:
             print(f"Retrieving: {urls.MAGICMIRROR_MODULES_URL} [{color.n_cyan('3rd Party Modules')}]")
-            self.packages = self.__download_packages__()
+            packages = self.__download_packages__()
+
+            if token is not None and token.cancelled:
+                logger.warning("Database update was cancelled, discarding the retrieved packages")
+                return False
+
+            if packages:
+                # carry over the remote metadata previously collected by `enrich`
+                cache = RemoteMetadataCache()
+
+                for package in packages:
+                    entry = cache.get(package.repository)
+
+                    if entry is not None:
+                        package.enrich(entry["details"])
 
-            if self.packages:
                 with open(db_file, "w", encoding="utf-8") as db:
-                    json.dump(self.packages, db, default=lambda package: package.serialize())
+                    json.dump(packages, db, default=lambda package: package.serialize())
 
                 with open(db_last_update, "w", encoding="utf-8") as last_update_file:
-                    self.last_update = datetime.datetime.now()
+                    last_update = datetime.datetime.now()
                     json.dump(
-                        {"last_update": str(self.last_update.replace(microsecond=0))},
+                        {"last_update": str(last_update.replace(microsecond=0))},
                         last_update_file,
                     )
             else:
@@ -259,27 +365,70 @@ class MagicMirrorDatabase(Singleton):
 
         else:
             with open(db_last_update, mode="r", encoding="utf-8") as db_last_update_file:
-                self.last_update = json.load(db_last_update_file)["last_update"]
-
-        if not self.packages and db_exists:
-            self.packages = []
+                last_update = json.load(db_last_update_file)["last_update"]
 
+        if not packages and db_exists:
             with open(db_file, mode="r", encoding="utf-8") as db:
-                packages = json.load(db)
-                self.packages = [MagicMirrorPackage(**package) for package in packages]
+                packages = [MagicMirrorPackage(**package) for package in json.load(db)]
 
-        self.packages.extend(self.custom_packages())
+        packages.extend(self.custom_packages())
 
-        self.categories = list({package.category for package in self.packages})
         discovered_packages: List[MagicMirrorPackage] = self.__discover_installed_packages__()
 
         if discovered_packages:
-            for package in self.packages:  # type: ignore
+            for package in packages:  # type: ignore
                 if package in discovered_packages:  # (mypy thinks 'package' is a Dict[str, str])
                     package.is_installed = True  # type: ignore
 
+        if token is not None and token.cancelled:
+            logger.warning("Database update was cancelled, keeping the previously loaded packages")
+            return False
+
+        self.packages = packages
+        self.categories = list({package.category for package in self.packages})
+        self.last_update = last_update
+        self.__write_completion_index__()
+
         return bool(len(self.packages))
 
+    def __write_completion_index__(self) -> None:
+        """
+        Writes the titles of all packages, and of the installed packages, to MMPM_COMPLETION_INDEX_FILE, which
+        the shell completers read instead of loading the database. The modification time of the modules
+        directory is recorded too, so the completers can tell when the list of installed packages is outdated.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+
+        modules_dir = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+
+        try:
+            modules_mtime = modules_dir.stat().st_mtime
+        except OSError:
+            modules_mtime = None
+
+        index = {
+            "packages": {package.title: str(package.directory) for package in self.packages},
+            "installed": [package.title for package in self.packages if package.is_installed],
+            "modules": str(modules_dir),
+            "modules_mtime": modules_mtime,
+        }
+
+        index_file = paths.MMPM_COMPLETION_INDEX_FILE
+        temp_file = index_file.with_name(f"{index_file.name}.{os.getpid()}.tmp")
+
+        try:
+            with open(temp_file, "w", encoding="utf-8") as index_stream:
+                json.dump(index, index_stream)
+
+            os.replace(temp_file, index_file)
+        except OSError as error:
+            logger.warning(f"Failed to write the completion index: {error}")
+
     def custom_packages(self) -> List[MagicMirrorPackage]:
         """
         Retrieves custom MagicMirror packages added by the user.
@@ -327,6 +476,8 @@ class MagicMirrorDatabase(Singleton):
                 reset_file = True
 
         if not reset_file:
+            # earlier versions stored the PyPi version check here, which made the file look like it had upgrades
+            upgrades.pop("mmpm_version_check", None)
             return upgrades
 
         with open(upgrades_file, "w", encoding="utf-8") as upgradable:
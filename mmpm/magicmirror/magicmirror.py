@@ -2,14 +2,14 @@
 import os
 import shutil
 import sys
-from os import chdir
 from pathlib import Path, PosixPath
+from typing import Optional
 
 from mmpm.constants import color
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.singleton import Singleton
-from mmpm.utils import repo_up_to_date, run_cmd
+from mmpm.utils import BUILD_TIMEOUT, GIT_TIMEOUT, CancellationToken, repo_up_to_date, run_cmd
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -23,12 +23,12 @@ class MagicMirror(Singleton):
     def __init__(self):
         self.env = MMPMEnv()
 
-    def update(self):
+    def update(self, token: Optional[CancellationToken] = None):
         """
         Checks for updates available to the MagicMirror repository
 
         Parameters:
-            None
+            token (Optional[CancellationToken]): A token which kills the fetch of the repository when cancelled.
 
         Returns:
             bool: True if an upgrade is available, False otherwise
@@ -41,24 +41,23 @@ class MagicMirror(Singleton):
 
         logger.debug("Checking to see if MagicMirror is up to date")
 
-        chdir(magicmirror_root)
         print(f"Retrieving: https://github.com/MichMich/MagicMirror [{color.n_cyan('MagicMirror')}]")
 
         try:
-            can_upgrade = repo_up_to_date(magicmirror_root)
+            can_upgrade = repo_up_to_date(magicmirror_root, token=token)
         except KeyboardInterrupt:
             logger.info("User killed process with CTRL-C")
             sys.exit(127)
 
         return can_upgrade
 
-    def upgrade(self):
+    def upgrade(self, token: Optional[CancellationToken] = None):
         """
         Handles upgrade processs of MagicMirror by pulling changes from MagicMirror
         repo, and installing dependencies.
 
         Parameters:
-            None
+            token (Optional[CancellationToken]): A token which kills the commands of the upgrade when cancelled.
 
         Returns:
             success (bool): True if successful else False
@@ -75,21 +74,26 @@ class MagicMirror(Singleton):
 
         os.chdir(root_dir)
 
-        error_code, _, stderr = run_cmd(["git", "checkout", "."], progress=False)
+        error_code, _, stderr = run_cmd(["git", "checkout", "."], progress=False, timeout=GIT_TIMEOUT, token=token)
 
         if error_code:
             message = "Failed to checkout MagicMirror repo for clean upgrade"
             logger.error(f"{message}. See `mmpm log` for details")
             return stderr
 
-        error_code, _, stderr = run_cmd(["git", "pull"], progress=False)
+        # if the changes were already fetched by `update`, a local fast-forward is all that's needed
+        error_code, stdout, stderr = run_cmd(["git", "merge", "--ff-only", "@{u}"], progress=False, timeout=GIT_TIMEOUT, token=token)
+
+        if error_code or "up to date" in stdout:
+            logger.debug("No prefetched changes found for MagicMirror. Pulling from remote.")
+            error_code, _, stderr = run_cmd(["git", "pull"], progress=False, timeout=GIT_TIMEOUT, token=token)
 
         if error_code:
             message = "Failed to upgrade MagicMirror"
             logger.error(f"{message}. See `mmpm log` for details")
             return stderr
 
-        error_code, _, stderr = run_cmd(["npm", "install"], progress=True)
+        error_code, _, stderr = run_cmd(["npm", "install"], progress=True, timeout=BUILD_TIMEOUT, token=token)
 
         if error_code:
             logger.error(stderr)
@@ -98,12 +102,12 @@ class MagicMirror(Singleton):
         print("Upgrade complete! Restart MagicMirror for the changes to take effect")
         return True
 
-    def install(self):
+    def install(self, token: Optional[CancellationToken] = None):
         """
         Installs MagicMirror by downloading the git repo and using NPM to install dependencies.
 
         Parameters:
-            None
+            token (Optional[CancellationToken]): A token which kills the commands of the installation when cancelled.
 
         Returns:
             bool: True upon success, False upon failure
@@ -130,6 +134,8 @@ class MagicMirror(Singleton):
                 ["git", "clone", "https://github.com/MichMich/MagicMirror"],
                 progress=True,
                 message="Downloading MagicMirror",
+                timeout=GIT_TIMEOUT,
+                token=token,
             )
 
             if error_code:
@@ -142,6 +148,8 @@ class MagicMirror(Singleton):
             ["npm", "run", "install-mm"],
             progress=True,
             message="Installing MagicMirror",
+            timeout=BUILD_TIMEOUT,
+            token=token,
         )
 
         if error_code:
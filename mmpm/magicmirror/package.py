@@ -2,12 +2,17 @@
 import datetime
 import json
 import os
+import shutil
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from multiprocessing import cpu_count
 from pathlib import Path, PosixPath
 from re import sub
 from textwrap import fill
-from typing import Any, Callable, Dict, List, Tuple
+from threading import BoundedSemaphore, Thread
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from uuid import uuid4
 
 import requests
 from bs4 import NavigableString, Tag
@@ -15,10 +20,17 @@ from bs4 import NavigableString, Tag
 from mmpm.constants import color
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
-from mmpm.utils import repo_up_to_date, run_cmd, safe_get_request
+from mmpm.magicmirror.cache import RemoteMetadataCache, UpdateCheckCache
+from mmpm.utils import BUILD_TIMEOUT, GIT_TIMEOUT, CancellationToken, HostScheduler, HTTPClient, repo_heads, run_cmd, safe_get_request
 
 NA: str = "N/A"
 
+# scratch areas within the MagicMirror modules directory. They live on the same filesystem as
+# the packages themselves, so directories can be atomically renamed into (and out of) place
+STAGING_DIR: Path = Path(".mmpm") / "staging"
+ROLLBACK_DIR: Path = Path(".mmpm") / "rollback"
+TRASH_DIR: Path = Path(".mmpm") / "trash"
+
 logger = MMPMLogFactory.get_logger(__name__)
 
 
@@ -43,6 +55,9 @@ class MagicMirrorPackage:
         "is_installed",
         "env",
         "is_upgradable",
+        "stars",
+        "forks",
+        "last_updated",
     )
 
     # pylint: disable=unused-argument
@@ -55,6 +70,9 @@ class MagicMirrorPackage:
         category: str = NA,
         directory: str = "",
         is_installed: bool = False,
+        stars: Optional[int] = None,
+        forks: Optional[int] = None,
+        last_updated: Optional[str] = None,
         **kwargs,
     ) -> None:
         """
@@ -68,6 +86,9 @@ class MagicMirrorPackage:
             category (str): The category of the package.
             directory (str): The directory where the package is installed.
             is_installed (bool): A flag indicating whether the package is installed.
+            stars (Optional[int]): The number of stars of the repository, if known.
+            forks (Optional[int]): The number of forks of the repository, if known.
+            last_updated (Optional[str]): The date (YYYY-MM-DD) the repository was last updated, if known.
 
         Additional keyword arguments are ignored, but intentionally provided as a means to simplify API interaction.
         """
@@ -81,6 +102,9 @@ class MagicMirrorPackage:
         self.category = category.strip()
         self.is_installed = is_installed
         self.is_upgradable = False
+        self.stars = stars
+        self.forks = forks
+        self.last_updated = last_updated
 
     def __str__(self) -> str:
         return str(self.serialize())
@@ -169,28 +193,51 @@ class MagicMirrorPackage:
             "directory": self.directory.name,
         }
 
+        # remote metadata collected by MagicMirrorDatabase.enrich
+        for key in ("stars", "forks", "last_updated"):
+            if getattr(self, key) is not None:
+                serialized[key] = getattr(self, key)
+
         if full:
             serialized["is_installed"] = self.is_installed  # type: ignore
             serialized["is_upgradable"] = self.is_upgradable  # type: ignore
 
         return serialized
 
-    def install(self) -> bool:
+    def enrich(self, details: Dict[str, Any]) -> None:
         """
-        Installs the package by cloning the repository and installing dependencies.
+        Stores the stars, forks, and last updated date from the remote details of the package, as retrieved by RemotePackage.
 
         Parameters:
+            details (Dict[str, Any]): The remote details of the package.
+
+        Returns:
             None
+        """
+        for key in ("stars", "forks", "last_updated"):
+            value = details.get(key)
+
+            if value is not None and value != NA:
+                setattr(self, key, value)
+
+    def install(self, token: Optional[CancellationToken] = None) -> bool:
+        """
+        Installs the package by cloning the repository and installing dependencies.
+
+        Parameters:
+            token (Optional[CancellationToken]): A token which kills the commands of the installation when cancelled.
 
         Returns:
             bool: True if the installation is successful, False otherwise.
         """
 
-        return InstallationHandler(self).install()
+        return InstallationHandler(self, token).install()
 
     def remove(self) -> bool:
         """
-        Removes the package from the installation directory.
+        Removes the package from the installation directory, along with any staged or rollback copies of it.
+        The directories are atomically moved into the trash, which is emptied separately by `empty_trash`,
+        so removing large packages returns immediately.
 
         Parameters:
             None
@@ -200,78 +247,209 @@ class MagicMirrorPackage:
         """
 
         modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
-        error_code, stdout, stderr = run_cmd(["rm", "-rf", str(modules_dir / self.directory)], message="Removing package")
-        return not error_code and not stderr and not stdout
+        trash_dir = modules_dir / TRASH_DIR
+        removed = True
+
+        for directory in (modules_dir / sub_dir / self.directory.name for sub_dir in (Path(), STAGING_DIR, ROLLBACK_DIR)):
+            if not directory.exists():
+                continue
 
-    def clone(self) -> Tuple[int, str, str]:
+            try:
+                trash_dir.mkdir(parents=True, exist_ok=True)
+                os.rename(directory, trash_dir / f"{directory.name}-{uuid4().hex}")
+                logger.debug(f"Moved {directory} to the trash")
+            except OSError as error:
+                logger.error(f"Failed to remove {directory}: {error}")
+                removed = False
+
+        return removed
+
+    def rollback(self) -> bool:
         """
-        Clones the package repository into the MagicMirror modules directory.
+        Swaps the installed version of the package with the copy kept from before its last installation or upgrade.
 
         Parameters:
             None
 
+        Returns:
+            bool: True if the rollback is successful, False otherwise.
+        """
+
+        return InstallationHandler(self).rollback()
+
+    def clone(self, destination: Path = None, token: Optional[CancellationToken] = None) -> Tuple[int, str, str]:
+        """
+        Clones the package repository into the MagicMirror modules directory.
+
+        Parameters:
+            destination (Path): The directory to clone into. Defaults to the package directory within the modules directory.
+            token (Optional[CancellationToken]): A token which kills the clone when cancelled.
+
         Returns:
             Tuple[int, str, str]: The result of the clone operation including any error codes and messages.
         """
 
         modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
 
-        return run_cmd(
-            ["git", "clone", self.repository, str(modules_dir / self.directory)],
-            message="Downloading",
-        )
+        with HostScheduler().slot(self.repository):
+            return run_cmd(
+                ["git", "clone", self.repository, str(destination or modules_dir / self.directory)],
+                message="Downloading",
+                timeout=GIT_TIMEOUT,
+                token=token,
+            )
 
-    def update(self) -> None:
+    def stage(self, token: Optional[CancellationToken] = None) -> bool:
         """
-        Checks for updates to the package by querying the remote repository.
+        Builds the latest version of the package in a staging directory next to the live one,
+        leaving the live copy untouched until `activate` is called.
 
         Parameters:
-            None
+            token (Optional[CancellationToken]): A token which kills the commands of the build when cancelled.
 
         Returns:
+            bool: True if the new version was built successfully, False otherwise.
+        """
+
+        return InstallationHandler(self, token).stage(reuse=False)
+
+    def activate(self) -> bool:
+        """
+        Swaps the version built by `stage` into place of the live copy of the package.
+
+        Parameters:
             None
+
+        Returns:
+            bool: True if the swap is successful, False otherwise.
+        """
+
+        return InstallationHandler(self).activate()
+
+    def update(self, max_age: Optional[float] = None) -> bool:
+        """
+        Checks for updates to the package by querying the remote repository. The result is recorded in the
+        UpdateCheckCache, and while the local HEAD is unchanged, a check younger than `max_age` seconds is
+        reused instead of querying the remote again.
+
+        Parameters:
+            max_age (Optional[float]): The age in seconds up to which a previous check is reused. If None, the remote is always queried.
+
+        Returns:
+            bool: True if the remote was fetched, so the changes of the package are already downloaded, False otherwise.
         """
         modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
 
         if not modules_dir.exists():
             logger.fatal(f"{self.env.MMPM_MAGICMIRROR_ROOT.name}='{str(modules_dir)}' does not exist.")
             self.is_upgradable = False
-            return
+            return False
 
-        os.chdir(modules_dir / self.directory)
+        package_dir = modules_dir / self.directory
+        checks = UpdateCheckCache()
+
+        if max_age is not None:
+            local, _ = repo_heads(package_dir, fetch=False)
+            check = checks.get(str(package_dir), local) if local else None
+
+            if check is not None and time.time() - check["timestamp"] <= max_age:
+                logger.debug(f"Reusing update check of {self.title} from {time.time() - check['timestamp']:.0f}s ago")
+                self.is_upgradable = check["local"] != check["remote"]
+                return False
+
+        print(f"Retrieving: {self.repository} [{color.n_cyan(self.title)}]")
 
         try:
-            self.is_upgradable = repo_up_to_date(modules_dir / self.directory)
+            local, remote = repo_heads(package_dir)
         except KeyboardInterrupt:
             logger.info("User killed process with CTRL-C")
             sys.exit(127)
 
-    def upgrade(self, force: bool = False) -> bool:
+        if local is not None and remote is not None:
+            checks.set(str(package_dir), local, remote)
+
+        self.is_upgradable = local is not None and remote is not None and local != remote
+        return remote is not None
+
+    def upgrade(self, force: bool = False, token: Optional[CancellationToken] = None) -> bool:
         """
-        Upgrades the package by pulling the latest changes from the remote repository.
+        Upgrades the package by pulling the latest changes from the remote repository. A forced upgrade
+        rebuilds the package in a staged copy of the live one, which is swapped into place once built.
 
         Parameters:
             force (bool): If True, forces the upgrade even if the repository is up to date.
+            token (Optional[CancellationToken]): A token which kills the commands of the upgrade when cancelled.
 
         Returns:
             bool: True if the upgrade is successful, False otherwise.
         """
         modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
 
-        os.chdir(modules_dir / self.directory)
+        if force:
+            handler = InstallationHandler(self, token)
+
+            if not (handler.stage(reuse=False) and handler.activate()):
+                logger.error(f"Failed to upgrade {self.title}")
+                return False
 
-        error_code, stdout, stderr = run_cmd(["git", "pull"], message="Retrieving changes")
+            print(f"Upgraded {color.n_green(self.title)}")
+            logger.debug(f"Upgraded {color.n_green(self.title)}")
+            return True
+
+        os.chdir(modules_dir / self.directory)
+        error_code, stdout, stderr = self.__pull__(token)
 
         if error_code or stderr:
             logger.error(f"Failed to upgrade {self.title}: {stderr}")
             return False
 
-        elif "up to date" not in stdout or force and InstallationHandler(self).install():
+        elif "up to date" not in stdout:
             print(f"Upgraded {color.n_green(self.title)}")
             logger.debug(f"Upgraded {color.n_green(self.title)}")
 
         return True
 
+    def __pull__(self, token: Optional[CancellationToken] = None) -> Tuple[int, str, str]:
+        """
+        Brings the clone of the package in the current directory up to date with the remote repository.
+
+        Parameters:
+            token (Optional[CancellationToken]): A token which kills the merge, or pull, when cancelled.
+
+        Returns:
+            Tuple[int, str, str]: The result of the merge, or pull, including any error codes and messages.
+        """
+
+        # if the changes were already prefetched, a local fast-forward is all that's needed
+        error_code, stdout, stderr = run_cmd(["git", "merge", "--ff-only", "@{u}"], progress=False, timeout=GIT_TIMEOUT, token=token)
+
+        if error_code or "up to date" in stdout:
+            logger.debug(f"No prefetched changes found for {self.title}. Pulling from remote.")
+            error_code, stdout, stderr = run_cmd(["git", "pull"], message="Retrieving changes", timeout=GIT_TIMEOUT, token=token)
+
+        return error_code, stdout, stderr
+
+    def prefetch(self) -> None:
+        """
+        Fetches the latest objects from the remote repository in a detached background process,
+        allowing a later upgrade to be applied with a local fast-forward. Checking the package with
+        `update` fetches them too, so only packages whose check was reused need to be prefetched.
+
+        Parameters:
+            None
+
+        Returns:
+            None
+        """
+        modules_dir: PosixPath = self.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+
+        if not (modules_dir / self.directory / ".git").exists():
+            logger.debug(f"Unable to prefetch {self.title}, '{modules_dir / self.directory}' is not a git repo")
+            return
+
+        logger.debug(f"Prefetching changes for {self.title}")
+        run_cmd(["git", "-C", str(modules_dir / self.directory), "fetch", "--quiet", "origin"], background=True)
+
     @classmethod
     def from_raw_data(cls, raw_data: List[Tag], category=NA):
         """
@@ -328,13 +506,15 @@ class InstallationHandler:
     """
     Delegate class that handles the installation process of
     MagicMirrorPackage's by cloning their repo and identifying dependencies
-    that need to be installed.
+    that need to be installed. The commands it runs are killed after GIT_TIMEOUT, or BUILD_TIMEOUT seconds,
+    or as soon as its token is cancelled.
     """
 
-    __slots__ = {"package"}
+    __slots__ = {"package", "token"}
 
-    def __init__(self, package: MagicMirrorPackage):
+    def __init__(self, package: MagicMirrorPackage, token: Optional[CancellationToken] = None):
         self.package = package
+        self.token = token
 
     def exec(self, funk: Callable) -> bool:
         logger.debug(f"Calling exec wrapper to install dependencies for '{self.package.title}'")
@@ -346,40 +526,240 @@ class InstallationHandler:
 
         return True
 
-    # pylint: disable=too-many-return-statements
     def install(self) -> bool:
         """
-        Utility method that detects package.json, Gemfiles, Makefiles, and
-        CMakeLists.txt files, and handles the build process for each of the
-        previously mentioned files. If the install is successful, an empty string
-        is returned. The installation process relies on the location of the current
-        directory the os library detects.
+        Installs the package into a staging directory, builds its dependencies there, and only
+        atomically renames it into the modules directory once the build succeeds. If a version of
+        the package is already installed, it is kept aside so it can be restored with `rollback`.
+        A failed build leaves the staging directory in place, allowing a retry to skip the clone.
 
         Parameters:
-            directory (str): the root directory of the package
+            None
 
         Returns:
-            stderr (str): success if the string is empty, fail if not
+            bool: True if the installation is successful, False otherwise.
+        """
+
+        return self.stage() and self.activate()
+
+    def stage(self, reuse: bool = True) -> bool:
+        """
+        Prepares the latest version of the package in a staging directory next to the live one and builds
+        its dependencies there, without touching the live copy of the package. When a live clone exists,
+        it's cloned locally (see `__clone_live__`) and brought up to date, so local branches, configuration,
+        and any untracked or ignored files (ie. config files, tokens) carry over to the new version. Otherwise,
+        the package is cloned from its repository.
+
+        Parameters:
+            reuse (bool): If True, a previously staged copy of the package is built instead of preparing it again.
+
+        Returns:
+            bool: True if the package was staged and built successfully, False otherwise.
         """
         root = self.package.env.MMPM_MAGICMIRROR_ROOT
         modules_dir = root.get() / "modules"
-        self.package.directory = modules_dir / self.package.directory
+        name = Path(self.package.directory).name
 
         if not modules_dir.exists():
             logger.fatal(f"{root.name}='{modules_dir}' does not exist. Is {root.name} set properly?")
             return False
 
-        os.chdir(modules_dir)
+        live_dir = modules_dir / name
+        staging_dir = modules_dir / STAGING_DIR / name
+        staging_dir.parent.mkdir(parents=True, exist_ok=True)
 
-        if not (self.package.directory / ".git").exists():
-            logger.debug(f"{self.package.directory / '.git'} not found. Cloning repo.")
-            error_code, _, stderr = self.package.clone()
+        if reuse and (staging_dir / ".git").exists():
+            logger.debug(f"Reusing previously staged copy of {self.package.title} found in {staging_dir}")
+            os.chdir(staging_dir)
+        elif (live_dir / ".git").exists():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+            if not self.__clone_live__(live_dir, staging_dir):
+                return False
+
+            os.chdir(staging_dir)
+            error_code, _, stderr = self.package.__pull__(self.token)
+
+            if error_code:
+                logger.error(f"Failed to retrieve changes to {self.package.title}: {stderr}")
+                return False
+        else:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            error_code, _, stderr = self.package.clone(staging_dir, self.token)
 
             if error_code:
                 logger.error(f"Failed to clone {self.package.title}: {stderr}")
                 return False
 
-        os.chdir(self.package.directory)
+            os.chdir(staging_dir)
+
+        self.package.directory = staging_dir
+
+        if not self.build():
+            logger.debug(f"Keeping {staging_dir} so the installation of {self.package.title} can be retried")
+            return False
+
+        if self.token is not None and self.token.cancelled:
+            logger.warning(f"Installation of {self.package.title} was cancelled, keeping {staging_dir} so it can be retried")
+            return False
+
+        return True
+
+    def __clone_live__(self, live_dir: Path, staging_dir: Path) -> bool:
+        """
+        Creates the staging directory from the live clone of the package, rather than copying it as a whole.
+        `git clone --local` hardlinks the objects of the live repository, then its branches, remote-tracking
+        branches (including any prefetched changes), and configuration are carried over. Only the untracked,
+        ignored, and modified files of the live copy are copied, other than node_modules, which is hardlinked,
+        since npm replaces the packages it upgrades, rather than writing to their files.
+
+        Parameters:
+            live_dir (Path): the directory the package is served from by MagicMirror
+            staging_dir (Path): the directory the package is staged in
+
+        Returns:
+            bool: True if the staging directory was created, False otherwise.
+        """
+
+        # fetching from the path, rather than 'origin', keeps git from updating the remote-tracking branches itself
+        refspecs = ["+refs/heads/*:refs/heads/*", "+refs/remotes/*:refs/remotes/*"]
+        commands = (
+            ["git", "clone", "--local", "--single-branch", "--quiet", str(live_dir), str(staging_dir)],
+            ["git", "-C", str(staging_dir), "fetch", "--quiet", "--update-head-ok", str(live_dir), *refspecs],
+            ["git", "-C", str(live_dir), "ls-files", "-z", "--others", "--directory", "--modified"],
+        )
+
+        for command in commands:
+            error_code, stdout, stderr = run_cmd(command, progress=False, timeout=GIT_TIMEOUT, token=self.token)
+
+            if error_code:
+                logger.error(f"Failed to stage {self.package.title} from {live_dir}: {stderr}")
+                return False
+
+        try:
+            shutil.copy2(live_dir / ".git" / "config", staging_dir / ".git" / "config")
+
+            for name in sorted(set(filter(None, stdout.split("\0")))):
+                source, destination = live_dir / name, staging_dir / name
+
+                if source.is_dir() and not source.is_symlink():
+                    copy_function = os.link if name.rstrip("/") == "node_modules" else shutil.copy2
+                    shutil.copytree(source, destination, symlinks=True, copy_function=copy_function, dirs_exist_ok=True)
+                elif source.exists() or source.is_symlink():  # modified files may have been deleted
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    destination.unlink(missing_ok=True)
+                    shutil.copy2(source, destination, follow_symlinks=False)
+        except (OSError, shutil.Error) as error:
+            logger.error(f"Failed to copy the files of {live_dir} to {staging_dir}: {error}")
+            return False
+
+        return True
+
+    def activate(self) -> bool:
+        """
+        Atomically renames the staged copy of the package into the modules directory, keeping
+        the copy it replaces aside for `rollback`. Only one previous copy is kept per package, so
+        the one kept by the previous installation or upgrade is moved into the trash beforehand,
+        and deleted once the staged copy is in place.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the staged copy was moved into place, False otherwise.
+        """
+        modules_dir = self.package.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+        name = Path(self.package.directory).name
+        live_dir = modules_dir / name
+        staging_dir = modules_dir / STAGING_DIR / name
+        rollback_dir = modules_dir / ROLLBACK_DIR / name
+
+        if not staging_dir.exists():
+            logger.error(f"No staged copy of {self.package.title} found in {staging_dir}")
+            return False
+
+        pruned = modules_dir / TRASH_DIR / f"{name}-{uuid4().hex}"
+
+        if live_dir.exists() and rollback_dir.exists():
+            try:
+                pruned.parent.mkdir(parents=True, exist_ok=True)
+                os.rename(rollback_dir, pruned)
+            except OSError as error:
+                logger.error(f"Failed to move {rollback_dir} to the trash: {error}")
+
+        self.__swap__(staging_dir, live_dir, rollback_dir)
+        self.package.directory = live_dir
+        os.chdir(live_dir)
+
+        if pruned.exists():
+            shutil.rmtree(pruned, ignore_errors=True)
+            logger.debug(f"Deleted the previous copy of {self.package.title} kept for rollback")
+
+        return True
+
+    def rollback(self) -> bool:
+        """
+        Restores the copy of the package kept aside by the last installation or upgrade. The
+        version being replaced is kept aside in turn, so a rollback can itself be undone.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the rollback is successful, False otherwise.
+        """
+        modules_dir = self.package.env.MMPM_MAGICMIRROR_ROOT.get() / "modules"
+        name = Path(self.package.directory).name
+        live_dir = modules_dir / name
+        rollback_dir = modules_dir / ROLLBACK_DIR / name
+
+        if not rollback_dir.exists():
+            logger.error(f"No previous version of {self.package.title} is available to roll back to")
+            return False
+
+        # the rollback copy becomes the new "staged" copy, and the live copy takes its place
+        staging_dir = modules_dir / STAGING_DIR / f"{name}.rollback"
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        os.rename(rollback_dir, staging_dir)
+        self.__swap__(staging_dir, live_dir, rollback_dir)
+        logger.debug(f"Rolled back {self.package.title} using {rollback_dir}")
+        return True
+
+    def __swap__(self, staging_dir: Path, live_dir: Path, rollback_dir: Path) -> None:
+        """
+        Atomically moves the staged copy of the package into place, moving any existing copy aside.
+
+        Parameters:
+            staging_dir (Path): the directory containing the freshly built package
+            live_dir (Path): the directory the package is served from by MagicMirror
+            rollback_dir (Path): the directory the existing copy is moved to
+
+        Returns:
+            None
+        """
+
+        if live_dir.exists():
+            shutil.rmtree(rollback_dir, ignore_errors=True)
+            rollback_dir.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(live_dir, rollback_dir)
+
+        os.rename(staging_dir, live_dir)
+        logger.debug(f"Moved {staging_dir} into place at {live_dir}")
+
+    # pylint: disable=too-many-return-statements
+    def build(self) -> bool:
+        """
+        Utility method that detects package.json, Gemfiles, Makefiles, and
+        CMakeLists.txt files, and handles the build process for each of the
+        previously mentioned files. The build process relies on the location
+        of the current directory the os library detects.
+
+        Parameters:
+            None
+
+        Returns:
+            bool: True if the build is successful, False otherwise.
+        """
 
         if self.exists("package.json"):
             return self.exec(self.npm_install)
@@ -417,7 +797,7 @@ class InstallationHandler:
         os.system(f"rm -rf {build_dir}/*")
         os.chdir(build_dir)
 
-        return run_cmd(["cmake", ".."], message="Building with CMake")
+        return run_cmd(["cmake", ".."], message="Building with CMake", timeout=BUILD_TIMEOUT, token=self.token)
 
     def make(self) -> Tuple[int, str, str]:
         """
@@ -430,7 +810,7 @@ class InstallationHandler:
             Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
         """
         logger.debug(f"Found Makefile. Running `make -j {cpu_count()} in {self.package.directory}`")
-        return run_cmd(["make", "-j", f"{cpu_count()}"], message="Building with 'make'")
+        return run_cmd(["make", "-j", f"{cpu_count()}"], message="Building with 'make'", timeout=BUILD_TIMEOUT, token=self.token)
 
     def npm_install(self) -> Tuple[int, str, str]:
         """
@@ -443,7 +823,7 @@ class InstallationHandler:
             Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
         """
         logger.debug(f"Found package.json. Running `npm install` in {self.package.directory}")
-        return run_cmd(["npm", "install"], message="Installing Node dependencies")
+        return run_cmd(["npm", "install"], message="Installing Node dependencies", timeout=BUILD_TIMEOUT, token=self.token)
 
     def bundle_install(self) -> Tuple[int, str, str]:
         """
@@ -456,7 +836,7 @@ class InstallationHandler:
             Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
         """
         logger.debug(f"Found Gemfile. Running `bundle install` in {self.package.directory}")
-        return run_cmd(["bundle", "install"], message="Installing Ruby dependencies")
+        return run_cmd(["bundle", "install"], message="Installing Ruby dependencies", timeout=BUILD_TIMEOUT, token=self.token)
 
     def pip_install(self) -> Tuple[int, str, str]:
         """
@@ -472,6 +852,8 @@ class InstallationHandler:
         return run_cmd(
             ["pip", "install", "-r", "requirements.txt"],
             message="Installing Python dependencies",
+            timeout=BUILD_TIMEOUT,
+            token=self.token,
         )
 
     def maven_install(self) -> Tuple[int, str, str]:
@@ -485,7 +867,7 @@ class InstallationHandler:
             Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
         """
         logger.debug(f"Running 'mvn install' in {self.package.directory}")
-        return run_cmd(["mvn", "install"], message="Building with Maven")
+        return run_cmd(["mvn", "install"], message="Building with Maven", timeout=BUILD_TIMEOUT, token=self.token)
 
     def go_build(self) -> Tuple[int, str, str]:
         """
@@ -498,7 +880,7 @@ class InstallationHandler:
             Tuple[int, str, str]: A tuple containing the exit code, stdout, and stderr from the 'pip install' command.
         """
         logger.debug(f"Running 'go build' in {self.package.directory}")
-        return run_cmd(["go", "build"], message="Building Go project")
+        return run_cmd(["go", "build"], message="Building Go project", timeout=BUILD_TIMEOUT, token=self.token)
 
     def exists(self, file_name: str) -> bool:
         """
@@ -513,6 +895,93 @@ class InstallationHandler:
         return Path(self.package.directory / file_name).exists()
 
 
+def empty_trash(files_per_second: int = 2000) -> int:
+    """
+    Deletes the contents of the trash within the modules directory, left behind by
+    `MagicMirrorPackage.remove`. The number of files deleted per second is capped, so
+    emptying the trash doesn't starve MagicMirror of I/O on slow storage (ie. SD cards).
+
+    Parameters:
+        files_per_second (int): The maximum number of files and directories to delete per second.
+
+    Returns:
+        int: The number of files and directories deleted.
+    """
+
+    trash_dir: PosixPath = MMPMEnv().MMPM_MAGICMIRROR_ROOT.get() / "modules" / TRASH_DIR
+
+    if not trash_dir.exists():
+        return 0
+
+    batch = max(files_per_second // 10, 1)
+    deleted = 0
+
+    logger.debug(f"Emptying {trash_dir} at a rate of {files_per_second} files per second")
+
+    for root, directories, files in os.walk(trash_dir, topdown=False):
+        for name in files + directories:
+            path = Path(root) / name
+
+            try:
+                if path.is_dir() and not path.is_symlink():
+                    os.rmdir(path)
+                else:
+                    os.unlink(path)
+            except FileNotFoundError:
+                continue  # another process may be emptying the trash too
+            except OSError as error:
+                logger.error(f"Failed to delete {path}: {error}")
+                continue
+
+            deleted += 1
+
+            if not deleted % batch:
+                time.sleep(0.1)
+
+    logger.debug(f"Deleted {deleted} files and directories from {trash_dir}")
+    return deleted
+
+
+def blue_green_upgrade(
+    packages: Iterable[MagicMirrorPackage], restart: Optional[Callable[[], bool]], token: Optional[CancellationToken] = None
+) -> Tuple[List[MagicMirrorPackage], float]:
+    """
+    Upgrades packages while keeping MagicMirror downtime to a minimum. The new version of every
+    package is built next to its live copy first, then all of them are swapped into place at once,
+    and MagicMirror is restarted a single time for the whole batch.
+
+    Parameters:
+        packages (Iterable[MagicMirrorPackage]): The packages to upgrade.
+        restart (Optional[Callable[[], bool]]): Restarts MagicMirror, so the swapped packages are loaded. If None, MagicMirror isn't restarted.
+        token (Optional[CancellationToken]): A token which kills the builds when cancelled. Once cancelled, nothing is swapped.
+
+    Returns:
+        Tuple[List[MagicMirrorPackage], float]: The upgraded packages, and the downtime of MagicMirror in seconds.
+    """
+
+    staged = [package for package in packages if package.stage(token)]
+
+    if not staged:
+        logger.debug("No packages were staged successfully, nothing to swap")
+        return [], 0.0
+
+    if token is not None and token.cancelled:
+        logger.warning("Upgrade was cancelled, the staged packages were not swapped into place")
+        return [], 0.0
+
+    started = time.monotonic()
+    upgraded = [package for package in staged if package.activate()]
+    swapped = time.monotonic()
+
+    if upgraded and restart is not None and not restart():
+        logger.error("Failed to restart MagicMirror after swapping upgraded packages")
+
+    downtime = time.monotonic() - swapped
+    logger.info(f"Swapped {len(upgraded)} package(s) in {swapped - started:.3f}s. MagicMirror was down for {downtime:.2f}s")
+
+    return upgraded, downtime
+
+
 class RemotePackage:
     """
     Class that collects details about a MagicMirrorPackage from its repository.
@@ -520,31 +989,99 @@ class RemotePackage:
 
     def __init__(self, package: MagicMirrorPackage):
         self.package = package
+        self.cache = RemoteMetadataCache()
+
+    @property
+    def host(self) -> str:
+        """
+        The API the details of the package are retrieved from.
+
+        Returns:
+            str: 'github', 'gitlab', 'bitbucket', or an empty string if the repository isn't hosted on any of them
+        """
+        for host in ("github", "gitlab", "bitbucket"):
+            if host in self.package.repository:
+                return host
+
+        return ""
+
+    @staticmethod
+    def __github_headers__() -> Dict[str, str]:
+        """
+        Builds the headers sent with every GitHub API request, authenticating with the MMPM_GITHUB_TOKEN when one
+        is set in the process environment, which raises the rate limit from 60 to 5000 requests per hour.
+
+        Parameters:
+            None
+
+        Returns:
+            Dict[str, str]: the request headers
+        """
+        headers = {"Accept": "application/vnd.github+json"}
+        token = os.environ.get("MMPM_GITHUB_TOKEN", "")
+
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+
+        return headers
 
     @classmethod
     def health(cls):
         """
-        Checks the health of GitHub, GitLab, and Bitbucket APIs and their rate limits.
+        Checks the health of GitHub, GitLab, and Bitbucket APIs and their rate limits. The GitLab and Bitbucket
+        results are cached for a short time, and the GitHub rate limit is taken from the headers of previous API
+        responses when it is known, so most checks don't require any network requests.
 
         Parameters: None
 
         Returns:
             dict: A dictionary containing the health status of GitHub, GitLab, and Bitbucket APIs.
         """
-        health: dict = {
-            "github": {"error": "", "warning": ""},
-            "gitlab": {"error": "", "warning": ""},
-            "bitbucket": {"error": "", "warning": ""},
-        }
+        cache = RemoteMetadataCache()
+        health: Optional[dict] = cache.get_health()
+
+        if health is None:
+            health = {
+                "gitlab": {"error": "", "warning": ""},
+                "bitbucket": {"error": "", "warning": ""},
+            }
+
+            try:
+                # GitLab doesn't have rate limits that will cause any issues with checking for repos
+                gitlab_api = HTTPClient().head("https://gitlab.com", allow_redirects=True)
+
+                if gitlab_api.status_code != 200:
+                    health["gitlab"]["error"] = "GitLab server returned invalid response"
+            except requests.exceptions.RequestException:
+                health["gitlab"]["error"] = "Unable to communicate with GitLab server"
+
+            try:
+                # Bitbucket rate limits are similar to GitLab
+                bitbucket_api = HTTPClient().head("https://bitbucket.org", allow_redirects=True)
+
+                if bitbucket_api.status_code != 200:
+                    health["bitbucket"]["error"] = "Bitbucket server returned invalid response"
+            except requests.exceptions.RequestException:
+                health["bitbucket"]["error"] = "Unable to communicate with Bitbucket server"
+
+            cache.set_health(health)
 
-        github_api_response: requests.Response = safe_get_request("https://api.github.com/rate_limit")
+        health = {"github": {"error": "", "warning": ""}, **health}
+        rate: Optional[dict] = cache.rate_limit("github")
 
-        if not github_api_response.status_code or github_api_response.status_code != 200:
-            health["github"]["error"] = "Unable to contact GitHub API"
+        if rate is None:
+            # the rate_limit endpoint doesn't count against the quota
+            github_api_response: requests.Response = safe_get_request("https://api.github.com/rate_limit", headers=cls.__github_headers__())
 
-        github_api: dict = json.loads(github_api_response.text)
-        reset: int = github_api["rate"]["reset"]
-        remaining: int = github_api["rate"]["remaining"]
+            if not github_api_response.status_code or github_api_response.status_code != 200:
+                health["github"]["error"] = "Unable to contact GitHub API"
+                return health
+
+            rate = json.loads(github_api_response.text)["rate"]
+            cache.track_rate_limit("github", {"X-RateLimit-Remaining": rate["remaining"], "X-RateLimit-Reset": rate["reset"]})
+
+        reset: int = rate["reset"]
+        remaining: int = rate["remaining"]
 
         reset_time = datetime.datetime.utcfromtimestamp(reset).strftime("%Y-%m-%d %H:%M:%S")
 
@@ -555,44 +1092,95 @@ class RemotePackage:
         elif remaining < 10:
             health["github"]["warning"] = f"{remaining} GitHub API requests remaining. Request count will reset at {reset_time}"
 
-        try:
-            # GitLab doesn't have rate limits that will cause any issues with checking for repos
-            gitlab_api = requests.head("https://gitlab.com", allow_redirects=True, timeout=10)
+        return health
+
+    def serialize(self, cached: bool = True):
+        """
+        Retrieves and formats details about the MagicMirror package from its remote repository. Previously
+        retrieved details are served from the RemoteMetadataCache, and stale entries are refreshed in the
+        background, so only packages which have never been looked at require a network request.
+
+        Parameters:
+            cached (bool): If False, the details are always retrieved from the remote repository.
+
+        Returns:
+            dict: A dictionary containing details such as stars, forks, issue counts, and creation and last updated dates of the repository.
+        """
+        repository = self.package.repository
+        entry = self.cache.get(repository) if cached else None
+
+        if entry is not None:
+            if self.cache.is_stale(repository) and self.cache.claim(repository):
+                logger.debug(f"Refreshing stale remote details of {self.package.title} in the background")
+                Thread(target=self.refresh, daemon=True).start()
+
+            return entry["details"]
+
+        return self.refresh()
+
+    def refresh(self) -> dict:
+        """
+        Retrieves the details of the package from its remote repository, and stores them in the RemoteMetadataCache.
 
-            if gitlab_api.status_code != 200:
-                health["gitlab"]["error"] = "GitLab server returned invalid response"
-        except requests.exceptions.RequestException:
-            health["gitlab"]["error"] = "Unable to communicate with GitLab server"
+        Parameters:
+            None
+
+        Returns:
+            dict: The details of the repository, or an empty dict if they could not be retrieved.
+        """
 
         try:
-            # Bitbucket rate limits are similar to GitLab
-            bitbucket_api = requests.head("https://bitbucket.org", allow_redirects=True, timeout=10)
+            details, validators = self.__fetch__()
 
-            if bitbucket_api.status_code != 200:
-                health["bitbucket"]["error"] = "Bitbucket server returned invalid response"
-        except requests.exceptions.RequestException:
-            health["gitlab"]["error"] = "Unable to communicate with Bitbucket server"
+            if details:
+                self.cache.set(self.package.repository, details, **validators)
 
-        return health
+            return details
+        finally:
+            self.cache.release(self.package.repository)
 
-    def serialize(self):
+    def __fetch__(self) -> Tuple[dict, Dict[str, str]]:
         """
-        Retrieves and formats details about the MagicMirror package from its remote repository.
+        Requests the details of the package from the GitHub, GitLab, or Bitbucket API. GitHub requests are made
+        conditional on the ETag and Last-Modified of the cached details, since 304 responses don't count against
+        the rate limit.
 
-        Parameters: None
+        Parameters:
+            None
 
         Returns:
-            dict: A dictionary containing details such as stars, forks, issue counts, and creation and last updated dates of the repository.
+            Tuple[dict, Dict[str, str]]: A dictionary containing details such as stars, forks, issue counts, and creation and
+            last updated dates of the repository, and the 'etag' and 'last_modified' validators of the response, if any.
         """
         spliced: List[str] = self.package.repository.split("/")
         user: str = spliced[-2]
         project: str = spliced[-1].replace(".git", "")  # in case the user added .git to the end of the url
         details = {}
+        validators: Dict[str, str] = {}
 
         if "github" in self.package.repository:
             url = f"https://api.github.com/repos/{user}/{project}"
             logger.debug(f"Constructed {url} to request more details for {self.package.title}")
-            data = safe_get_request(url)
+
+            headers = self.__github_headers__()
+            entry = self.cache.get(self.package.repository)
+
+            if entry is not None and entry.get("details"):
+                if entry.get("etag"):
+                    headers["If-None-Match"] = entry["etag"]
+                if entry.get("last_modified"):
+                    headers["If-Modified-Since"] = entry["last_modified"]
+
+            data = safe_get_request(url, headers=headers)
+            self.cache.track_rate_limit("github", data.headers)
+
+            for key, header in (("etag", "ETag"), ("last_modified", "Last-Modified")):
+                if data.headers.get(header):
+                    validators[key] = data.headers[header]
+
+            if data.status_code == 304:
+                logger.debug(f"{self.package.title} is unchanged since its details were cached")
+                return entry["details"], validators
 
             if not data:
                 logger.error(f"Unable to retrieve {self.package.title} details, data was empty")
@@ -619,7 +1207,7 @@ class RemotePackage:
 
             details = self.__format_bitbucket_api_details__(json.loads(data.text), url) if data else {}
 
-        return details
+        return details, validators
 
     def __format_bitbucket_api_details__(self, data: dict, url: str) -> dict:
         """
@@ -694,3 +1282,63 @@ class RemotePackage:
             if data
             else {}
         )
+
+
+def fetch_remote_details(packages: Iterable[MagicMirrorPackage], cached: bool = True, max_per_host: int = 4) -> Dict[str, dict]:
+    """
+    Retrieves the remote details of many packages concurrently, and stores them in the RemoteMetadataCache.
+    Fresh cache entries are used as-is, at most `max_per_host` requests are made to the same API at a time,
+    and GitHub requests stop once the known rate limit is exhausted, in which case stale details are used.
+
+    Parameters:
+        packages (Iterable[MagicMirrorPackage]): The packages to retrieve the details of.
+        cached (bool): If False, fresh cache entries are retrieved again as well.
+        max_per_host (int): The maximum number of concurrent requests made to each API.
+
+    Returns:
+        Dict[str, dict]: The details of each package, keyed by repository URL. Empty if they could not be retrieved.
+    """
+    cache = RemoteMetadataCache()
+    results: Dict[str, dict] = {}
+    pending: List[RemotePackage] = []
+
+    for package in packages:
+        if package.repository in results:
+            continue
+
+        remote = RemotePackage(package)
+        entry = cache.get(package.repository)
+
+        if entry is not None and cached and not cache.is_stale(package.repository):
+            results[package.repository] = entry["details"]
+        elif remote.host and cache.claim(package.repository):
+            pending.append(remote)
+        else:
+            results[package.repository] = entry["details"] if entry is not None else {}
+
+    if not pending:
+        return results
+
+    limits: Dict[str, BoundedSemaphore] = {host: BoundedSemaphore(max_per_host) for host in {remote.host for remote in pending}}
+
+    def fetch(remote: RemotePackage) -> dict:
+        with limits[remote.host]:
+            rate = cache.rate_limit("github") if remote.host == "github" else None
+
+            if rate is not None and rate["remaining"] <= 0:
+                cache.release(remote.package.repository)
+                entry = cache.get(remote.package.repository)
+                return entry["details"] if entry is not None else {}
+
+            return remote.refresh()
+
+    started = time.monotonic()
+
+    # the cache file is written once, rather than after every response
+    with cache.batch(), ThreadPoolExecutor(max_workers=max_per_host * len(limits)) as executor:
+        for remote, details in zip(pending, executor.map(fetch, pending)):
+            results[remote.package.repository] = details
+
+    logger.debug(f"Retrieved remote details of {len(pending)} package(s) in {time.monotonic() - started:.2f}s")
+
+    return results
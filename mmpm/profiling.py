@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Startup profiling for the MMPM CLI. Setting MMPM_PROFILE_STARTUP=1 re-runs the command in a child interpreter
+with `-X importtime`, and reports how long each module took to import, followed by the total time of the run.
+Setting MMPM_PROFILE_STARTUP to a number greater than 1 changes the number of modules reported.
+"""
+
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+PROFILE_STARTUP_ENV_VAR = "MMPM_PROFILE_STARTUP"
+
+__import_time_pattern__ = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$")
+
+
+def parse_import_times(output: str) -> Tuple[Dict[str, Dict[str, int]], List[str]]:
+    """
+    Parses the output of `python -X importtime`.
+
+    Parameters:
+        output (str): the stderr of the interpreter
+
+    Returns:
+        Tuple[Dict[str, Dict[str, int]], List[str]]: the 'self' and 'cumulative' import times of each module in
+        microseconds, and the lines of the output that aren't import times
+    """
+
+    timings: Dict[str, Dict[str, int]] = {}
+    other: List[str] = []
+
+    for line in output.splitlines(keepends=True):
+        match = __import_time_pattern__.match(line)
+
+        if match:
+            timings[match.group(4)] = {"self": int(match.group(1)), "cumulative": int(match.group(2))}
+        elif not line.startswith("import time:"):  # the header of the table
+            other.append(line)
+
+    return timings, other
+
+
+def profile_startup(argv: List[str], limit: int = 30) -> int:
+    """
+    Runs the CLI with the given arguments in a child interpreter, and prints the modules that took the longest to
+    import, sorted by cumulative import time.
+
+    Parameters:
+        argv (List[str]): the arguments to run the CLI with
+        limit (int): the number of modules to report
+
+    Returns:
+        int: the exit code of the child interpreter
+    """
+
+    env = {key: value for key, value in os.environ.items() if key != PROFILE_STARTUP_ENV_VAR}
+
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "mmpm.entrypoint", *argv],
+        env=env,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=False,
+    )
+    elapsed = time.perf_counter() - start
+
+    timings, other = parse_import_times(process.stderr)
+    sys.stderr.write("".join(other))
+
+    ranked = sorted(timings.items(), key=lambda timing: timing[1]["cumulative"], reverse=True)
+
+    print(f"\n{'cumulative (ms)':>16} {'self (ms)':>10}  module", file=sys.stderr)
+
+    for module, timing in ranked[:limit]:
+        print(f"{timing['cumulative'] / 1000:>16.1f} {timing['self'] / 1000:>10.1f}  {module}", file=sys.stderr)
+
+    total_imports = sum(timing["self"] for timing in timings.values()) / 1000
+    print(f"\n{len(timings)} modules imported in {total_imports:.1f} ms, total run time {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+    return process.returncode
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""Command line options for 'daemon' subcommand"""
+
+from mmpm.constants import paths
+from mmpm.daemon import client
+from mmpm.log.factory import MMPMLogFactory
+from mmpm.subcommands.sub_cmd import SubCmd
+
+logger = MMPMLogFactory.get_logger(__name__)
+
+
+class Daemon(SubCmd):
+    """
+    The 'Daemon' subcommand runs the optional MMPM daemon, which keeps the database and installed packages
+    loaded in memory, and answers the `search`, `list`, and `show` subcommands for the CLI.
+
+    Custom Attributes:
+        None
+    """
+
+    def __init__(self, app_name):
+        self.app_name = app_name
+        self.name = "daemon"
+        self.help = f"Run the {self.app_name} daemon, which answers search, list, and show queries from memory"
+        self.usage = f"{self.app_name} {self.name} [--status]"
+
+    def register(self, subparser):
+        self.parser = subparser.add_parser(self.name, usage=self.usage, help=self.help)
+
+        self.parser.add_argument(
+            "--status",
+            action="store_true",
+            help=f"display the status of the {self.app_name} {self.name}",
+            dest="status",
+        )
+
+    def exec(self, args, extra):
+        if extra:
+            logger.error(f"Extra arguments are not accepted. See '{self.app_name} {self.name} --help'")
+            return
+
+        if args.status:
+            status = client.ping()
+
+            if status is None:
+                print("stopped")
+            else:
+                print(f"running (pid {status['pid']}, version {status['version']}, socket {paths.MMPM_DAEMON_SOCKET})")
+
+            return
+
+        from mmpm.daemon.server import serve  # pylint: disable=import-outside-toplevel
+
+        serve()
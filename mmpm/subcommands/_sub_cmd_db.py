@@ -50,6 +50,14 @@ class Db(SubCmd):
             dest="dump",
         )
 
+        group.add_argument(
+            "-e",
+            "--enrich",
+            action="store_true",
+            help="collect the stars, forks, and last update of all packages, used to sort and filter packages",
+            dest="enrich",
+        )
+
     def exec(self, args, extra):
         if not self.database.is_initialized():
             self.database.load()
@@ -77,5 +85,9 @@ class Db(SubCmd):
                     TerminalFormatter(),
                 ),
             )
+        elif args.enrich:
+            enriched = self.database.enrich()
+            logger.info(f"Collected remote metadata of {enriched} of {len(self.database.packages)} packages")
+
         else:
             logger.error(f"No arguments provided. See '{self.app_name} {self.name} --help'")
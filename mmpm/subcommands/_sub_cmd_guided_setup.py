@@ -1,10 +1,9 @@
 #!/usr/bin/env python3
 """ Command line options for 'guided-setup' subcommand """
-import json
 from os import getenv
 from pathlib import Path
 
-from mmpm.constants import color, paths
+from mmpm.constants import color
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.subcommands.sub_cmd import SubCmd
@@ -73,18 +72,15 @@ class GuidedSetup(SubCmd):
         install_as_module = confirm("Would you like to hide/show MagicMirror modules through MMPM?")
         install_autocomplete = confirm("Would you like to install tab-autocomplete for the MMPM CLI?")
 
-        with open(paths.MMPM_ENV_FILE, "w", encoding="utf-8") as env:
-            json.dump(
-                {
-                    self.env.MMPM_MAGICMIRROR_ROOT.name: str(magicmirror_root),
-                    self.env.MMPM_MAGICMIRROR_URI.name: magicmirror_uri,
-                    self.env.MMPM_MAGICMIRROR_PM2_PROCESS_NAME.name: magicmirror_pm2_proc,
-                    self.env.MMPM_MAGICMIRROR_DOCKER_COMPOSE_FILE.name: str(magicmirror_docker_compose_file),
-                    self.env.MMPM_IS_DOCKER_IMAGE.name: bool(mmpm_is_docker_image),
-                },
-                env,
-                indent=2,
-            )
+        self.env.write(
+            {
+                self.env.MMPM_MAGICMIRROR_ROOT.name: str(magicmirror_root),
+                self.env.MMPM_MAGICMIRROR_URI.name: magicmirror_uri,
+                self.env.MMPM_MAGICMIRROR_PM2_PROCESS_NAME.name: magicmirror_pm2_proc,
+                self.env.MMPM_MAGICMIRROR_DOCKER_COMPOSE_FILE.name: str(magicmirror_docker_compose_file),
+                self.env.MMPM_IS_DOCKER_IMAGE.name: bool(mmpm_is_docker_image),
+            }
+        )
 
         message = "Based on your responses, your environment variables have been set as:"
         line_break = color.b_green("-" * len(message))
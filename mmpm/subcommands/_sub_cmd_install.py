@@ -6,6 +6,7 @@ from mmpm.constants import color
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.subcommands.completers import available_packages
 from mmpm.subcommands.sub_cmd import SubCmd
 from mmpm.utils import confirm
 
@@ -39,7 +40,16 @@ class Install(SubCmd):
             dest="assume_yes",
         )
 
+        self.parser.add_argument(
+            "packages",
+            nargs="*",
+            metavar="package",
+            help="the title(s) of the package(s) to install",
+        ).completer = available_packages
+
     def exec(self, args, extra):
+        extra = args.packages + extra  # the package names, followed by any unrecognized arguments
+
         if not extra:
             logger.error(f"No arguments provided. See '{self.app_name} {self.name} --help'")
             return
@@ -65,6 +75,5 @@ class Install(SubCmd):
 
             if package.install():
                 logger.info(f"Installed {color.n_green(package.title)} ({package.repository})")
-            elif confirm(f"Installation failed. Would you like to remove {package.title}?"):
-                package.is_installed = True
+            elif confirm(f"Installation failed. Would you like to discard the downloaded copy of {package.title}? (it is reused if kept)"):
                 package.remove()
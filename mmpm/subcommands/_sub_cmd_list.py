@@ -36,6 +36,28 @@ class List(SubCmd):
             dest="title_only",
         )
 
+        self.parser.add_argument(
+            "--sort",
+            choices=["stars", "updated"],
+            help=f"sort packages (used with -a, -e, or -i) by the most stars or most recent update, using metadata collected by `{self.app_name} db --enrich`",
+            dest="sort",
+        )
+
+        self.parser.add_argument(
+            "--min-stars",
+            type=int,
+            help="only list packages with at least this many stars",
+            dest="min_stars",
+        )
+
+        self.parser.add_argument(
+            "--updated-within",
+            type=int,
+            metavar="DAYS",
+            help="only list packages updated within this many days",
+            dest="updated_within",
+        )
+
         group = self.parser.add_mutually_exclusive_group()
 
         group.add_argument(
@@ -81,13 +103,15 @@ class List(SubCmd):
         if not self.database.is_initialized():
             self.database.load()
 
+        packages = self.database.select(self.database.packages, sort=args.sort, min_stars=args.min_stars, updated_within=args.updated_within)
+
         if args.installed:
-            for package in self.database.packages:
+            for package in packages:
                 if package.is_installed:
                     package.display(title_only=args.title_only, hide_installed_indicator=True)
 
         elif args.all or args.exclude_installed:
-            for package in self.database.packages:
+            for package in packages:
                 package.display(title_only=args.title_only, exclude_installed=args.exclude_installed)
 
         elif args.categories:
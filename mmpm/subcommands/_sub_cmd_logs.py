@@ -1,7 +1,9 @@
 #!/usr/bin/env python3
 """ Command line options for 'log' subcommand """
+import json
 
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.log.query import LogQuery
 from mmpm.subcommands.sub_cmd import SubCmd
 
 logger = MMPMLogFactory.get_logger(__name__)
@@ -40,10 +42,44 @@ class Logs(SubCmd):
             dest="zip",
         )
 
+        self.parser.add_argument(
+            "--since",
+            help="Only show records logged after this date and time (ie. 2024-01-31T18:00), or duration ago (ie. 30m, 2h, 1d)",
+            dest="since",
+        )
+
+        self.parser.add_argument(
+            "--level",
+            type=str.upper,
+            choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+            help="Only show records of this level, or above",
+            dest="level",
+        )
+
+        self.parser.add_argument(
+            "--grep",
+            metavar="PATTERN",
+            help="Only show records whose message matches this regular expression",
+            dest="grep",
+        )
+
     def exec(self, args, extra):
         if extra:
             logger.error(f"Extra arguments are not accepted. See '{self.app_name} {self.name} --help'")
         elif args.zip:
             MMPMLogFactory.archive()
+        elif args.since or args.level or args.grep:
+            if args.tail:
+                logger.error("The --tail option can't be combined with --since, --level, or --grep")
+                return
+
+            try:
+                records = LogQuery().query(since=args.since, level=args.level, grep=args.grep)
+            except ValueError as error:
+                logger.error(str(error))
+                return
+
+            for record in records:
+                print(json.dumps(record, ensure_ascii=False))
         else:
             MMPMLogFactory.display(tail=args.tail)
@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
 """ Command line options for 'remove' subcommand """
+import sys
 from typing import List
 
 from mmpm.constants import color
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
+from mmpm.magicmirror.package import empty_trash
+from mmpm.subcommands.completers import installed_packages
 from mmpm.subcommands.sub_cmd import SubCmd
-from mmpm.utils import confirm
+from mmpm.utils import confirm, run_cmd
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -23,7 +26,7 @@ class Remove(SubCmd):
         self.app_name = app_name
         self.name = "remove"
         self.help = "Remove installed MagicMirror packages"
-        self.usage = f"{self.app_name} {self.name} <package(s)> [--yes]"
+        self.usage = f"{self.app_name} {self.name} <package(s)> [--yes] [--gc]"
         self.database = MagicMirrorDatabase()
 
     def register(self, subparser):
@@ -38,7 +41,28 @@ class Remove(SubCmd):
             dest="assume_yes",
         )
 
+        self.parser.add_argument(
+            "--gc",
+            action="store_true",
+            default=False,
+            help="delete leftovers of previously removed packages from the trash",
+            dest="gc",
+        )
+
+        self.parser.add_argument(
+            "packages",
+            nargs="*",
+            metavar="package",
+            help="the title(s) of the package(s) to remove",
+        ).completer = installed_packages
+
     def exec(self, args, extra):
+        extra = args.packages + extra  # the package names, followed by any unrecognized arguments
+
+        if args.gc:
+            logger.info(f"Deleted {empty_trash()} leftover files and directories from the trash")
+            return
+
         if not extra:
             logger.error(f"No arguments provided. See '{self.app_name} {self.name} --help'")
             return
@@ -47,6 +71,7 @@ class Remove(SubCmd):
             self.database.load()
 
         package_titles: List[str] = {package.title: package for package in self.database.packages}
+        removed = False
 
         for name in extra:
             package = package_titles.get(name)
@@ -64,3 +89,8 @@ class Remove(SubCmd):
 
             if package.remove():
                 logger.info(f"Removed {color.n_green(package.title)} ({package.repository})")
+                removed = True
+
+        if removed:
+            # the trash is emptied by a detached process, so the removal doesn't block the terminal
+            run_cmd([sys.executable, "-m", "mmpm.entrypoint", self.name, "--gc"], background=True)
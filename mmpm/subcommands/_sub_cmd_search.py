@@ -49,6 +49,28 @@ class Search(SubCmd):
             dest="exclude_installed",
         )
 
+        self.parser.add_argument(
+            "--sort",
+            choices=["stars", "updated"],
+            help=f"sort packages by the most stars or most recent update, using metadata collected by `{self.app_name} db --enrich`",
+            dest="sort",
+        )
+
+        self.parser.add_argument(
+            "--min-stars",
+            type=int,
+            help="only show packages with at least this many stars",
+            dest="min_stars",
+        )
+
+        self.parser.add_argument(
+            "--updated-within",
+            type=int,
+            metavar="DAYS",
+            help="only show packages updated within this many days",
+            dest="updated_within",
+        )
+
     def exec(self, args, extra):
         if not extra:
             logger.error(f"No arguments provided. See '{self.app_name} {self.name} --help'")
@@ -62,6 +84,7 @@ class Search(SubCmd):
             self.database.load()
 
         results = self.database.search(extra[0], case_sensitive=args.case_sensitive, title_only=args.title_only)
+        results = self.database.select(results, sort=args.sort, min_stars=args.min_stars, updated_within=args.updated_within)
 
         if not results:
             logger.error(f"No results found for '{extra[0]}'")
@@ -3,7 +3,8 @@
 
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
-from mmpm.magicmirror.package import RemotePackage
+from mmpm.magicmirror.package import RemotePackage, fetch_remote_details
+from mmpm.subcommands.completers import packages
 from mmpm.subcommands.sub_cmd import SubCmd
 
 logger = MMPMLogFactory.get_logger(__name__)
@@ -35,7 +36,16 @@ class Show(SubCmd):
             dest="remote",
         )
 
+        self.parser.add_argument(
+            "packages",
+            nargs="*",
+            metavar="package",
+            help="the title(s) of the package(s) to show",
+        ).completer = packages
+
     def exec(self, args, extra):
+        extra = args.packages + extra  # the package names, followed by any unrecognized arguments
+
         if not extra:
             logger.error(f"No arguments provided. See '{self.app_name} {self.name} --help'")
 
@@ -51,12 +61,20 @@ class Show(SubCmd):
                 elif status["warning"]:
                     logger.warning(status["warning"])
 
+        matches = []
+
         for query in extra:
             results = self.database.search(query, title_only=True)
 
             if not results:
                 logger.error(f"No results found for '{query}'")
 
-            for package in results:
-                logger.debug(f"Showing information for {package}")
-                package.display(remote=args.remote, detailed=True)
+            matches.extend(results)
+
+        if args.remote and len(matches) > 1:
+            # retrieve the details of all packages concurrently up front, so displaying them only reads the cache
+            fetch_remote_details(matches)
+
+        for package in matches:
+            logger.debug(f"Showing information for {package}")
+            package.display(remote=args.remote, detailed=True)
@@ -2,6 +2,7 @@
 """ Command line options for 'update' subcommand """
 
 import mmpm.utils
+from mmpm.constants import color
 from mmpm.log.factory import MMPMLogFactory
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.magicmirror import MagicMirror
@@ -23,25 +24,97 @@ class Update(SubCmd):
         self.app_name = app_name
         self.name = "update"
         self.help = "Check for updates for installed packages, MMPM, and MagicMirror"
-        self.usage = f"{self.app_name} {self.name}"
+        self.usage = f"{self.app_name} {self.name} [--<option(s)>]"
         self.magicmirror = MagicMirror()
         self.database = MagicMirrorDatabase()
 
     def register(self, subparser):
         self.parser = subparser.add_parser(self.name, usage=self.usage, help=self.help)
 
+        self.parser.add_argument(
+            "-p",
+            "--prefetch",
+            action="store_true",
+            default=False,
+            help="download available upgrades in the background, so `mmpm upgrade` only needs to apply them",
+            dest="prefetch",
+        )
+
+        self.parser.add_argument(
+            "-d",
+            "--deadline",
+            type=float,
+            default=60.0,
+            metavar="SECONDS",
+            help="maximum time to wait for the database, MMPM, and MagicMirror checks, which run concurrently (default: %(default)s)",
+            dest="deadline",
+        )
+
+        self.parser.add_argument(
+            "-m",
+            "--max-age",
+            type=float,
+            default=15 * 60.0,
+            metavar="SECONDS",
+            help="skip packages checked within this many seconds, unless they were modified since (default: %(default)s)",
+            dest="max_age",
+        )
+
+        self.parser.add_argument(
+            "-o",
+            "--only",
+            nargs="+",
+            metavar="PACKAGE",
+            help="only check the given packages for updates",
+            dest="only",
+        )
+
+        self.parser.add_argument(
+            "-f",
+            "--force",
+            action="store_true",
+            default=False,
+            help="check every package for updates, regardless of when it was last checked",
+            dest="force",
+        )
+
     def exec(self, args, extra):
         if extra:
             logger.error(f"Extra arguments are not accepted. See '{self.app_name} {self.name} --help'")
             return
 
-        self.database.load(update=True)
+        phases = mmpm.utils.run_phases(
+            {
+                "database": lambda token: self.database.load(update=True, token=token),
+                "mmpm": mmpm.utils.update_available,
+                "MagicMirror": lambda token: self.magicmirror.update(token=token),
+            },
+            deadline=args.deadline,
+        )
+
+        for name, phase in phases.items():
+            status = "timed out" if phase["timed_out"] else "done" if phase["completed"] else "failed"
+            logger.debug(f"Update phase '{name}' {status} after {phase['seconds']:.2f}s")
+            print(f"{color.n_cyan(name)}: {status} ({phase['seconds']:.2f}s)")
+
+        can_upgrade_mmpm = bool(phases["mmpm"]["result"])
+        can_upgrade_magicmirror = bool(phases["MagicMirror"]["result"])
+
+        if not phases["database"]["completed"]:
+            logger.error("Unable to refresh the database, skipping update checks of installed packages")
+
+            for name, can_upgrade in (("mmpm", can_upgrade_mmpm), ("MagicMirror", can_upgrade_magicmirror)):
+                if can_upgrade:
+                    print(f"An upgrade of {name} is available")
+
+            return
 
-        can_upgrade_mmpm = mmpm.utils.update_available()
-        can_upgrade_magicmirror = self.magicmirror.update()
         available_upgrades = self.database.update(
             can_upgrade_mmpm=can_upgrade_mmpm,
             can_upgrade_magicmirror=can_upgrade_magicmirror,
+            prefetch=args.prefetch,
+            max_age=None if args.force else args.max_age,
+            only=args.only,
         )
 
         if not available_upgrades:
@@ -4,12 +4,14 @@ import json
 from typing import List
 
 from mmpm import utils
-from mmpm.constants import paths
+from mmpm.constants import color, paths
 from mmpm.env import MMPMEnv
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.magicmirror.controller import MagicMirrorController
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.magicmirror import MagicMirror
-from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.magicmirror.package import MagicMirrorPackage, blue_green_upgrade
+from mmpm.subcommands.completers import installed_packages
 from mmpm.subcommands.sub_cmd import SubCmd
 
 logger = MMPMLogFactory.get_logger(__name__)
@@ -22,15 +24,17 @@ class Upgrade(SubCmd):
     Custom Attributes:
         database (MagicMirrorDatabase): An instance of the MagicMirrorDatabase class for managing the database.
         magicmirror (MagicMirror): An instance of the MagicMirror object (similar to a MagicMirrorPackage)
+        controller (MagicMirrorController): An instance of the MagicMirrorController for restarting MagicMirror
     """
 
     def __init__(self, app_name):
         self.app_name = app_name
         self.name = "upgrade"
         self.help = "Upgrade packages, MMPM, and/or MagicMirror"
-        self.usage = f"{self.app_name} {self.name} <package(s)> [--yes]"
+        self.usage = f"{self.app_name} {self.name} <package(s)> [--yes] [--blue-green]"
         self.database = MagicMirrorDatabase()
         self.magicmirror = MagicMirror()
+        self.controller = MagicMirrorController()
         self.env = MMPMEnv()
 
     def register(self, subparser):
@@ -54,10 +58,49 @@ class Upgrade(SubCmd):
             dest="force",
         )
 
+        self.parser.add_argument(
+            "-b",
+            "--blue-green",
+            action="store_true",
+            default=False,
+            help="build upgraded packages next to the live ones, then swap them in with a single restart of MagicMirror",
+            dest="blue_green",
+        )
+
+        self.parser.add_argument(
+            "-r",
+            "--rollback",
+            action="store_true",
+            default=False,
+            help="restore the version of the package(s) kept from before their last upgrade or installation",
+            dest="rollback",
+        )
+
+        self.parser.add_argument(
+            "packages",
+            nargs="*",
+            metavar="package",
+            help="the title(s) of the package(s) to roll back (used with --rollback)",
+        ).completer = installed_packages
+
     def exec(self, args, extra):
+        extra = args.packages + extra  # the package names, followed by any unrecognized arguments
+
         if not self.database.is_initialized():
             self.database.load()
 
+        if args.rollback:
+            if not extra:
+                logger.error(f"No packages provided to roll back. See '{self.app_name} {self.name} --help'")
+                return
+
+            for name in extra:
+                for package in [pkg for pkg in self.database.packages if pkg.is_installed and pkg.title == name]:
+                    if package.rollback():
+                        logger.info(f"Rolled back {color.n_green(package.title)}")
+
+            return
+
         upgradable = self.database.upgradable()
         packages_to_upgrade: List[MagicMirrorPackage] = []
 
@@ -73,7 +116,20 @@ class Upgrade(SubCmd):
 
         if upgradable["packages"]:
             packages = {MagicMirrorPackage(**package) for package in upgradable["packages"]}
-            packages_to_upgrade.extend(filter(lambda pkg: pkg.upgrade(), packages))
+
+            if args.blue_green:
+                restart = self.controller.restart
+
+                if self.env.MMPM_IS_DOCKER_IMAGE.get():
+                    logger.warning("Cannot restart MagicMirror from within a Docker image. Restart MagicMirror for the changes to take effect")
+                    restart = None
+
+                upgraded, downtime = blue_green_upgrade(packages, restart)
+                packages_to_upgrade.extend(upgraded)
+                print(f"Upgraded {len(upgraded)} package(s). MagicMirror was down for {downtime:.2f}s")
+            else:
+                packages_to_upgrade.extend(filter(lambda pkg: pkg.upgrade(), packages))
+
             upgradable["packages"] = [package.serialize() for package in (packages - set(packages_to_upgrade))]
 
         upgradable["MagicMirror"] = upgradable["MagicMirror"] and self.magicmirror.upgrade()
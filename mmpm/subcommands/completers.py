@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Shell completers for package names, used by argcomplete. They only read the completion index written by
+MagicMirrorDatabase.load (MMPM_COMPLETION_INDEX_FILE), so completing a package name never imports or loads the
+database.
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List
+
+from mmpm.constants import paths
+
+
+def __read_index__() -> Dict[str, Any]:
+    """
+    Reads the completion index.
+
+    Parameters:
+        None
+
+    Returns:
+        Dict[str, Any]: the index, or an empty dictionary if it hasn't been written yet
+    """
+
+    try:
+        with open(paths.MMPM_COMPLETION_INDEX_FILE, "r", encoding="utf-8") as index:
+            contents = json.load(index)
+    except (OSError, ValueError):
+        return {}
+
+    return contents if isinstance(contents, dict) else {}
+
+
+def __installed__(index: Dict[str, Any]) -> List[str]:
+    """
+    Returns the titles of the installed packages. When the modules directory changed since the index was written,
+    the packages whose directory exists are considered installed, rather than waiting for the index to be rewritten.
+
+    Parameters:
+        index (Dict[str, Any]): the completion index
+
+    Returns:
+        List[str]: the titles of the installed packages
+    """
+
+    try:
+        modules_mtime = os.stat(index["modules"]).st_mtime
+    except (KeyError, OSError):
+        return []
+
+    if modules_mtime == index.get("modules_mtime"):
+        return [str(title) for title in index.get("installed", [])]
+
+    directories = set(os.listdir(index["modules"]))
+    return [title for title, directory in index.get("packages", {}).items() if directory in directories]
+
+
+def packages(prefix: str, **kwargs) -> List[str]:  # pylint: disable=unused-argument
+    """
+    Completes the titles of all packages.
+
+    Parameters:
+        prefix (str): the text being completed
+
+    Returns:
+        List[str]: the matching titles
+    """
+
+    return [title for title in __read_index__().get("packages", {}) if title.startswith(prefix)]
+
+
+def installed_packages(prefix: str, **kwargs) -> List[str]:  # pylint: disable=unused-argument
+    """
+    Completes the titles of the installed packages.
+
+    Parameters:
+        prefix (str): the text being completed
+
+    Returns:
+        List[str]: the matching titles
+    """
+
+    return [title for title in __installed__(__read_index__()) if title.startswith(prefix)]
+
+
+def available_packages(prefix: str, **kwargs) -> List[str]:  # pylint: disable=unused-argument
+    """
+    Completes the titles of the packages that aren't installed.
+
+    Parameters:
+        prefix (str): the text being completed
+
+    Returns:
+        List[str]: the matching titles
+    """
+
+    index = __read_index__()
+    installed = set(__installed__(index))
+
+    return [title for title in index.get("packages", {}) if title.startswith(prefix) and title not in installed]
+
+
+# the package name completer of each subcommand taking package names
+PACKAGE_COMPLETERS: Dict[str, Callable[..., List[str]]] = {
+    "install": available_packages,
+    "remove": installed_packages,
+    "show": packages,
+    "upgrade": installed_packages,
+}
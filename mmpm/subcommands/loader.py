@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
+import os
+import shlex
+import sys
 from importlib import import_module
 from pkgutil import iter_modules
-from typing import Dict
+from typing import Callable, Dict, List, Optional, Tuple, Type, cast
 
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.subcommands.sub_cmd import SubCmd
 
 logger = MMPMLogFactory.get_logger(__name__)
 
@@ -73,3 +77,149 @@ class Loader:
                     logger.error(f"Failed to load subcommand module: {error}")
 
         return objects
+
+
+class LazyLoader:
+    """
+    This class registers subcommands from a static manifest, so the top-level parser can be built without
+    importing every subcommand module. Only the module of the subcommand being invoked (or completed) is
+    imported, instantiated, and has its options registered; the others get a placeholder parser holding
+    their name and help text, which is all `--help` and subcommand name completion need. When completing a
+    package name, the invoked subcommand isn't imported either, since its completer is enough.
+
+    Attributes:
+        objects (Dict[str, SubCmd]): A dictionary holding the loaded subcommands with their names as keys.
+
+    Args:
+        manifest (Dict[str, Tuple[str, str, str]]): The subcommand names, mapped to their module, class, and help text.
+        module_name (str): The name of the module containing the subcommand modules.
+        app_name (str): The name of the app, used to instantiate the objects and format the help text.
+        completers (Dict[str, Callable], optional): The package name completers of the subcommands taking package names.
+    """
+
+    def __init__(
+        self,
+        manifest: Dict[str, Tuple[str, str, str]],
+        module_name: str,
+        app_name: str,
+        completers: Optional[Dict[str, Callable[..., List[str]]]] = None,
+    ):
+        self.manifest = manifest
+        self.module_name = module_name
+        self.app_name = app_name
+        self.completers = completers or {}
+        self.objects: Dict[str, SubCmd] = {}
+
+    @staticmethod
+    def argv() -> List[str]:
+        """
+        Returns the arguments of the current invocation. When called by argcomplete, the arguments are
+        taken from the line being completed, up to the cursor.
+
+        Parameters:
+            None
+
+        Returns:
+            List[str]: the arguments, excluding the name of the program
+        """
+
+        if "_ARGCOMPLETE" not in os.environ:
+            return sys.argv[1:]
+
+        line = os.environ.get("COMP_LINE", "")
+        line = line[: int(os.environ.get("COMP_POINT", len(line)))]
+
+        try:
+            return shlex.split(line)[1:]
+        except ValueError:  # unterminated quotes while the user is still typing
+            return line.split()[1:]
+
+    @staticmethod
+    def completing() -> Optional[str]:
+        """
+        Returns the word being completed when called by argcomplete.
+
+        Parameters:
+            None
+
+        Returns:
+            Optional[str]: the word under the cursor, which is empty after a space, or None when not completing
+        """
+
+        if "_ARGCOMPLETE" not in os.environ:
+            return None
+
+        line = os.environ.get("COMP_LINE", "")
+        line = line[: int(os.environ.get("COMP_POINT", len(line)))]
+
+        return "" if not line or line[-1].isspace() else line.split()[-1]
+
+    def invoked(self, argv: List[str]) -> Optional[str]:
+        """
+        Finds the subcommand being invoked, which is the first positional argument.
+
+        Parameters:
+            argv (List[str]): the arguments of the current invocation
+
+        Returns:
+            Optional[str]: the name of the subcommand, or None if no known subcommand is given
+        """
+
+        for arg in argv:
+            if not arg.startswith("-"):
+                return arg if arg in self.manifest else None
+
+        return None
+
+    def load(self, name: str) -> Optional[SubCmd]:
+        """
+        Imports and instantiates a single subcommand.
+
+        Parameters:
+            name (str): the name of the subcommand
+
+        Returns:
+            Optional[SubCmd]: the subcommand, or None if it failed to load
+        """
+
+        module, class_name, _ = self.manifest[name]
+
+        try:
+            subcommand = cast(Type[SubCmd], getattr(import_module(f"{self.module_name}.{module}"), class_name))
+            instance = subcommand(self.app_name)
+        except (AttributeError, AssertionError, Exception) as error:
+            logger.error(f"Failed to load subcommand module: {error}")
+            return None
+
+        self.objects[instance.name] = instance
+        return instance
+
+    def register(self, subparser, argv: Optional[List[str]] = None) -> None:
+        """
+        Registers every subcommand of the manifest with the subparser, in order. The invoked subcommand
+        registers all of its options, while the rest only get a placeholder parser. When completing a package name
+        of the invoked subcommand, it gets a placeholder parser with its package name completer instead.
+
+        Parameters:
+            subparser (argparse._SubParsersAction): the subparser of the main parser
+            argv (Optional[List[str]]): the arguments of the current invocation, defaults to LazyLoader.argv()
+
+        Returns:
+            None
+        """
+
+        invoked = self.invoked(self.argv() if argv is None else argv)
+        word = self.completing()
+        completing_package = invoked in self.completers and word is not None and not word.startswith("-")
+
+        for name, (_, _, help_text) in self.manifest.items():
+            subcommand = self.load(name) if name == invoked and not completing_package else None
+
+            if subcommand is not None:
+                subcommand.register(subparser)
+                continue
+
+            parser = subparser.add_parser(name, help=help_text.format(app_name=self.app_name))
+
+            if name == invoked and completing_package:
+                parser.add_argument("packages", nargs="*").completer = self.completers[name]
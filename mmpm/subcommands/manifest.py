@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Static manifest of the CLI subcommands, used to build the top-level parser without importing every
+subcommand module. Each entry maps the name of a subcommand to the module and class implementing it,
+along with the help text shown by `mmpm --help` ('{app_name}' is replaced by the name of the app).
+
+When adding, renaming, or removing a subcommand, update this manifest to match.
+"""
+
+from typing import Dict, Tuple
+
+SUBCOMMANDS: Dict[str, Tuple[str, str, str]] = {
+    "completion": ("_sub_cmd_completion", "Completion", "Generate commands to enable autocompletion for {app_name}"),
+    "daemon": ("_sub_cmd_daemon", "Daemon", "Run the {app_name} daemon, which answers search, list, and show queries from memory"),
+    "db": ("_sub_cmd_db", "Db", "Display database metadata, or display raw database contents"),
+    "env": ("_sub_cmd_env", "Env", "Display the env environment variables and their value(s)"),
+    "guided-setup": ("_sub_cmd_guided_setup", "GuidedSetup", "Interactively setup {app_name} and its features"),
+    "install": ("_sub_cmd_install", "Install", "Install MagicMirror packages"),
+    "list": ("_sub_cmd_list", "List", "List items such as installed packages, packages available, available upgrades, etc"),
+    "logs": ("_sub_cmd_logs", "Logs", "Display, tail, or zip the {app_name} log files"),
+    "mm-ctl": ("_sub_cmd_mm_ctl", "MmCtl", "Commands to interact with/control MagicMirror"),
+    "mm-pkg": (
+        "_sub_cmd_mm_pkg",
+        "MmPkg",
+        "Manually add/remove custom MagicMirror packages in your local database (similar to add-apt-repository)",
+    ),
+    "open": ("_sub_cmd_open", "Open", "Open config files, documentation, wikis, and MagicMirror itself"),
+    "remove": ("_sub_cmd_remove", "Remove", "Remove installed MagicMirror packages"),
+    "search": ("_sub_cmd_search", "Search", "Search for MagicMirror packages"),
+    "show": ("_sub_cmd_show", "Show", "Show details about one or more packages"),
+    "ui": ("_sub_cmd_ui", "Ui", "Interact with the {app_name} UI "),
+    "update": ("_sub_cmd_update", "Update", "Check for updates for installed packages, MMPM, and MagicMirror"),
+    "upgrade": ("_sub_cmd_upgrade", "Upgrade", "Upgrade packages, MMPM, and/or MagicMirror"),
+    "version": ("_sub_cmd_version", "Version", "Display {app_name} application version"),
+}
@@ -1,12 +1,16 @@
 #!/usr/bin/env python3
 import json
 import os
+import random
+import resource
 import socket
 import subprocess
 import time
-import urllib.request
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import List, Tuple
+from threading import BoundedSemaphore, Event, Lock, Thread, Timer
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
 
 import git
 import requests
@@ -17,21 +21,150 @@ from yaspin import yaspin
 from yaspin.spinners import Spinners
 
 from mmpm.__version__ import version as current_version
-from mmpm.constants import color
+from mmpm.constants import color, paths
 from mmpm.log.factory import MMPMLogFactory
+from mmpm.singleton import Singleton
 
 logger = MMPMLogFactory.get_logger(__name__)
 
 
-def repo_up_to_date(path: Path):
+class TokenBucket:
     """
-    Checks if the Git repository at the given path is up-to-date with its remote origin.
+    A token bucket rate limiter. Tokens are added at `rate` per second, up to `capacity`, and every
+    operation consumes one, so bursts of up to `capacity` operations are allowed, but the sustained
+    rate never exceeds `rate` per second.
+
+    Attributes:
+        rate (float): the number of tokens added per second
+        capacity (float): the maximum number of tokens
+        tokens (float): the number of tokens currently available
+
+    Methods:
+        acquire(): Blocks until a token is available, and consumes it
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate: float = rate
+        self.capacity: float = capacity
+        self.tokens: float = capacity
+        self.__updated: float = time.monotonic()
+        self.__lock = Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.__lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.__updated) * self.rate)
+                self.__updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                delay = (1 - self.tokens) / self.rate
+
+            time.sleep(delay)
+
+
+class HostScheduler(Singleton):
+    """
+    Schedules outbound git and API traffic by remote host. Each host has a cap on concurrent operations
+    and a TokenBucket limiting their rate, so many operations against one host (ie. GitHub) don't trip
+    its secondary rate limits, while operations against other hosts proceed independently. The queue
+    depth and wait time of every operation are logged.
+
+    Attributes:
+        LIMITS (Dict[str, Tuple[int, float, float]]): the concurrency, rate, and burst capacity of known hosts
+        DEFAULT_LIMITS (Tuple[int, float, float]): the concurrency, rate, and burst capacity of other hosts
+
+    Methods:
+        slot(url): Context manager which waits for, and holds, a slot for an operation against the host of a URL
+    """
+
+    LIMITS: Dict[str, Tuple[int, float, float]] = {
+        "github.com": (4, 2.0, 8),
+        "api.github.com": (4, 1.0, 10),
+        "gitlab.com": (4, 2.0, 8),
+        "bitbucket.org": (4, 2.0, 8),
+        "api.bitbucket.org": (4, 1.0, 10),
+    }
+
+    DEFAULT_LIMITS: Tuple[int, float, float] = (8, 10.0, 20)
+
+    def __init__(self):
+        self.__hosts: Dict[str, Tuple[BoundedSemaphore, TokenBucket]] = {}
+        self.__queued: Dict[str, int] = {}
+        self.__lock = Lock()
+
+    @staticmethod
+    def host(url: str) -> str:
+        """
+        Extracts the host of a URL, including scp-like git URLs (ie. git@github.com:user/repo.git).
+
+        Parameters:
+            url (str): the URL
+
+        Returns:
+            str: the host, in lowercase
+        """
+
+        if "://" in url:
+            return (urlparse(url).hostname or "").lower()
+
+        if "@" in url and ":" in url:
+            return url.split("@", 1)[1].split(":", 1)[0].lower()
+
+        return url.lower()
+
+    @contextmanager
+    def slot(self, url: str):
+        host = self.host(url)
+
+        with self.__lock:
+            if host not in self.__hosts:
+                concurrency, rate, capacity = self.LIMITS.get(host, self.DEFAULT_LIMITS)
+                self.__hosts[host] = (BoundedSemaphore(concurrency), TokenBucket(rate, capacity))
+
+            semaphore, bucket = self.__hosts[host]
+            self.__queued[host] = self.__queued.get(host, 0) + 1
+            queue_depth = self.__queued[host]
+
+        started = time.monotonic()
+        semaphore.acquire()
+
+        try:
+            bucket.acquire()
+        except BaseException:
+            semaphore.release()
+            raise
+        finally:
+            with self.__lock:
+                self.__queued[host] -= 1
+
+        waited = time.monotonic() - started
+        logger.debug(
+            f"Scheduled operation against {host} after waiting {waited:.3f}s (queue depth {queue_depth})",
+            extra={"metrics": {"host": host, "queue_depth": queue_depth, "wait_seconds": round(waited, 3)}},
+        )
+
+        try:
+            yield
+        finally:
+            semaphore.release()
+
+
+def repo_heads(path: Path, fetch: bool = True, token: Optional["CancellationToken"] = None) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Retrieves the commit SHAs of the local HEAD and the remote origin HEAD of the Git repository at the given path.
+    The fetch is killed after GIT_TIMEOUT seconds, or as soon as the token is cancelled.
 
     Parameters:
         path (Path): The file system path to the Git repository.
+        fetch (bool): If True, the remote is fetched first, otherwise only the local HEAD is read.
+        token (Optional[CancellationToken]): A token which kills the fetch when cancelled.
 
     Returns:
-        bool: True if the local repository is up-to-date, False otherwise.
+        Tuple[Optional[str], Optional[str]]: The local and remote SHAs, either of which is None if it could not be determined.
     """
 
     try:
@@ -40,23 +173,45 @@ def repo_up_to_date(path: Path):
         # Ensure the repository is not bare (unlikely, but still should check)
         if repo.bare:
             logger.error(f"Repository in {path} is bare. Cannot determine if out-of-date.")
-            return False
+            return None, None
+
+        local_commit = repo.head.commit
+
+        if not fetch:
+            return local_commit.hexsha, None
 
         logger.debug(f"Fetching information for repo found in '{path}'")
-        remote = repo.remotes.origin
-        remote.fetch()
 
-        # Get local and remote HEAD commit
-        local_commit = repo.head.commit
+        with HostScheduler().slot(repo.remotes.origin.url):
+            error_code, _, stderr = run_cmd(["git", "-C", str(path), "fetch", "origin"], progress=False, timeout=GIT_TIMEOUT, token=token)
+
+        if error_code:
+            logger.error(f"Failed to fetch the repo located at {path}: {stderr}")
+            return None, None
+
         remote_commit = repo.refs["origin/HEAD"].commit  # type: ignore
 
         logger.debug(f"SHAs found in '{path}' -- local={local_commit.hexsha} & remote={remote_commit.hexsha}")
-
-        remote = repo.remotes.origin
-        return local_commit.hexsha != remote_commit.hexsha
+        return local_commit.hexsha, remote_commit.hexsha
     except Exception as error:
         logger.error(f"Failed to get status of repo located at {path}: {error}")
-        return False
+        return None, None
+
+
+def repo_up_to_date(path: Path, token: Optional["CancellationToken"] = None):
+    """
+    Checks if the Git repository at the given path is up-to-date with its remote origin.
+
+    Parameters:
+        path (Path): The file system path to the Git repository.
+        token (Optional[CancellationToken]): A token which kills the fetch when cancelled.
+
+    Returns:
+        bool: True if the local repository is out-of-date, False otherwise.
+    """
+
+    local, remote = repo_heads(path, token=token)
+    return local is not None and remote is not None and local != remote
 
 
 def get_host_ip() -> str:
@@ -85,15 +240,188 @@ def get_host_ip() -> str:
     return address
 
 
-def run_cmd(command: List[str], progress=True, background=False, message: str = "") -> Tuple[int, str, str]:
+class CancellationToken:
+    """
+    A token used to cancel commands started with `run_cmd` from another thread, such as an API request.
+    Cancelling the token kills every command it was passed to that is still running.
+
+    Attributes:
+        cancelled (bool): True once the token has been cancelled
+
+    Methods:
+        cancel(): Cancels the token, killing the commands it was passed to
+        subscribe(callback): Registers a callback to run when the token is cancelled
+        unsubscribe(callback): Removes a previously registered callback
+    """
+
+    __slots__ = "cancelled", "__callbacks", "__lock"
+
+    def __init__(self):
+        self.cancelled: bool = False
+        self.__callbacks: List[Callable[[], None]] = []
+        self.__lock = Lock()
+
+    def cancel(self) -> None:
+        with self.__lock:
+            self.cancelled = True
+            callbacks = list(self.__callbacks)
+
+        for callback in callbacks:
+            callback()
+
+    def subscribe(self, callback: Callable[[], None]) -> None:
+        with self.__lock:
+            if not self.cancelled:
+                self.__callbacks.append(callback)
+                return
+
+        callback()  # the token was cancelled before the callback was registered
+
+    def unsubscribe(self, callback: Callable[[], None]) -> None:
+        with self.__lock:
+            if callback in self.__callbacks:
+                self.__callbacks.remove(callback)
+
+
+# the number of seconds after which run_cmd kills git commands, and the build commands of packages
+GIT_TIMEOUT: float = 10 * 60
+BUILD_TIMEOUT: float = 30 * 60
+
+# the tokens of the operations currently running, such as an install requested through the API, keyed by id,
+# along with the number of operations sharing each id
+__operations__: Dict[str, Tuple[CancellationToken, int]] = {}
+__operations_lock__ = Lock()
+
+
+def __exit_code__(status: int) -> int:
+    """
+    Converts a wait status into a return code, matching the convention of subprocess.Popen.returncode.
+
+    Parameters:
+        status (int): the status returned by os.wait4
+
+    Returns:
+        int: the exit code of the process, or the negated signal number if it was killed
+    """
+    return -os.WTERMSIG(status) if os.WIFSIGNALED(status) else os.WEXITSTATUS(status)
+
+
+def __wait__(process: subprocess.Popen, reaping: Lock) -> Dict[str, Any]:
+    """
+    Blocks until the process exits, without polling, and collects its resource usage. The process is
+    only reaped while holding `reaping`, so a concurrent kill holding the same lock can check
+    `process.returncode` to know whether its pid still belongs to the process.
+
+    When the subprocess module is patched by gevent (ie. within the API), the child is reaped
+    by gevent itself. In that case, CPU time is derived from the usage of all children of this
+    process, and the peak RSS is unavailable.
+
+    Parameters:
+        process (subprocess.Popen): the running process
+        reaping (Lock): the lock held while reaping the process
+
+    Returns:
+        Dict[str, Any]: the CPU time (in seconds) and peak RSS (in kilobytes) of the process
+    """
+
+    if subprocess.Popen.__module__ == "subprocess":
+        try:
+            if hasattr(os, "waitid"):
+                # wait for the exit, leaving the process a zombie, so its pid can't be reused before it's reaped below
+                os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+
+            with reaping:
+                _, status, usage = os.wait4(process.pid, 0)
+                process.returncode = __exit_code__(status)
+
+            return {"cpu_user": usage.ru_utime, "cpu_system": usage.ru_stime, "max_rss_kb": usage.ru_maxrss}
+        except ChildProcessError:
+            logger.debug(f"Process {process.pid} was already reaped, unable to collect its resource usage")
+
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    process.wait()
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    return {"cpu_user": after.ru_utime - before.ru_utime, "cpu_system": after.ru_stime - before.ru_stime, "max_rss_kb": None}
+
+
+@contextmanager
+def operation(operation_id: Optional[str] = None) -> Iterator[CancellationToken]:
+    """
+    Creates the cancellation token of an operation, such as an install requested through the API, which is
+    passed to the commands it runs. While the operation runs, it can be cancelled by id with `cancel_operation`.
+    Operations running at the same time with the same id share their token, so they're cancelled together.
+
+    Parameters:
+        operation_id (Optional[str]): the id the operation is cancelled with. If None, it can't be cancelled by id.
+
+    Returns:
+        Iterator[CancellationToken]: the token of the operation
+    """
+
+    if operation_id is None:
+        yield CancellationToken()
+        return
+
+    with __operations_lock__:
+        token, count = __operations__.get(operation_id, (CancellationToken(), 0))
+        __operations__[operation_id] = (token, count + 1)
+
+    try:
+        yield token
+    finally:
+        with __operations_lock__:
+            token, count = __operations__[operation_id]
+
+            if count > 1:
+                __operations__[operation_id] = (token, count - 1)
+            else:
+                del __operations__[operation_id]
+
+
+def cancel_operation(operation_id: str) -> bool:
+    """
+    Cancels a running operation, killing the commands it's running, and keeping it from starting others.
+
+    Parameters:
+        operation_id (str): the id the operation was started with
+
+    Returns:
+        bool: True if the operation was running, False otherwise.
+    """
+
+    with __operations_lock__:
+        token, _ = __operations__.get(operation_id, (None, 0))
+
+    if token is None:
+        logger.debug(f"No running operation '{operation_id}' to cancel")
+        return False
+
+    logger.warning(f"Cancelling operation '{operation_id}'")
+    token.cancel()
+    return True
+
+
+# pylint: disable=too-many-locals
+def run_cmd(
+    command: List[str],
+    progress=True,
+    background=False,
+    message: str = "",
+    timeout: Optional[float] = None,
+    token: Optional[CancellationToken] = None,
+) -> Tuple[int, str, str]:
     """
-    Executes a shell command and captures its output and errors.
+    Executes a shell command and captures its output and errors. The wall time, CPU time, and peak
+    RSS of the command are written to the log file once it exits.
 
     Parameters:
         command (List[str]): The command and its arguments to be executed.
         progress (bool): If True, displays a spinner during command execution.
         background (bool): If True, runs the command in the background.
         message (str): The message to display alongside the spinner.
+        timeout (Optional[float]): The number of seconds after which the command is killed.
+        token (Optional[CancellationToken]): A token which kills the command when cancelled.
 
     Returns:
         Tuple[int, str, str]: A tuple containing the command's return code, standard output, and standard error.
@@ -110,17 +438,135 @@ def run_cmd(command: List[str], progress=True, background=False, message: str =
 
     logger.debug(f'Executing command `{" ".join(command)}`')
 
+    started = time.monotonic()
+    expired = Event()
+    output: Dict[str, bytes] = {}
+
+    reaping = Lock()
+
     with subprocess.Popen(command, stderr=subprocess.PIPE, stdout=subprocess.PIPE) as process:
-        if progress:
-            with yaspin(text=message, color="green") as spinner:
-                spinner.spinner = Spinners.bouncingBar
 
-                while process.poll() is None:
-                    time.sleep(0.1)
+        def kill():
+            with reaping:
+                if process.returncode is not None:
+                    return  # the process was reaped already, and its pid may belong to another one
+
+                try:
+                    process.kill()
+                except OSError:
+                    pass  # the process exited already
+
+        def expire():
+            expired.set()
+            kill()
+
+        def read(name: str, pipe):
+            output[name] = pipe.read()
+
+        # the pipes are drained on separate threads, so a chatty command can't fill them up and stall
+        readers = [Thread(target=read, args=(name, pipe), daemon=True) for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))]
+        timer = Timer(timeout, expire) if timeout else None
+
+        for thread in readers + ([timer] if timer else []):
+            thread.start()
+
+        if token:
+            token.subscribe(kill)
+
+        try:
+            with yaspin(text=message, color="green", spinner=Spinners.bouncingBar) if progress else nullcontext():
+                usage = __wait__(process, reaping)
+        finally:
+            if timer:
+                timer.cancel()
+
+            if token:
+                token.unsubscribe(kill)
+
+        for thread in readers:
+            thread.join()
+
+    stdout = output.get("stdout", b"").decode("utf-8")
+    stderr = output.get("stderr", b"").decode("utf-8")
+
+    if expired.is_set():
+        stderr += f"\nCommand `{' '.join(command)}` timed out after {timeout}s"
+    elif token and token.cancelled:
+        stderr += f"\nCommand `{' '.join(command)}` was cancelled"
+
+    metrics = {
+        "command": command,
+        "returncode": process.returncode,
+        "wall_time": round(time.monotonic() - started, 3),
+        "timed_out": expired.is_set(),
+        "cancelled": bool(token and token.cancelled),
+        **usage,
+    }
+
+    logger.debug(f"Command `{' '.join(command)}` exited with {process.returncode} after {metrics['wall_time']}s", extra={"metrics": metrics})
+
+    return process.returncode, stdout, stderr
+
+
+def run_phases(phases: Dict[str, Callable[..., Any]], deadline: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Runs independent phases concurrently, each on its own thread, and waits for all of them until the
+    deadline. Each phase is called with a CancellationToken as its `token` keyword argument. The tokens of
+    phases still running at the deadline are cancelled, which kills the commands they passed the token to,
+    and their results are discarded, so the caller can report partial results. Python threads can't be
+    stopped, so a phase that changes any state must check `token.cancelled` before doing so.
+
+    Parameters:
+        phases (Dict[str, Callable[..., Any]]): the phases to run, keyed by name
+        deadline (float): the maximum number of seconds to wait for all phases combined
+
+    Returns:
+        Dict[str, Dict[str, Any]]: for each phase, its 'result', the 'seconds' it took, whether it 'completed'
+        successfully, and whether it 'timed_out'
+    """
 
-        stdout, stderr = process.communicate()
+    results: Dict[str, Dict[str, Any]] = {name: {"result": None, "seconds": None, "completed": False} for name in phases}
+    tokens = {name: CancellationToken() for name in phases}
+    lock = Lock()
 
-        return process.returncode, stdout.decode("utf-8"), stderr.decode("utf-8")
+    def run(name: str, phase: Callable[..., Any]) -> None:
+        started = time.monotonic()
+
+        try:
+            result, completed = phase(token=tokens[name]), True
+        except Exception as error:  # pylint: disable=broad-except
+            logger.error(f"Update phase '{name}' failed: {error}")
+            result, completed = None, False
+
+        with lock:
+            if tokens[name].cancelled:
+                logger.debug(f"Discarding the result of update phase '{name}', which finished after the deadline")
+                return
+
+            results[name] = {"result": result, "seconds": time.monotonic() - started, "completed": completed}
+
+    end = time.monotonic() + deadline
+    threads = {name: Thread(target=run, args=(name, phase), daemon=True) for name, phase in phases.items()}
+
+    for thread in threads.values():
+        thread.start()
+
+    for thread in threads.values():
+        thread.join(max(0.0, end - time.monotonic()))
+
+    with lock:
+        snapshot = {name: {**result, "timed_out": result["seconds"] is None} for name, result in results.items()}
+
+        for name, result in snapshot.items():
+            if result["timed_out"]:
+                tokens[name].cancel()
+
+    for name, result in snapshot.items():
+        if result["timed_out"]:
+            logger.warning(f"Update phase '{name}' did not finish within {deadline}s, and was cancelled")
+            result["seconds"] = deadline
+
+    return snapshot
 
 
 def get_pids(process_name: str) -> List[str]:
@@ -156,19 +602,176 @@ def kill_pids_of_process(process: str) -> None:
     logger.debug(f"Stopped all processes of type {process}")
 
 
-def safe_get_request(url: str) -> requests.Response:
+class CircuitBreaker:
+    """
+    Tracks consecutive failed requests to a single host. Once `threshold` requests in a row have failed,
+    the circuit opens and requests to the host fail immediately, rather than waiting for a timeout each time.
+    After `cooldown` seconds a single trial request is let through, and a success closes the circuit again.
+
+    Attributes:
+        threshold (int): the number of consecutive failures that opens the circuit
+        cooldown (float): the number of seconds the circuit stays open before a trial request is allowed
+        failures (int): the current number of consecutive failures
+        opened (Optional[float]): the monotonic time the circuit was opened, or None if closed
+
+    Methods:
+        allow(): Returns True if a request to the host may be sent
+        record(success): Records the outcome of a request
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold: int = threshold
+        self.cooldown: float = cooldown
+        self.failures: int = 0
+        self.opened: Optional[float] = None
+        self.__lock = Lock()
+
+    def allow(self) -> bool:
+        with self.__lock:
+            if self.opened is None:
+                return True
+
+            if time.monotonic() - self.opened >= self.cooldown:
+                self.opened = time.monotonic()  # let a single trial request through, and re-arm the cooldown
+                return True
+
+            return False
+
+    def record(self, success: bool) -> None:
+        with self.__lock:
+            if success:
+                self.failures = 0
+                self.opened = None
+            else:
+                self.failures += 1
+
+                if self.failures >= self.threshold:
+                    self.opened = time.monotonic()
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """
+    Raised instead of sending a request to a host whose circuit breaker is open.
+    """
+
+
+class HTTPClient(Singleton):
+    """
+    The HTTP client shared by all outbound requests. Connections are kept alive in a pool per host, failed
+    requests are retried a bounded number of times with jittered exponential backoff, and every host has its
+    own CircuitBreaker, so a slow or dead host fails fast instead of stalling each request for the full timeout.
+
+    Attributes:
+        retries (int): the number of times a failed request is retried
+        backoff (float): the base number of seconds to wait between retries
+        timeout (Tuple[float, float]): the default connect and read timeouts
+        session (requests.Session): the pooled session used to send requests
+        breakers (Dict[str, CircuitBreaker]): the circuit breaker of each host
+
+    Methods:
+        request(method, url): Sends a request, retrying on connection errors and retryable status codes
+        get(url): Sends a GET request
+        head(url): Sends a HEAD request
+    """
+
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, retries: int = 2, backoff: float = 0.5, timeout: Tuple[float, float] = (3.05, 10), pool_size: int = 10):
+        self.retries: int = retries
+        self.backoff: float = backoff
+        self.timeout: Tuple[float, float] = timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.__lock = Lock()
+
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = f"mmpm/{current_version}"
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def __breaker__(self, host: str) -> CircuitBreaker:
+        with self.__lock:
+            if host not in self.breakers:
+                self.breakers[host] = CircuitBreaker()
+
+            return self.breakers[host]
+
+    def request(self, method: str, url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+        """
+        Sends a request through the pooled session. Connection errors, timeouts, and retryable status codes
+        (429 and 5xx) are retried with jittered exponential backoff, and count towards opening the circuit
+        breaker of the host.
+
+        Parameters:
+            method (str): the HTTP method
+            url (str): the URL to send the request to
+            retries (Optional[int]): overrides the number of retries of the client
+            kwargs: additional arguments passed to requests.Session.request
+
+        Returns:
+            requests.Response: the response, which may have a retryable status code if every attempt failed
+
+        Raises:
+            CircuitOpenError: if the circuit breaker of the host is open
+            requests.exceptions.RequestException: if the last attempt failed to connect or timed out
+        """
+
+        host = urlparse(url).netloc
+        breaker = self.__breaker__(host)
+        retries = self.retries if retries is None else retries
+        kwargs.setdefault("timeout", self.timeout)
+
+        for attempt in range(retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Not sending request to {host}, too many recent requests to it have failed")
+
+            try:
+                with HostScheduler().slot(url):
+                    response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                breaker.record(False)
+
+                if attempt == retries:
+                    raise
+
+                logger.debug(f"Attempt {attempt + 1} of {method} {url} failed: {error}")
+            else:
+                if response.status_code not in self.RETRY_STATUS_CODES:
+                    breaker.record(True)
+                    return response
+
+                breaker.record(False)
+
+                if attempt == retries:
+                    return response
+
+                logger.debug(f"Attempt {attempt + 1} of {method} {url} returned {response.status_code}")
+
+            time.sleep(self.backoff * 2**attempt * random.uniform(0.5, 1.5))
+
+        return response  # pragma: no cover
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        return self.request("HEAD", url, **kwargs)
+
+
+def safe_get_request(url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
     """
     Safely performs a GET request to the specified URL, handling any exceptions.
 
     Parameters:
         url (str): The URL to send the GET request to.
+        headers (Optional[Dict[str, str]]): Additional headers to send with the request.
 
     Returns:
         requests.Response: The response from the GET request.
     """
     try:
         logger.debug(f"Creating request for {url}")
-        data = requests.get(url, timeout=10)
+        data = HTTPClient().get(url, headers=headers)
     except requests.exceptions.RequestException as error:
         logger.error(str(error))
         return requests.Response()
@@ -196,25 +799,108 @@ def upgrade() -> bool:
     return True
 
 
-def update_available() -> bool:
+__version_check_lock__ = Lock()
+
+
+def __read_version_check__() -> Optional[Dict[str, Any]]:
     """
-    Checks if an update is available for MMPM on PyPi.
+    Reads the result of the last PyPi version check from the version check file.
 
     Returns:
-        bool: True if an update is available, False otherwise.
+        Optional[Dict[str, Any]]: the 'remote' version and the 'timestamp' it was retrieved, or None if MMPM was never checked
+    """
+
+    try:
+        with open(paths.MMPM_VERSION_CHECK_FILE, "r", encoding="utf-8") as version_check_file:
+            check = json.load(version_check_file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    return check if isinstance(check, dict) and isinstance(check.get("remote"), str) else None
+
+
+def __check_pypi__(timeout: float, quiet: bool = False, token: Optional[CancellationToken] = None) -> Optional[str]:
+    """
+    Retrieves the latest version of MMPM from PyPi, and stores it in the version check file. The file is only
+    written by this function, and replaced atomically, so concurrent checks never leave it partially written.
+
+    Parameters:
+        timeout (float): the maximum number of seconds to wait for PyPi
+        quiet (bool): if True, the request isn't announced on stdout, as when refreshing in the background
+        token (Optional[CancellationToken]): if cancelled before the version is retrieved, the file isn't written
+
+    Returns:
+        Optional[str]: the latest version of MMPM, or None if it could not be retrieved
     """
 
     url = "https://pypi.org/pypi/mmpm/json"
 
     logger.debug("Getting remote version of MMPM from PyPi")
-    print(f"Retrieving: {url} [{color.n_cyan('mmpm')}]")
+
+    if not quiet:
+        print(f"Retrieving: {url} [{color.n_cyan('mmpm')}]")
 
     try:
-        contents = urllib.request.urlopen(url).read()
-        remote_version = json.loads(contents)["info"]["version"]
+        response = HTTPClient().get(url, retries=0, timeout=timeout)
+        response.raise_for_status()
+        remote_version = response.json()["info"]["version"]
         logger.debug(f"Found remote={remote_version} & installed={current_version}")
-    except (json.JSONDecodeError, urllib.error.URLError, Exception) as error:
+    except (json.JSONDecodeError, requests.exceptions.RequestException, KeyError, TypeError) as error:
         logger.error(f"Failed to get remote version of MMPM: {error}")
+        return None
+
+    if not isinstance(remote_version, str):
+        logger.error(f"Failed to get remote version of MMPM: unexpected version {remote_version!r}")
+        return None
+
+    version_check_file = paths.MMPM_VERSION_CHECK_FILE
+    temp_file = version_check_file.with_name(f"{version_check_file.name}.{os.getpid()}.tmp")
+
+    with __version_check_lock__:
+        if token is not None and token.cancelled:
+            logger.debug("Check of the remote version of MMPM was cancelled, not writing the version check file")
+            return None
+
+        try:
+            with open(temp_file, "w", encoding="utf-8") as version_check:
+                json.dump({"remote": remote_version, "timestamp": time.time()}, version_check)
+
+            os.replace(temp_file, version_check_file)
+        except OSError as error:
+            logger.error(f"Failed to write {version_check_file}: {error}")
+
+    return remote_version
+
+
+def update_available(max_age: float = 60 * 60 * 6, timeout: float = 3.0, token: Optional[CancellationToken] = None) -> bool:
+    """
+    Checks if an update is available for MMPM on PyPi. The latest version is stored in its own file, and reused
+    for `max_age` seconds. An older result is still used, while it is refreshed in the background, so only the
+    very first check waits on PyPi, and never for longer than `timeout` seconds.
+
+    Parameters:
+        max_age (float): the number of seconds a previous check is considered fresh
+        timeout (float): the maximum number of seconds to wait for PyPi
+        token (Optional[CancellationToken]): a token cancelling the write of the version checked by this call
+
+    Returns:
+        bool: True if an update is available, False otherwise.
+    """
+
+    check = __read_version_check__()
+
+    if check is None:
+        remote_version = __check_pypi__(timeout, token=token)
+    else:
+        remote_version = check["remote"]
+
+        if time.time() - check.get("timestamp", 0) > max_age:
+            logger.debug("Last check of the remote version of MMPM is stale, refreshing it in the background")
+            # a daemon, so a slow PyPi never keeps the CLI from exiting
+            Thread(target=__check_pypi__, args=(timeout, True), daemon=True).start()
+
+    if remote_version is None:
+        return False
 
     return version.parse(remote_version) > version.parse(current_version)
 
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Runs the offline benchmarks, and optionally compares them with a baseline.
+
+    python -m test.benchmarks --output baseline.json
+    python -m test.benchmarks --compare baseline.json --threshold 0.25
+"""
+
+import json
+import platform
+import sys
+import tempfile
+from argparse import ArgumentParser
+from pathlib import Path
+from test.benchmarks.benchmarks import BENCHMARKS, compare, prepare, run
+
+
+def main() -> int:
+    parser = ArgumentParser(prog="python -m test.benchmarks", description="Offline benchmarks of MMPM startup and hot paths")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="the number of measurements per benchmark (default: 5)")
+    parser.add_argument("-o", "--output", help="write the JSON results to this file instead of stdout")
+    parser.add_argument("-c", "--compare", metavar="BASELINE", help="fail if any benchmark is slower than in this JSON results file")
+    parser.add_argument("-t", "--threshold", type=float, default=0.25, help="the tolerated slowdown when comparing, as a fraction (default: 0.25)")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS.keys(), metavar="NAME", help="only run these benchmarks")
+    parser.add_argument("--wiki-fixture", type=Path, help="a saved copy of the 3rd party modules wiki page to parse instead of the synthetic one")
+    args = parser.parse_args()
+
+    results = {}
+
+    with tempfile.TemporaryDirectory(prefix="mmpm-benchmarks-") as root:
+        prepared = prepare(Path(root))
+        fixture = args.wiki_fixture or prepared["fixture"]
+
+        for name in args.only or BENCHMARKS.keys():
+            results[name] = run(name, prepared, fixture, args.repeat)
+            print(f"{name:<40} median {results[name]['median'] * 1000:>9.2f} ms  min {results[name]['min'] * 1000:>9.2f} ms", file=sys.stderr)
+
+    report = json.dumps({"python": platform.python_version(), "platform": platform.platform(), "benchmarks": results}, indent=2)
+
+    if args.output:
+        Path(args.output).write_text(report, encoding="utf-8")
+    else:
+        print(report)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))["benchmarks"]
+        regressions = compare(results, baseline, args.threshold)
+
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
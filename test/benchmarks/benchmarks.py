@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks of MMPM's startup and hot paths. Each benchmark is a snippet executed by a fresh interpreter,
+inside a temporary HOME populated with synthetic data, so no network access is needed and the configuration of
+the user running them is never touched. Snippets print a JSON list of the durations they measured, in seconds.
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, NamedTuple
+
+CATALOGUE_SIZE = 5000
+MODULES_COUNT = 200
+
+
+class Benchmark(NamedTuple):
+    """
+    A benchmark, and how to run it.
+
+    Attributes:
+        code (str): the snippet, which may refer to {repeat} and {fixture}
+        home (str): the name of the synthetic HOME to run it in ('catalogue' or 'modules')
+        per_process (bool): if True, the snippet measures once, and runs in a new interpreter for every repetition
+    """
+
+    code: str
+    home: str
+    per_process: bool
+
+
+__import_snippet__ = """
+import json, time
+start = time.perf_counter()
+import {module}
+print(json.dumps([time.perf_counter() - start]))
+"""
+
+BENCHMARKS: Dict[str, Benchmark] = {
+    "import.mmpm.entrypoint": Benchmark(__import_snippet__.format(module="mmpm.entrypoint"), "catalogue", True),
+    "import.mmpm.api.entrypoint": Benchmark(__import_snippet__.format(module="mmpm.api.entrypoint"), "catalogue", True),
+    "import.mmpm.wsgi": Benchmark(__import_snippet__.format(module="mmpm.wsgi"), "catalogue", True),
+    "database.load.cold": Benchmark(
+        """
+import json, time
+from mmpm.magicmirror.database import MagicMirrorDatabase
+database = MagicMirrorDatabase()
+start = time.perf_counter()
+database.load()
+print(json.dumps([time.perf_counter() - start]))
+""",
+        "catalogue",
+        True,
+    ),
+    "database.load.warm": Benchmark(
+        """
+import json, time
+from mmpm.magicmirror.database import MagicMirrorDatabase
+database = MagicMirrorDatabase()
+database.load()
+timings = []
+for _ in range({repeat}):
+    start = time.perf_counter()
+    database.load()
+    timings.append(time.perf_counter() - start)
+print(json.dumps(timings))
+""",
+        "catalogue",
+        False,
+    ),
+    "database.search": Benchmark(
+        """
+import json, time
+from mmpm.magicmirror.database import MagicMirrorDatabase
+database = MagicMirrorDatabase()
+database.load()
+timings = []
+for _ in range({repeat}):
+    start = time.perf_counter()
+    database.search("weather")
+    timings.append(time.perf_counter() - start)
+print(json.dumps(timings))
+""",
+        "catalogue",
+        False,
+    ),
+    "wiki.parse": Benchmark(
+        """
+import json, time
+from unittest.mock import MagicMock, patch
+from mmpm.magicmirror.database import MagicMirrorDatabase
+with open({fixture!r}, encoding="utf-8") as fixture:
+    response = MagicMock(text=fixture.read())
+database = MagicMirrorDatabase()
+timings = []
+with patch("mmpm.magicmirror.database.HTTPClient.get", return_value=response):
+    for _ in range({repeat}):
+        start = time.perf_counter()
+        database.__download_packages__()
+        timings.append(time.perf_counter() - start)
+print(json.dumps(timings))
+""",
+        "catalogue",
+        False,
+    ),
+    "database.discover_installed_packages": Benchmark(
+        """
+import json, time
+from mmpm.magicmirror.database import MagicMirrorDatabase
+database = MagicMirrorDatabase()
+timings = []
+for _ in range({repeat}):
+    start = time.perf_counter()
+    database.__discover_installed_packages__()
+    timings.append(time.perf_counter() - start)
+print(json.dumps(timings))
+""",
+        "modules",
+        False,
+    ),
+}
+
+
+def synthetic_packages(count: int) -> List[Dict[str, str]]:
+    """
+    Creates a deterministic catalogue of packages, in the format of the database file.
+
+    Parameters:
+        count (int): the number of packages
+
+    Returns:
+        List[Dict[str, str]]: the serialized packages
+    """
+
+    categories = ["Weather", "Transport", "News", "Finance", "Entertainment", "Utility / IoT / 3rd Party / Integration"]
+
+    return [
+        {
+            "title": f"MMM-Bench{index}",
+            "author": f"author{index % 97}",
+            "repository": f"https://github.com/author{index % 97}/MMM-Bench{index}",
+            "description": f"{'weather forecast' if index % 11 == 0 else 'a module'} number {index}",
+            "category": categories[index % len(categories)],
+            "directory": f"MMM-Bench{index}",
+        }
+        for index in range(count)
+    ]
+
+
+def wiki_fixture(count: int) -> str:
+    """
+    Creates a page laid out like the MagicMirror 3rd party modules wiki, listing a synthetic catalogue.
+
+    Parameters:
+        count (int): the number of packages
+
+    Returns:
+        str: the HTML of the page
+    """
+
+    packages = synthetic_packages(count)
+    categories = sorted({package["category"] for package in packages})
+
+    # the first two headings of the wiki aren't categories
+    html = ['<html><body><div class="markdown-body"><h3>Introduction</h3><h3>How to add modules</h3>']
+
+    for category in categories:
+        html.append(f"<h3>{category}</h3><table><tr><th>Title</th><th>Author</th><th>Description</th></tr>")
+
+        for package in filter(lambda package: package["category"] == category, packages):
+            html.append(
+                f'<tr><td><a href="{package["repository"]}">{package["title"]}</a></td>'
+                f"<td>{package['author']}</td><td>{package['description']}</td></tr>"
+            )
+
+        html.append("</table>")
+
+    html.append("</div></body></html>")
+    return "".join(html)
+
+
+def fake_git_modules(modules_dir: Path, count: int) -> None:
+    """
+    Creates module directories containing the bare minimum git needs to read their remote.
+
+    Parameters:
+        modules_dir (Path): the MagicMirror modules directory
+        count (int): the number of modules
+
+    Returns:
+        None
+    """
+
+    for index in range(count):
+        git_dir = modules_dir / f"MMM-Bench{index}" / ".git"
+        (git_dir / "objects").mkdir(parents=True, exist_ok=True)
+        (git_dir / "refs").mkdir(exist_ok=True)
+        (git_dir / "HEAD").write_text("ref: refs/heads/master\n", encoding="utf-8")
+        (git_dir / "config").write_text(
+            f'[core]\n\trepositoryformatversion = 0\n[remote "origin"]\n\turl = https://github.com/bench/MMM-Bench{index}.git\n',
+            encoding="utf-8",
+        )
+
+
+def prepare(root: Path) -> Dict[str, Path]:
+    """
+    Creates the synthetic HOME directories the benchmarks run in, and the wiki fixture.
+
+    Parameters:
+        root (Path): the directory to create them in
+
+    Returns:
+        Dict[str, Path]: the 'catalogue' and 'modules' HOME directories, and the 'fixture'
+    """
+
+    homes = {"catalogue": root / "catalogue", "modules": root / "modules"}
+
+    for home in homes.values():
+        (home / ".config" / "mmpm").mkdir(parents=True)
+        (home / "MagicMirror" / "modules").mkdir(parents=True)
+
+    config_dir = homes["catalogue"] / ".config" / "mmpm"
+
+    with open(config_dir / "MagicMirror-3rd-party-packages-db.json", "w", encoding="utf-8") as db:
+        json.dump(synthetic_packages(CATALOGUE_SIZE), db)
+
+    with open(config_dir / "MagicMirror-3rd-party-packages-db-last-update.json", "w", encoding="utf-8") as last_update:
+        json.dump({"last_update": "2024-01-01 00:00:00"}, last_update)
+
+    fake_git_modules(homes["modules"] / "MagicMirror" / "modules", MODULES_COUNT)
+
+    fixture = root / "3rd-party-modules.html"
+    fixture.write_text(wiki_fixture(CATALOGUE_SIZE), encoding="utf-8")
+
+    return {**homes, "fixture": fixture}
+
+
+def run(name: str, homes: Dict[str, Path], fixture: Path, repeat: int) -> Dict[str, float]:
+    """
+    Runs a benchmark.
+
+    Parameters:
+        name (str): the name of the benchmark
+        homes (Dict[str, Path]): the synthetic HOME directories
+        fixture (Path): the wiki page to parse
+        repeat (int): the number of measurements to take
+
+    Returns:
+        Dict[str, float]: the 'min', 'median', and 'mean' durations in seconds, and the number of 'runs'
+    """
+
+    benchmark = BENCHMARKS[name]
+    code = benchmark.code.replace("{repeat}", str(repeat)).replace("{fixture!r}", repr(str(fixture)))
+    env = {**os.environ, "HOME": str(homes[benchmark.home]), "MMPM_LOG_LEVEL": "CRITICAL"}
+
+    timings: List[float] = []
+
+    for _ in range(repeat if benchmark.per_process else 1):
+        process = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+        timings.extend(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    return {"min": min(timings), "median": statistics.median(timings), "mean": statistics.mean(timings), "runs": len(timings)}
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], threshold: float) -> List[str]:
+    """
+    Compares benchmark results with a baseline, using the median durations.
+
+    Parameters:
+        results (Dict[str, Dict[str, float]]): the current results, keyed by benchmark name
+        baseline (Dict[str, Dict[str, float]]): the baseline results, keyed by benchmark name
+        threshold (float): the tolerated slowdown, as a fraction of the baseline (ie. 0.25 for 25%)
+
+    Returns:
+        List[str]: a description of each regression beyond the threshold, which is empty if there are none
+    """
+
+    regressions = []
+
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        before, after = baseline[name]["median"], result["median"]
+
+        if after > before * (1 + threshold):
+            regressions.append(f"{name}: {before * 1000:.2f} ms -> {after * 1000:.2f} ms (+{(after / before - 1) * 100:.0f}%)")
+
+    return regressions
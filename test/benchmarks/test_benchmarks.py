@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+from test.benchmarks.benchmarks import compare, fake_git_modules, synthetic_packages, wiki_fixture
+from unittest.mock import MagicMock, patch
+
+from mmpm.magicmirror.database import MagicMirrorDatabase
+
+
+class TestBenchmarks(unittest.TestCase):
+    def test_compare(self):
+        baseline = {"fast": {"median": 0.010}, "slow": {"median": 0.010}}
+        results = {"fast": {"median": 0.011}, "slow": {"median": 0.020}, "new": {"median": 1.0}}
+
+        regressions = compare(results, baseline, threshold=0.25)
+
+        self.assertEqual(len(regressions), 1)
+        self.assertTrue(regressions[0].startswith("slow:"))
+
+    @patch("mmpm.magicmirror.database.HTTPClient.get")
+    def test_wiki_fixture_is_parsable(self, mock_get):
+        mock_get.return_value = MagicMock(text=wiki_fixture(30))
+
+        packages = MagicMirrorDatabase().__download_packages__()
+
+        self.assertEqual(sorted(package.title for package in packages), sorted(package["title"] for package in synthetic_packages(30)))
+
+    def test_fake_git_modules_have_a_remote(self):
+        with tempfile.TemporaryDirectory() as directory:
+            fake_git_modules(Path(directory), 1)
+
+            remote = subprocess.run(
+                ["git", "-C", str(Path(directory) / "MMM-Bench0"), "config", "--get", "remote.origin.url"],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+
+        self.assertEqual(remote.stdout.strip(), "https://github.com/bench/MMM-Bench0.git")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from mmpm.constants import urls
+
+
+class TestPaths(unittest.TestCase):
+    def run_python(self, home: str, code: str) -> str:
+        env = {**os.environ, "HOME": home}
+        return subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout.strip()
+
+    def test_import_has_no_side_effects(self):
+        with tempfile.TemporaryDirectory() as home:
+            self.run_python(home, "import mmpm.constants.paths")
+            self.assertFalse((Path(home) / ".config").exists())
+
+    def test_first_access_creates_files(self):
+        with tempfile.TemporaryDirectory() as home:
+            output = self.run_python(home, "from mmpm.constants import paths; print(paths.MMPM_ENV_FILE)")
+
+            config_dir = Path(home) / ".config" / "mmpm"
+            self.assertEqual(output, str(config_dir / "mmpm-env.json"))
+            self.assertTrue((config_dir / "log").is_dir())
+            self.assertTrue((config_dir / "mmpm-available-upgrades.json").is_file())
+
+    def test_first_access_keeps_existing_files_untouched(self):
+        with tempfile.TemporaryDirectory() as home:
+            env_file = Path(self.run_python(home, "from mmpm.constants import paths; print(paths.MMPM_ENV_FILE)"))
+            os.utime(env_file, (0, 0))
+
+            self.run_python(home, "from mmpm.constants import paths; paths.MMPM_ENV_FILE")
+            self.assertEqual(env_file.stat().st_mtime, 0)
+
+    def test_unknown_attribute(self):
+        from mmpm.constants import paths
+
+        with self.assertRaises(AttributeError):
+            paths.NOT_A_PATH  # pylint: disable=pointless-statement
+
+
+class TestUrls(unittest.TestCase):
+    @patch("mmpm.utils.get_host_ip", return_value="10.0.0.2")
+    def test_host_is_computed_once(self, mock_get_host_ip):
+        urls.__host__.cache_clear()
+
+        self.assertEqual(urls.HOST, "10.0.0.2")
+        self.assertEqual(urls.HOST, "10.0.0.2")
+        mock_get_host_ip.assert_called_once()
+
+        urls.__host__.cache_clear()
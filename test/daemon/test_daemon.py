@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+import tempfile
+import unittest
+from argparse import Namespace
+from pathlib import Path
+from threading import Thread
+from unittest.mock import MagicMock, patch
+
+from mmpm.__version__ import version
+from mmpm.daemon import client
+from mmpm.daemon.server import DaemonServer, MMPMDaemon
+from mmpm.log.factory import MMPMLogFactory
+
+
+class TestMMPMDaemon(unittest.TestCase):
+    def setUp(self):
+        self.daemon = MMPMDaemon()
+
+    def test_ping(self):
+        response = self.daemon.execute({"ping": True})
+        self.assertEqual(response["version"], version)
+
+    def test_rejects_version_mismatch(self):
+        response = self.daemon.execute({"version": "0.0.0", "argv": ["search", "query"]})
+        self.assertIn("error", response)
+
+    def test_rejects_unsupported_subcommands(self):
+        response = self.daemon.execute({"version": version, "argv": ["install", "MMM-Test"]})
+        self.assertIn("error", response)
+
+    @patch.object(MMPMDaemon, "refresh")
+    @patch("mmpm.daemon.server.build_parser")
+    def test_execute_captures_output(self, mock_build_parser, mock_refresh):
+        def exec_(args, extra):
+            print(f"results for {extra[0]}")
+            MMPMLogFactory.get_logger("mmpm.subcommands._sub_cmd_show").error("something went wrong")
+
+        subcommand = MagicMock()
+        subcommand.exec.side_effect = exec_
+
+        parser = MagicMock()
+        parser.parse_known_args.return_value = (Namespace(subcmd="search"), ["query"])
+        mock_build_parser.return_value = (parser, MagicMock(objects={"search": subcommand}))
+
+        # as in the running daemon, the handlers of the 'mmpm' logger are set up already, and write to its own stderr
+        MMPMLogFactory.__setup__()
+        response = self.daemon.execute({"version": version, "argv": ["search", "query"]})
+
+        mock_refresh.assert_called_once()
+        self.assertEqual(response["stdout"], "results for query\n")
+        self.assertIn("[ERROR] something went wrong", response["stderr"])
+        self.assertEqual(response["code"], 0)
+
+    @patch.object(MMPMDaemon, "refresh")
+    @patch("mmpm.daemon.server.build_parser")
+    def test_execute_reports_exit_code(self, mock_build_parser, mock_refresh):
+        parser = MagicMock()
+        parser.parse_known_args.side_effect = SystemExit(2)
+        mock_build_parser.return_value = (parser, MagicMock())
+
+        response = self.daemon.execute({"version": version, "argv": ["list", "--bogus"]})
+        self.assertEqual(response["code"], 2)
+
+    @patch("mmpm.daemon.server.MagicMirrorDatabase.load")
+    def test_refresh_only_reloads_on_change(self, mock_load):
+        with patch.object(MMPMDaemon, "__state__", side_effect=[(1.0,), (1.0,), (2.0,)]):
+            self.daemon.refresh()
+            self.daemon.refresh()
+            self.daemon.refresh()
+
+        self.assertEqual(mock_load.call_count, 2)
+
+
+class TestClient(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.socket_path = Path(self.directory.name) / "mmpm-daemon.sock"
+
+        patcher = patch("mmpm.constants.paths.MMPM_DAEMON_SOCKET", self.socket_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.directory.cleanup)
+
+    def serve(self, response: dict) -> DaemonServer:
+        daemon = MagicMock()
+        daemon.execute.return_value = response
+
+        server = DaemonServer(str(self.socket_path), daemon)
+        Thread(target=server.serve_forever, daemon=True).start()
+
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_handles(self):
+        self.assertTrue(client.handles(["search", "weather"]))
+        self.assertFalse(client.handles(["install", "MMM-Test"]))
+        self.assertFalse(client.handles([]))
+
+    def test_query_without_daemon(self):
+        self.assertIsNone(client.query(["search", "weather"]))
+
+    def test_query(self):
+        server = self.serve({"stdout": "MMM-Test\n", "stderr": "", "code": 0})
+
+        response = client.query(["search", "weather"])
+
+        self.assertEqual(response, {"stdout": "MMM-Test\n", "stderr": "", "code": 0})
+        server.daemon.execute.assert_called_once_with({"version": version, "argv": ["search", "weather"]})
+
+    def test_query_falls_back_on_error(self):
+        self.serve({"error": "version mismatch"})
+        self.assertIsNone(client.query(["search", "weather"]))
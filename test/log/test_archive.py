@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+import datetime
+import gzip
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from typing import List, Tuple
+from unittest.mock import patch
+
+from mmpm.log.archive import LogArchive, archive_name
+
+
+class TestLogArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log_dir = Path(self.tmp.name)
+
+        patcher = patch("mmpm.constants.paths.MMPM_LOG_DIR", self.log_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        (self.log_dir / "mmpm-cli.log").write_text('{"message": "current"}\n' * 5000, encoding="utf-8")
+        (self.log_dir / "mmpm-cli.log.1.gz").write_bytes(gzip.compress(b'{"message": "rotated"}\n' * 100))
+        (self.log_dir / "nginx").mkdir()
+        (self.log_dir / "nginx" / "error.log").write_text("error\n", encoding="utf-8")
+
+        self.log_archive = LogArchive(chunk_size=4096)
+
+    def read(self, chunks) -> zipfile.ZipFile:
+        return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+    def test_archive_name(self):
+        self.assertEqual(archive_name(datetime.date(2024, 1, 31)), "mmpm-logs-2024-1-31.zip")
+
+    def test_stream_is_a_valid_archive(self):
+        chunks = list(self.log_archive.stream())
+        self.assertGreater(len(chunks), 1)  # sent as it's generated, rather than at once
+
+        archive = self.read(chunks)
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(sorted(archive.namelist()), ["mmpm-cli.log", "mmpm-cli.log.1.gz", "nginx/error.log"])
+        self.assertEqual(archive.read("mmpm-cli.log"), (self.log_dir / "mmpm-cli.log").read_bytes())
+        self.assertEqual(archive.getinfo("mmpm-cli.log").compress_type, zipfile.ZIP_DEFLATED)
+        self.assertEqual(archive.getinfo("mmpm-cli.log.1.gz").compress_type, zipfile.ZIP_STORED)
+
+    def test_entries_keep_the_metadata_of_the_log_files(self):
+        (self.log_dir / "nginx" / "accès.log").write_text("access\n", encoding="utf-8")
+        archive = self.read(self.log_archive.stream())
+
+        for name in ["mmpm-cli.log", "nginx/accès.log"]:
+            info = archive.getinfo(name)
+            stat = (self.log_dir / name).stat()
+
+            date_time = zipfile.ZipInfo.from_file(self.log_dir / name).date_time
+
+            self.assertEqual(info.date_time, date_time[:5] + (date_time[5] // 2 * 2,))  # in steps of 2 seconds
+            self.assertEqual(info.external_attr >> 16, stat.st_mode)
+            self.assertEqual(info.file_size, stat.st_size)
+
+        self.assertEqual(archive.read("nginx/accès.log"), b"access\n")
+
+    def opened(self, log_archive: LogArchive) -> Tuple[bytes, List[str]]:
+        """Streams an archive, and lists the log files read to generate it."""
+
+        with patch("mmpm.log.archive.open", create=True, side_effect=open) as mock_open:
+            data = b"".join(log_archive.stream())
+
+        return data, sorted(Path(call.args[0]).relative_to(self.log_dir).as_posix() for call in mock_open.call_args_list)
+
+    def test_unchanged_logs_are_not_compressed_again(self):
+        first = b"".join(self.log_archive.stream())
+        second, opened = self.opened(self.log_archive)
+
+        self.assertEqual(opened, ["mmpm-cli.log"])  # the current log file is always compressed again
+        self.assertEqual(first, second)
+
+    def test_appending_to_the_current_log(self):
+        b"".join(self.log_archive.stream())
+
+        with open(self.log_dir / "mmpm-cli.log", "a", encoding="utf-8") as log:
+            log.write('{"message": "new"}\n')
+
+        data, opened = self.opened(self.log_archive)
+        archive = self.read([data])
+
+        self.assertEqual(opened, ["mmpm-cli.log"])
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read("mmpm-cli.log"), (self.log_dir / "mmpm-cli.log").read_bytes())
+        self.assertEqual(archive.read("mmpm-cli.log.1.gz"), (self.log_dir / "mmpm-cli.log.1.gz").read_bytes())
+        self.assertEqual(archive.read("nginx/error.log"), b"error\n")
+
+    def test_changed_logs_invalidate_the_cache(self):
+        b"".join(self.log_archive.stream())
+
+        log_file = self.log_dir / "nginx" / "error.log"
+
+        with open(log_file, "a", encoding="utf-8") as log:
+            log.write("new\n")
+
+        stat = log_file.stat()
+        os.utime(log_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        data, opened = self.opened(self.log_archive)
+
+        self.assertEqual(opened, ["mmpm-cli.log", "nginx/error.log"])
+        self.assertEqual(self.read([data]).read("nginx/error.log"), b"error\nnew\n")
+
+    def test_cache_size_is_bounded(self):
+        log_archive = LogArchive(chunk_size=4096, max_cache_size=0)
+        b"".join(log_archive.stream())
+
+        data, opened = self.opened(log_archive)
+
+        self.assertEqual(opened, ["mmpm-cli.log", "mmpm-cli.log.1.gz", "nginx/error.log"])
+        self.assertIsNone(self.read([data]).testzip())
+
+
+if __name__ == "__main__":
+    unittest.main()
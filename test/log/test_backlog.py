@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+import json
+import unittest
+
+from mmpm.log.backlog import LogBacklog
+
+
+def make_record(message: str, level: str = "INFO", logger_name: str = "mmpm.magicmirror.database") -> str:
+    return json.dumps({"level": level, "message": message, "logger_name": logger_name})
+
+
+class TestLogBacklog(unittest.TestCase):
+    def setUp(self):
+        self.backlog = LogBacklog(size=4)
+        self.backlog.append(make_record("debug", level="DEBUG"))
+        self.backlog.append(make_record("warning", level="WARNING", logger_name="mmpm.magicmirror"))
+        self.backlog.append(make_record("error", level="ERROR", logger_name="mmpm.api"))
+        self.backlog.append("not json")
+
+    @staticmethod
+    def messages(records):
+        return [json.loads(record)["message"] for record in records]
+
+    def test_oldest_records_are_discarded(self):
+        self.backlog.append(make_record("latest"))
+        self.assertEqual(len(self.backlog.replay()), 4)
+        self.assertEqual(json.loads(self.backlog.replay()[0])["message"], "warning")
+
+    def test_replay_without_filters_returns_everything(self):
+        self.assertEqual(self.backlog.replay()[-1], "not json")
+
+    def test_level_filter(self):
+        self.assertEqual(self.messages(self.backlog.replay(level="warning")), ["warning", "error"])
+
+    def test_logger_filter_matches_children(self):
+        self.assertEqual(self.messages(self.backlog.replay(logger="mmpm.magicmirror")), ["debug", "warning"])
+        self.assertEqual(self.backlog.replay(logger="mmpm.magic"), [])
+
+    def test_limit_keeps_most_recent(self):
+        self.assertEqual(self.messages(self.backlog.replay(level="DEBUG", limit=1)), ["error"])
+        self.assertEqual(self.backlog.replay(limit=0), [])
+        self.assertEqual(len(self.backlog.replay(limit=10)), 4)
+
+    def test_invalid_filters(self):
+        with self.assertRaises(ValueError):
+            self.backlog.replay(level="LOUD")
+
+        with self.assertRaises(ValueError):
+            self.backlog.replay(limit=-1)
+
+
+if __name__ == "__main__":
+    unittest.main()
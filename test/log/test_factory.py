@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from mmpm.log.backlog import LogBacklog
+from mmpm.log.factory import (
+    BoundedQueueHandler,
+    JsonFormatter,
+    LogListener,
+    MMPMLogFactory,
+    SocketIOHandler,
+    __compress_rotated__,
+    __compressed_name__,
+)
+from mmpm.log.query import LogQuery
+
+
+def make_record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("test", level, __file__, 1, message, None, None)
+
+
+class TestRotation(unittest.TestCase):
+    def test_rotated_files_are_compressed(self):
+        with tempfile.TemporaryDirectory() as log_dir:
+            log_file = Path(log_dir) / "mmpm-cli.log"
+            handler = logging.handlers.RotatingFileHandler(log_file, maxBytes=100, backupCount=2, encoding="utf-8")
+            handler.namer = __compressed_name__
+            handler.rotator = __compress_rotated__
+
+            for index in range(10):
+                handler.emit(make_record(f"record {index:<40}"))
+
+            handler.close()
+
+            self.assertEqual(sorted(path.name for path in Path(log_dir).iterdir()), ["mmpm-cli.log", "mmpm-cli.log.1.gz", "mmpm-cli.log.2.gz"])
+            self.assertTrue(gzip.decompress((Path(log_dir) / "mmpm-cli.log.1.gz").read_bytes()).startswith(b"record "))
+
+
+class TestGetLogger(unittest.TestCase):
+    def setUp(self):
+        self.records = []
+        self.handler = logging.Handler()
+        self.handler.emit = self.records.append
+        self.parent = logging.getLogger("mmpm")
+        self.parent.addHandler(self.handler)
+        self.addCleanup(self.parent.removeHandler, self.handler)
+        self.addCleanup(self.parent.setLevel, self.parent.level)
+        self.parent.setLevel(logging.DEBUG)
+
+        # skips setting up the file, stdout, and SocketIO handlers
+        patcher = patch.object(MMPMLogFactory, "_MMPMLogFactory__logger", self.parent)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_modules_log_under_their_own_names(self):
+        MMPMLogFactory.get_logger("mmpm.api").info("from the api")
+        MMPMLogFactory.get_logger("mmpm.magicmirror.database").info("from the database")
+        MMPMLogFactory.get_logger("__main__").info("from a script")
+
+        self.assertEqual([record.name for record in self.records], ["mmpm.api", "mmpm.magicmirror.database", "mmpm.__main__"])
+
+    def test_records_can_be_filtered_by_module(self):
+        MMPMLogFactory.get_logger("mmpm.api").warning("from the api")
+        MMPMLogFactory.get_logger("mmpm.magicmirror.database").warning("from the database")
+        MMPMLogFactory.get_logger("mmpm.magicmirror.package").warning("from a package")
+
+        formatted = [JsonFormatter().format(record) for record in self.records]
+        backlog = LogBacklog()
+
+        for record in formatted:
+            backlog.append(record)
+
+        self.assertEqual(
+            [json.loads(record)["message"] for record in backlog.replay(logger="mmpm.magicmirror")], ["from the database", "from a package"]
+        )
+        self.assertEqual([json.loads(record)["message"] for record in backlog.replay(logger="mmpm.api")], ["from the api"])
+
+        with tempfile.TemporaryDirectory() as log_dir:
+            log_file = Path(log_dir) / "mmpm-cli.log"
+            log_file.write_text("".join(f"{record}\n" for record in formatted), encoding="utf-8")
+
+            with patch("mmpm.log.query.paths.MMPM_CLI_LOG_FILE", log_file):
+                records = LogQuery().query(logger="mmpm.magicmirror.database")
+
+        self.assertEqual([record["message"] for record in records], ["from the database"])
+
+
+class TestLazySetup(unittest.TestCase):
+    def run_python(self, home: str, code: str) -> str:
+        env = {**os.environ, "HOME": home}
+        return subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True).stdout.strip()
+
+    def test_import_creates_no_files_and_starts_no_threads(self):
+        with tempfile.TemporaryDirectory() as home:
+            output = self.run_python(home, "import threading, mmpm.entrypoint; print([thread.name for thread in threading.enumerate()])")
+
+            self.assertEqual(output, "['MainThread']")
+            self.assertEqual(list(Path(home).iterdir()), [])
+
+    def test_first_record_sets_up_the_handlers(self):
+        with tempfile.TemporaryDirectory() as home:
+            code = "from mmpm.log.factory import MMPMLogFactory; MMPMLogFactory.get_logger('mmpm.test').info('first'); MMPMLogFactory.shutdown()"
+            self.run_python(home, code)
+
+            log_file = Path(home) / ".config" / "mmpm" / "log" / "mmpm-cli.log"
+            self.assertEqual(json.loads(log_file.read_text(encoding="utf-8"))["message"], "first")
+
+
+class TestSocketIOHandler(unittest.TestCase):
+    def setUp(self):
+        self.record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+
+    @patch("socketio.Client")
+    def test_does_not_connect_until_first_record(self, mock_client):
+        handler = SocketIOHandler("localhost", 6789)
+        mock_client.assert_not_called()
+
+        mock_client.return_value.connected = True
+        handler.emit(self.record)
+
+        mock_client.return_value.connect.assert_called_once_with("http://localhost:6789", wait=False)
+        mock_client.return_value.emit.assert_called_once()
+
+    @patch("socketio.Client")
+    def test_retries_after_interval(self, mock_client):
+        mock_client.return_value.connected = False
+        handler = SocketIOHandler("localhost", 6789, retry_interval=60)
+
+        with patch("mmpm.log.factory.time.monotonic", MagicMock(side_effect=[100.0, 130.0, 170.0])):
+            handler.emit(self.record)
+            handler.emit(self.record)
+            handler.emit(self.record)
+
+        self.assertEqual(mock_client.return_value.connect.call_count, 2)
+        mock_client.return_value.emit.assert_not_called()
+
+    @patch("socketio.Client")
+    def test_batch_is_sent_as_one_event(self, mock_client):
+        mock_client.return_value.connected = True
+        handler = SocketIOHandler("localhost", 6789)
+
+        handler.handle_batch([make_record("first"), make_record("second")])
+
+        mock_client.return_value.emit.assert_called_once()
+        event, payload = mock_client.return_value.emit.call_args.args
+        self.assertEqual(event, "logs-batch")
+        self.assertEqual(len(payload), 2)
+        self.assertIn('"message": "second"', payload[1])
+
+
+class TestBoundedQueueHandler(unittest.TestCase):
+    def test_merges_arguments_on_the_callers_thread(self):
+        handler = BoundedQueueHandler()
+        record = logging.LogRecord("test", logging.INFO, __file__, 1, "installed %s", ("MMM-Test",), None)
+
+        handler.handle(record)
+        queued = handler.queue.get_nowait()
+
+        self.assertEqual(queued.msg, "installed MMM-Test")
+        self.assertIsNone(queued.args)
+        self.assertEqual(record.args, ("MMM-Test",))  # the original record is left untouched
+
+    def test_drop_oldest(self):
+        handler = BoundedQueueHandler(maxsize=2, drop_policy=BoundedQueueHandler.DROP_OLDEST)
+
+        for message in ("a", "b", "c"):
+            handler.handle(make_record(message))
+
+        self.assertEqual([handler.queue.get_nowait().msg for _ in range(2)], ["b", "c"])
+        self.assertEqual(handler.dropped, 1)
+
+    def test_drop_newest(self):
+        handler = BoundedQueueHandler(maxsize=2, drop_policy=BoundedQueueHandler.DROP_NEWEST)
+
+        for message in ("a", "b", "c", "d"):
+            handler.handle(make_record(message))
+
+        self.assertEqual([handler.queue.get_nowait().msg for _ in range(2)], ["a", "b"])
+        self.assertEqual(handler.dropped, 2)
+
+    def test_unknown_drop_policy(self):
+        with self.assertRaises(ValueError):
+            BoundedQueueHandler(drop_policy="random")
+
+
+class TestLogListener(unittest.TestCase):
+    def setUp(self):
+        self.queue_handler = BoundedQueueHandler(maxsize=2, drop_policy=BoundedQueueHandler.DROP_NEWEST)
+        self.handler = MagicMock(spec=logging.Handler, level=logging.DEBUG)
+        self.batch_handler = MagicMock(spec=SocketIOHandler, level=logging.INFO)
+
+    def test_handles_queued_records_in_batches(self):
+        listener = LogListener(self.queue_handler, self.handler, self.batch_handler)
+
+        self.queue_handler.handle(make_record("debug", logging.DEBUG))
+        self.queue_handler.handle(make_record("info"))
+
+        listener.start()
+        listener.stop()
+
+        self.assertEqual([call.args[0].msg for call in self.handler.handle.call_args_list], ["debug", "info"])
+        self.batch_handler.handle_batch.assert_called_once()
+        self.assertEqual([record.msg for record in self.batch_handler.handle_batch.call_args.args[0]], ["info"])
+
+    def test_reports_dropped_records(self):
+        listener = LogListener(self.queue_handler, self.handler)
+
+        for message in ("a", "b", "c"):
+            self.queue_handler.handle(make_record(message))
+
+        listener.handle([self.queue_handler.queue.get_nowait()])
+        listener.handle([self.queue_handler.queue.get_nowait()])
+
+        messages = [call.args[0].getMessage() for call in self.handler.handle.call_args_list]
+        self.assertEqual(messages, ["a", "Dropped 1 log records, the log queue was full", "b"])
+
+    def test_caller_does_not_wait_for_slow_handlers(self):
+        released = threading.Event()
+        self.handler.handle.side_effect = lambda record: released.wait(5)
+        listener = LogListener(self.queue_handler, self.handler)
+        listener.start()
+
+        try:
+            for message in ("a", "b", "c", "d"):
+                self.queue_handler.handle(make_record(message))
+        finally:
+            released.set()
+            listener.stop()
+
+        self.assertGreater(self.queue_handler.dropped, 0)
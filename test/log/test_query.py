@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+import gzip
+import json
+import tempfile
+import unittest
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import patch
+
+from mmpm.log.query import LogQuery, log_files, parse_time
+
+START = datetime(2024, 1, 31, 18, 0, 0)
+LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+
+def make_record(minute: int) -> dict:
+    return {
+        "timestamp": parse_time((START + timedelta(minutes=minute)).isoformat()),
+        "level": LEVELS[minute % len(LEVELS)],
+        "version": "4.1.2",
+        "message": f"record {minute}",
+        "logger_name": "mmpm.magicmirror.database" if minute % 2 else "mmpm.api",
+        "module": "test",
+        "function": "test",
+        "line": 1,
+    }
+
+
+class TestParseTime(unittest.TestCase):
+    def test_absolute(self):
+        self.assertEqual(parse_time("2024-01-31T18:00"), "2024-01-31 18:00:00,000")
+        self.assertEqual(parse_time("2024-01-31 18:00:01.250"), "2024-01-31 18:00:01,250")
+
+    def test_aware_times_are_converted_to_local_time(self):
+        moment = datetime(2024, 1, 31, 18, 0, tzinfo=timezone.utc)
+        self.assertEqual(parse_time(moment.isoformat()), parse_time(moment.astimezone().replace(tzinfo=None).isoformat()))
+
+    def test_relative(self):
+        self.assertEqual(parse_time("90m", now=START), "2024-01-31 16:30:00,000")
+        self.assertEqual(parse_time("1d", now=START), "2024-01-30 18:00:00,000")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            parse_time("yesterday")
+
+
+class TestLogQuery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.log_file = Path(self.tmp.name) / "mmpm-cli.log"
+
+        patcher = patch("mmpm.constants.paths.MMPM_CLI_LOG_FILE", self.log_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # minutes 0-99 in mmpm-cli.log.2, 100-199 in mmpm-cli.log.1, and 200-299 in mmpm-cli.log
+        for path, minutes in ((f"{self.log_file}.2", range(0, 100)), (f"{self.log_file}.1", range(100, 200)), (self.log_file, range(200, 300))):
+            self.write(Path(path), minutes)
+
+        self.log_query = LogQuery(interval=1024, chunk_size=512)
+
+    @staticmethod
+    def write(path: Path, minutes, mode: str = "w"):
+        with open(path, mode, encoding="utf-8") as file:
+            for minute in minutes:
+                file.write(json.dumps(make_record(minute), ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def minutes(records):
+        return [int(record["message"].split()[1]) for record in records]
+
+    def test_log_files_newest_first(self):
+        (Path(self.tmp.name) / "mmpm-cli.log.zip").touch()
+        self.assertEqual([path.name for path in log_files()], ["mmpm-cli.log", "mmpm-cli.log.1", "mmpm-cli.log.2"])
+
+    def test_everything_in_chronological_order(self):
+        self.assertEqual(self.minutes(self.log_query.query()), list(range(300)))
+
+    def test_limit_keeps_most_recent(self):
+        self.assertEqual(self.minutes(self.log_query.query(limit=3)), [297, 298, 299])
+        self.assertEqual(self.log_query.query(limit=0), [])
+
+    def test_time_range_spanning_rotated_files(self):
+        records = self.log_query.query(since=(START + timedelta(minutes=195)).isoformat(), until=(START + timedelta(minutes=205)).isoformat())
+        self.assertEqual(self.minutes(records), list(range(195, 206)))
+
+    def test_filters(self):
+        records = self.log_query.query(level="error", logger="mmpm.magicmirror", grep=r"record 2\d$")
+        self.assertEqual(self.minutes(records), [23, 27])
+
+    def test_invalid_filters(self):
+        for filters in ({"level": "LOUD"}, {"grep": "("}, {"since": "soon"}):
+            with self.assertRaises(ValueError):
+                self.log_query.query(**filters)
+
+    def test_since_only_reads_the_end_of_the_newest_file(self):
+        read = []
+        backwards = self.log_query.__backwards__
+
+        def spy(file, lower, upper):
+            read.append((Path(file.name).name, lower, upper))
+            return backwards(file, lower, upper)
+
+        with patch.object(self.log_query, "__backwards__", side_effect=spy):
+            records = self.log_query.query(since=(START + timedelta(minutes=290)).isoformat())
+
+        self.assertEqual(self.minutes(records), list(range(290, 300)))
+        self.assertEqual(len(read), 1)  # the rotated files aren't opened for reading
+        self.assertGreater(read[0][1], 0)  # the index skipped the start of the file
+
+    def test_index_follows_appends_and_rotation(self):
+        self.assertEqual(self.minutes(self.log_query.query(limit=1)), [299])
+
+        self.write(self.log_file, range(300, 310), mode="a")
+        self.assertEqual(self.minutes(self.log_query.query(since=(START + timedelta(minutes=305)).isoformat())), list(range(305, 310)))
+
+        # rotate, like the RotatingFileHandler does
+        Path(f"{self.log_file}.2").unlink()
+        Path(f"{self.log_file}.1").rename(f"{self.log_file}.2")
+        self.log_file.rename(f"{self.log_file}.1")
+        self.write(self.log_file, range(310, 320))
+
+        records = self.log_query.query(since=(START + timedelta(minutes=150)).isoformat())
+        self.assertEqual(self.minutes(records), list(range(150, 320)))
+
+    def test_compressed_rotated_files(self):
+        for path in (Path(f"{self.log_file}.1"), Path(f"{self.log_file}.2")):
+            Path(f"{path}.gz").write_bytes(gzip.compress(path.read_bytes()))
+            path.unlink()
+
+        self.write(Path(f"{self.log_file}.3"), range(0, 10))  # left over from before rotated files were compressed
+
+        self.assertEqual([path.name for path in log_files()], ["mmpm-cli.log", "mmpm-cli.log.1.gz", "mmpm-cli.log.2.gz", "mmpm-cli.log.3"])
+
+        records = self.log_query.query(since=(START + timedelta(minutes=150)).isoformat(), until=(START + timedelta(minutes=160)).isoformat())
+        self.assertEqual(self.minutes(records), list(range(150, 161)))
+
+    def test_incomplete_last_record_is_skipped(self):
+        with open(self.log_file, "a", encoding="utf-8") as file:
+            file.write('{"timestamp": "2024-01-31 23:00:00,000", "lev')
+
+        self.assertEqual(self.minutes(self.log_query.query(limit=1)), [299])
+
+
+if __name__ == "__main__":
+    unittest.main()
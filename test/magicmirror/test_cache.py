@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+import json
+import os
+import time
+import unittest
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from unittest.mock import patch
+
+from mmpm.magicmirror.cache import RemoteMetadataCache, UpdateCheckCache
+from mmpm.singleton import Singleton
+
+
+class TestRemoteMetadataCache(unittest.TestCase):
+    def setUp(self):
+        Singleton._instances.pop(RemoteMetadataCache, None)
+        self.temp_dir = TemporaryDirectory()
+        self.cache_file = Path(self.temp_dir.name) / "remote-metadata.json"
+        self.patcher = patch("mmpm.magicmirror.cache.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_REMOTE_METADATA_FILE", self.cache_file)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.temp_dir.cleanup()
+        Singleton._instances.pop(RemoteMetadataCache, None)
+
+    def test_set_and_get(self):
+        cache = RemoteMetadataCache()
+        self.assertIsNone(cache.get("https://github.com/user/repo"))
+        self.assertTrue(cache.is_stale("https://github.com/user/repo"))
+
+        cache.set("https://github.com/user/repo", {"stars": 5})
+
+        self.assertEqual(cache.get("https://github.com/user/repo")["details"], {"stars": 5})
+        self.assertFalse(cache.is_stale("https://github.com/user/repo"))
+
+    def test_persisted(self):
+        RemoteMetadataCache().set("https://github.com/user/repo", {"stars": 5})
+        Singleton._instances.pop(RemoteMetadataCache, None)
+
+        self.assertEqual(RemoteMetadataCache().get("https://github.com/user/repo")["details"], {"stars": 5})
+
+    def test_malformed_file(self):
+        self.cache_file.write_text(json.dumps({"repositories": {"https://github.com/user/repo": "stars"}, "rate_limits": []}))
+        cache = RemoteMetadataCache()
+
+        self.assertIsNone(cache.get("https://github.com/user/repo"))
+        self.assertIsNone(cache.rate_limit("github"))
+
+        self.cache_file.write_text(json.dumps(["not", "an", "object"]))
+        self.assertIsNone(cache.get("https://github.com/user/repo"))
+
+    def test_stale(self):
+        cache = RemoteMetadataCache()
+        cache.ttl = -1
+        cache.set("https://github.com/user/repo", {"stars": 5})
+        self.assertTrue(cache.is_stale("https://github.com/user/repo"))
+
+    def test_claim(self):
+        cache = RemoteMetadataCache()
+        self.assertTrue(cache.claim("https://github.com/user/repo"))
+        self.assertFalse(cache.claim("https://github.com/user/repo"))
+        cache.release("https://github.com/user/repo")
+        self.assertTrue(cache.claim("https://github.com/user/repo"))
+
+    def test_merges_changes_of_other_processes(self):
+        cli = RemoteMetadataCache()
+        self.assertIsNone(cli.get("https://github.com/user/cli"))
+        Singleton._instances.pop(RemoteMetadataCache, None)
+
+        api = RemoteMetadataCache()  # ie. the API, which read the cache file at the same time as the CLI
+        self.assertIsNone(api.get("https://github.com/user/api"))
+
+        cli.set("https://github.com/user/cli", {"stars": 1})
+        api.set("https://github.com/user/api", {"stars": 2})
+
+        self.assertEqual(cli.get("https://github.com/user/api")["details"], {"stars": 2})
+        self.assertEqual(set(json.loads(self.cache_file.read_text())["repositories"]), {"https://github.com/user/cli", "https://github.com/user/api"})
+
+    def test_batch_writes_once(self):
+        cache = RemoteMetadataCache()
+
+        with patch("mmpm.magicmirror.cache.os.replace", wraps=os.replace) as mock_replace:
+            with cache.batch():
+                for index in range(10):
+                    cache.set(f"https://github.com/user/repo-{index}", {"stars": index})
+
+                mock_replace.assert_not_called()
+                self.assertEqual(cache.get("https://github.com/user/repo-9")["details"], {"stars": 9})
+
+            mock_replace.assert_called_once()
+
+        self.assertEqual(len(json.loads(self.cache_file.read_text())["repositories"]), 10)
+
+    def test_rate_limit(self):
+        cache = RemoteMetadataCache()
+        cache.track_rate_limit("github", {})
+        self.assertIsNone(cache.rate_limit("github"))
+
+        reset = int(time.time()) + 60
+        cache.track_rate_limit("github", {"X-RateLimit-Remaining": "42", "X-RateLimit-Reset": str(reset)})
+        self.assertEqual(cache.rate_limit("github"), {"remaining": 42, "reset": reset})
+
+        cache.track_rate_limit("github", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) - 1)})
+        self.assertIsNone(cache.rate_limit("github"))
+
+    def test_rate_limit_writes(self):
+        cache = RemoteMetadataCache()
+        reset = int(time.time()) + 60
+
+        with patch("mmpm.magicmirror.cache.os.replace", wraps=os.replace) as mock_replace:
+            cache.track_rate_limit("github", {"X-RateLimit-Remaining": "42", "X-RateLimit-Reset": str(reset)})
+            self.assertEqual(mock_replace.call_count, 1)  # a new quota window
+
+            cache.track_rate_limit("github", {"X-RateLimit-Remaining": "41", "X-RateLimit-Reset": str(reset)})
+            cache.track_rate_limit("github", {"X-RateLimit-Remaining": "41", "X-RateLimit-Reset": str(reset)})
+            self.assertEqual(mock_replace.call_count, 1)
+            self.assertEqual(cache.rate_limit("github"), {"remaining": 41, "reset": reset})
+
+            cache.set("https://github.com/user/repo", {"stars": 5})
+            self.assertEqual(mock_replace.call_count, 2)
+            self.assertEqual(json.loads(self.cache_file.read_text())["rate_limits"]["github"], {"remaining": 41, "reset": reset})
+
+            cache.track_rate_limit("github", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(reset)})
+            self.assertEqual(mock_replace.call_count, 3)  # the quota ran out
+
+    def test_health(self):
+        cache = RemoteMetadataCache(health_ttl=60)
+        self.assertIsNone(cache.get_health())
+
+        results = {"gitlab": {"error": "", "warning": ""}}
+        cache.set_health(results)
+        self.assertEqual(cache.get_health(), results)
+
+        cache.health_ttl = -1
+        self.assertIsNone(cache.get_health())
+
+
+class TestUpdateCheckCache(unittest.TestCase):
+    def setUp(self):
+        Singleton._instances.pop(UpdateCheckCache, None)
+        self.temp_dir = TemporaryDirectory()
+        self.patcher = patch("mmpm.magicmirror.cache.paths.MMPM_UPDATE_CHECKS_FILE", Path(self.temp_dir.name) / "update-checks.json")
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.temp_dir.cleanup()
+        Singleton._instances.pop(UpdateCheckCache, None)
+
+    def test_invalidated_by_local_change(self):
+        UpdateCheckCache().set("/modules/MMM-Test", "abc", "def")
+        Singleton._instances.pop(UpdateCheckCache, None)
+
+        check = UpdateCheckCache().get("/modules/MMM-Test", "abc")
+        self.assertEqual((check["local"], check["remote"]), ("abc", "def"))
+        self.assertIsNone(UpdateCheckCache().get("/modules/MMM-Test", "123"))
+        self.assertIsNone(UpdateCheckCache().get("/modules/MMM-Other", "abc"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -11,6 +11,12 @@ fake = Faker()
 
 
 class TestMagicMirrorClientFactory(unittest.TestCase):
+    def setUp(self):
+        # the log handler connects to the log server with socketio.Client lazily, which would otherwise hit the patched client
+        patcher = patch("mmpm.magicmirror.controller.logger")
+        self.mock_logger = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch("mmpm.magicmirror.controller.socketio.Client")
     def test_create_client_valid(self, mock_client):
         client = MagicMirrorClientFactory.create_client("test_event", {"data": "test"})
@@ -25,6 +31,12 @@ class TestMagicMirrorClientFactory(unittest.TestCase):
 
 
 class TestMagicMirrorController(unittest.TestCase):
+    def setUp(self):
+        # the log handler connects to the log server with socketio.Client lazily, which would otherwise hit the patched client
+        patcher = patch("mmpm.magicmirror.controller.logger")
+        self.mock_logger = patcher.start()
+        self.addCleanup(patcher.stop)
+
     @patch("mmpm.magicmirror.controller.socketio.Client")
     def test_status(self, mock_client):
         client_instance = MagicMock()
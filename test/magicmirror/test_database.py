@@ -1,10 +1,15 @@
 #!/usr/bin/env python3
+import json
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, mock_open, patch
 
+from mmpm.__version__ import version
 from mmpm.env import MMPMEnv
 from mmpm.magicmirror.database import MagicMirrorDatabase
 from mmpm.magicmirror.package import MagicMirrorPackage
+from mmpm.utils import CancellationToken, update_available
 
 
 class TestMagicMirrorDatabase(unittest.TestCase):
@@ -25,6 +30,26 @@ class TestMagicMirrorDatabase(unittest.TestCase):
         result = self.database.__discover_installed_packages__()
         self.assertIsInstance(result, list)
 
+    @patch("mmpm.magicmirror.database.MagicMirrorDatabase.__download_packages__")
+    def test_cancelled_load_keeps_packages(self, mock_download):
+        token = CancellationToken()
+        mock_download.side_effect = lambda: token.cancel() or [MagicMirrorPackage(title="Downloaded")]
+        self.database.packages = [MagicMirrorPackage(title="Loaded")]
+
+        with tempfile.TemporaryDirectory() as directory:
+            db_file = Path(directory) / "MagicMirror-3rd-party-packages-db.json"
+            last_update_file = Path(directory) / "MagicMirror-3rd-party-packages-db-last-update.json"
+
+            with patch("mmpm.magicmirror.database.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_FILE", db_file), patch(
+                "mmpm.magicmirror.database.paths.MAGICMIRROR_3RD_PARTY_PACKAGES_DB_LAST_UPDATE_FILE", last_update_file
+            ):
+                self.assertFalse(self.database.load(update=True, token=token))
+
+            self.assertFalse(db_file.exists())
+            self.assertFalse(last_update_file.exists())
+
+        self.assertEqual([package.title for package in self.database.packages], ["Loaded"])
+
     @patch("mmpm.magicmirror.database.MagicMirrorPackage.update")
     @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
     def test_update(self, mock_file, mock_update):
@@ -33,6 +58,81 @@ class TestMagicMirrorDatabase(unittest.TestCase):
         result = self.database.update()
         self.assertFalse(result)
 
+    @patch("mmpm.magicmirror.database.MagicMirrorDatabase.upgradable")
+    @patch("mmpm.magicmirror.database.MagicMirrorPackage.update")
+    @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
+    def test_update_only(self, mock_file, mock_update, mock_upgradable):
+        checked = MagicMirrorPackage(title="Checked", repository="https://github.com/user/checked", is_installed=True)
+        skipped = MagicMirrorPackage(title="Skipped", repository="https://github.com/user/skipped", is_installed=True)
+        mock_upgradable.return_value = {"packages": [skipped.serialize()]}
+        self.database.packages = [checked, skipped]
+
+        self.assertEqual(self.database.update(only=["checked"], max_age=60), 1)
+        mock_update.assert_called_once_with(max_age=60)
+        self.assertTrue(skipped.is_upgradable)
+
+    @patch("mmpm.magicmirror.database.MagicMirrorDatabase.upgradable")
+    @patch("mmpm.magicmirror.database.MagicMirrorPackage.prefetch", autospec=True)
+    @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
+    def test_update_prefetch(self, mock_file, mock_prefetch, mock_upgradable):
+        checked = MagicMirrorPackage(title="Checked", repository="https://github.com/user/checked", is_installed=True)
+        reused = MagicMirrorPackage(title="Reused", repository="https://github.com/user/reused", is_installed=True)
+        mock_upgradable.return_value = {"packages": []}
+        self.database.packages = [checked, reused]
+
+        def update(package, max_age=None):
+            package.is_upgradable = True
+            return package is checked  # the check of the other package is reused, without fetching
+
+        with patch("mmpm.magicmirror.database.MagicMirrorPackage.update", autospec=True, side_effect=update):
+            self.assertEqual(self.database.update(prefetch=True, max_age=60), 2)
+
+        mock_prefetch.assert_called_once_with(reused)
+
+    @patch("mmpm.utils.HTTPClient.get")
+    def test_upgradable_after_version_check(self, mock_get):
+        mock_get.return_value.json.return_value = {"info": {"version": version}}
+
+        with tempfile.TemporaryDirectory() as directory:
+            upgrades_file = Path(directory) / "mmpm-available-upgrades.json"
+            upgrades_file.write_text(json.dumps({"mmpm": False, "MagicMirror": False, "packages": []}), encoding="utf-8")
+
+            with patch("mmpm.constants.paths.MMPM_AVAILABLE_UPGRADES_FILE", upgrades_file), patch(
+                "mmpm.constants.paths.MMPM_VERSION_CHECK_FILE", Path(directory) / "mmpm-version-check.json"
+            ):
+                self.assertFalse(update_available())
+
+                # everything is up to date, so 'mmpm upgrade' has nothing to do
+                self.assertFalse(any(self.database.upgradable().values()))
+
+    def test_upgradable_ignores_legacy_version_check(self):
+        with tempfile.TemporaryDirectory() as directory:
+            upgrades_file = Path(directory) / "mmpm-available-upgrades.json"
+            upgrades_file.write_text(
+                json.dumps({"mmpm": False, "MagicMirror": False, "packages": [], "mmpm_version_check": {"remote": version, "timestamp": 0}}),
+                encoding="utf-8",
+            )
+
+            with patch("mmpm.constants.paths.MMPM_AVAILABLE_UPGRADES_FILE", upgrades_file):
+                self.assertEqual(self.database.upgradable(), {"mmpm": False, "MagicMirror": False, "packages": []})
+
+    def test_write_completion_index(self):
+        self.database.packages = [
+            MagicMirrorPackage(title="Installed", directory="MMM-Installed", is_installed=True),
+            MagicMirrorPackage(title="Available", directory="MMM-Available"),
+        ]
+
+        with tempfile.TemporaryDirectory() as directory:
+            index_file = Path(directory) / "mmpm-completion-index.json"
+
+            with patch("mmpm.constants.paths.MMPM_COMPLETION_INDEX_FILE", index_file):
+                self.database.__write_completion_index__()
+
+            index = json.loads(index_file.read_text(encoding="utf-8"))
+
+        self.assertEqual(index["packages"], {"Installed": "MMM-Installed", "Available": "MMM-Available"})
+        self.assertEqual(index["installed"], ["Installed"])
+
     @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
     def test_add_mm_pkg(self, mock_file):
         mock_file.return_value.read.return_value = "[]"
@@ -60,6 +160,32 @@ class TestMagicMirrorDatabase(unittest.TestCase):
         result = self.database.remove_mm_pkg(title="Not found")
         self.assertFalse(result)
 
+    def test_select(self):
+        popular = MagicMirrorPackage(title="popular", stars=100, last_updated="2000-01-01")
+        recent = MagicMirrorPackage(title="recent", stars=5, last_updated="9999-01-01")
+        unknown = MagicMirrorPackage(title="unknown")
+        packages = [unknown, recent, popular]
+
+        self.assertEqual(self.database.select(packages), packages)
+        self.assertEqual(self.database.select(packages, sort="stars"), [popular, recent, unknown])
+        self.assertEqual(self.database.select(packages, sort="updated"), [recent, popular, unknown])
+        self.assertEqual(self.database.select(packages, min_stars=10), [popular])
+        self.assertEqual(self.database.select(packages, updated_within=365), [recent])
+
+    @patch("mmpm.magicmirror.database.MagicMirrorDatabase.custom_packages", return_value=[])
+    @patch("mmpm.magicmirror.database.fetch_remote_details")
+    @patch("mmpm.magicmirror.database.open", new_callable=mock_open)
+    def test_enrich(self, mock_file, mock_fetch_remote_details, mock_custom_packages):
+        package = MagicMirrorPackage(title="Test Package", repository="https://github.com/repo/test-package")
+        self.database.packages = [package, MagicMirrorPackage(title="Other", repository="https://example.com/other")]
+        mock_fetch_remote_details.return_value = {
+            package.repository: {"stars": 3, "forks": 1, "issues": 0, "created": "2020-01-01", "last_updated": "2021-01-01"},
+        }
+
+        self.assertEqual(self.database.enrich(), 1)
+        self.assertEqual((package.stars, package.forks, package.last_updated), (3, 1, "2021-01-01"))
+        self.assertIn('"stars": 3', "".join(call.args[0] for call in mock_file.return_value.write.call_args_list))
+
 
 if __name__ == "__main__":
     unittest.main()
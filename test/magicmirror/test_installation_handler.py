@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
 
+import os
+import subprocess
 import unittest
 from multiprocessing import cpu_count
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest.mock import MagicMock, patch
 
-from mmpm.magicmirror.package import InstallationHandler, MagicMirrorPackage
+from mmpm.magicmirror.package import BUILD_TIMEOUT, ROLLBACK_DIR, STAGING_DIR, TRASH_DIR, InstallationHandler, MagicMirrorPackage, blue_green_upgrade
+from mmpm.utils import CancellationToken
 
 
 class TestInstallationHandler(unittest.TestCase):
@@ -50,7 +54,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["bundle", "install"], message="Installing Ruby dependencies")
+        mock_run_cmd.assert_called_with(["bundle", "install"], message="Installing Ruby dependencies", timeout=BUILD_TIMEOUT, token=None)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_npm_install(self, mock_run_cmd):
@@ -60,7 +64,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["npm", "install"], message="Installing Node dependencies")
+        mock_run_cmd.assert_called_with(["npm", "install"], message="Installing Node dependencies", timeout=BUILD_TIMEOUT, token=None)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     @patch("os.cpu_count", return_value=4)
@@ -71,7 +75,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["make", "-j", f"{cpu_count()}"], message="Building with 'make'")
+        mock_run_cmd.assert_called_with(["make", "-j", f"{cpu_count()}"], message="Building with 'make'", timeout=BUILD_TIMEOUT, token=None)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_pip_install(self, mock_run_cmd):
@@ -84,6 +88,8 @@ class TestInstallationHandler(unittest.TestCase):
         mock_run_cmd.assert_called_with(
             ["pip", "install", "-r", "requirements.txt"],
             message="Installing Python dependencies",
+            timeout=BUILD_TIMEOUT,
+            token=None,
         )
 
     @patch("mmpm.magicmirror.package.run_cmd")
@@ -94,7 +100,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["mvn", "install"], message="Building with Maven")
+        mock_run_cmd.assert_called_with(["mvn", "install"], message="Building with Maven", timeout=BUILD_TIMEOUT, token=None)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_go_build(self, mock_run_cmd):
@@ -104,7 +110,7 @@ class TestInstallationHandler(unittest.TestCase):
         self.assertEqual(error_code, 0)
         self.assertEqual(stdout, "stdout")
         self.assertEqual(stderr, "stderr")
-        mock_run_cmd.assert_called_with(["go", "build"], message="Building Go project")
+        mock_run_cmd.assert_called_with(["go", "build"], message="Building Go project", timeout=BUILD_TIMEOUT, token=None)
 
     @patch("mmpm.magicmirror.package.run_cmd")
     @patch("os.chdir")
@@ -125,4 +131,153 @@ class TestInstallationHandler(unittest.TestCase):
         mock_mkdir.assert_called_with(exist_ok=True)
         mock_system.assert_called_with(f"rm -rf {build_dir}/*")
         mock_chdir.assert_called_with(build_dir)
-        mock_run_cmd.assert_called_with(["cmake", ".."], message="Building with CMake")
+        mock_run_cmd.assert_called_with(["cmake", ".."], message="Building with CMake", timeout=BUILD_TIMEOUT, token=None)
+
+    @patch("os.chdir")
+    def test_install_staged(self, mock_chdir):
+        with TemporaryDirectory() as root:
+            modules_dir = Path(root) / "modules"
+            (modules_dir / "test_dir").mkdir(parents=True)
+            (modules_dir / "test_dir" / "old").touch()
+
+            self.mock_package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = Path(root)
+            self.mock_package.directory = Path("test_dir")
+            self.mock_package.clone.side_effect = lambda destination, token: (destination / ".git").mkdir(parents=True) or (0, "", "")
+
+            self.assertTrue(self.handler.install())
+            self.assertTrue((modules_dir / "test_dir" / ".git").exists())
+            self.assertFalse((modules_dir / STAGING_DIR / "test_dir").exists())
+            self.assertTrue((modules_dir / ROLLBACK_DIR / "test_dir" / "old").exists())
+
+            self.assertTrue(self.handler.rollback())
+            self.assertTrue((modules_dir / "test_dir" / "old").exists())
+            self.assertTrue((modules_dir / ROLLBACK_DIR / "test_dir" / ".git").exists())
+
+    @patch("os.chdir")
+    def test_install_staged_failure(self, mock_chdir):
+        with TemporaryDirectory() as root:
+            modules_dir = Path(root) / "modules"
+            staging_dir = modules_dir / STAGING_DIR / "test_dir"
+            (staging_dir / ".git").mkdir(parents=True)
+            (staging_dir / "package.json").touch()
+
+            self.mock_package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = Path(root)
+            self.mock_package.directory = Path("test_dir")
+
+            with patch("mmpm.magicmirror.package.run_cmd", return_value=(1, "", "error")):
+                self.assertFalse(self.handler.install())
+
+            self.mock_package.clone.assert_not_called()
+            self.assertTrue(staging_dir.exists())
+            self.assertFalse((modules_dir / "test_dir").exists())
+
+    def __upgradable_clone__(self, root: Path) -> MagicMirrorPackage:
+        """Clones a repository into the modules directory, adds an untracked and an ignored file, then commits upstream."""
+
+        def git(*args):
+            subprocess.run(["git", "-c", "user.name=mmpm", "-c", "user.email=mmpm@localhost", *args], check=True, capture_output=True)
+
+        upstream = root / "upstream"
+        live_dir = root / "modules" / "MMM-Test"
+
+        upstream.mkdir()
+        (upstream / "MMM-Test.js").write_text("v1")
+        (upstream / ".gitignore").write_text("token.json\n")
+        git("-C", str(upstream), "init", "--quiet")
+        git("-C", str(upstream), "add", ".")
+        git("-C", str(upstream), "commit", "--quiet", "-m", "v1")
+        git("clone", "--quiet", str(upstream), str(live_dir))
+
+        (live_dir / "config.js").write_text("untracked")
+        (live_dir / "token.json").write_text("ignored")
+        (live_dir / "node_modules" / "dependency").mkdir(parents=True)
+        (live_dir / "node_modules" / "dependency" / "index.js").write_text("dependency")
+        (upstream / "MMM-Test.js").write_text("v2")
+        git("-C", str(upstream), "commit", "--quiet", "-am", "v2")
+
+        package = MagicMirrorPackage(title="MMM-Test", repository=str(upstream), directory="MMM-Test")
+        package.env = MagicMock()
+        package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = root
+        return package
+
+    def __assert_upgraded__(self, root: Path) -> None:
+        live_dir = root / "modules" / "MMM-Test"
+
+        self.assertEqual((live_dir / "MMM-Test.js").read_text(), "v2")
+        self.assertEqual((live_dir / "config.js").read_text(), "untracked")
+        self.assertEqual((live_dir / "token.json").read_text(), "ignored")
+        self.assertEqual((root / "modules" / ROLLBACK_DIR / "MMM-Test" / "MMM-Test.js").read_text(), "v1")
+
+        # the dependencies are hardlinked to the previous version, rather than copied
+        dependency = Path("node_modules") / "dependency" / "index.js"
+        self.assertTrue(os.path.samefile(live_dir / dependency, root / "modules" / ROLLBACK_DIR / "MMM-Test" / dependency))
+
+    def test_blue_green_upgrade_keeps_untracked_files(self):
+        self.addCleanup(os.chdir, os.getcwd())
+
+        with TemporaryDirectory() as root:
+            package = self.__upgradable_clone__(Path(root))
+            upgraded, _ = blue_green_upgrade([package], None)
+
+            self.assertEqual(upgraded, [package])
+            self.__assert_upgraded__(Path(root))
+
+    def test_forced_upgrade_keeps_untracked_files(self):
+        self.addCleanup(os.chdir, os.getcwd())
+
+        with TemporaryDirectory() as root:
+            package = self.__upgradable_clone__(Path(root))
+
+            self.assertTrue(package.upgrade(force=True))
+            self.__assert_upgraded__(Path(root))
+
+    def test_upgrade_keeps_a_single_rollback(self):
+        self.addCleanup(os.chdir, os.getcwd())
+
+        with TemporaryDirectory() as root:
+            package = self.__upgradable_clone__(Path(root))
+            modules_dir = Path(root) / "modules"
+
+            self.assertTrue(package.upgrade(force=True))
+            self.assertTrue(package.upgrade(force=True))
+
+            self.assertEqual([path.name for path in (modules_dir / ROLLBACK_DIR).iterdir()], ["MMM-Test"])
+            self.assertEqual(list((modules_dir / TRASH_DIR).iterdir()), [])
+            self.assertEqual((modules_dir / ROLLBACK_DIR / "MMM-Test" / "MMM-Test.js").read_text(), "v2")
+
+    def test_blue_green_upgrade(self):
+        restart = MagicMock(return_value=True)
+        staged, failed = MagicMock(), MagicMock()
+        staged.stage.return_value = True
+        failed.stage.return_value = False
+
+        upgraded, downtime = blue_green_upgrade([staged, failed], restart)
+
+        self.assertEqual(upgraded, [staged])
+        self.assertGreaterEqual(downtime, 0.0)
+        failed.activate.assert_not_called()
+        restart.assert_called_once()
+
+    def test_blue_green_upgrade_nothing_staged(self):
+        restart = MagicMock()
+        failed = MagicMock()
+        failed.stage.return_value = False
+
+        upgraded, _ = blue_green_upgrade([failed], restart)
+
+        self.assertEqual(upgraded, [])
+        restart.assert_not_called()
+
+    def test_blue_green_upgrade_cancelled(self):
+        restart = MagicMock()
+        token = CancellationToken()
+        staged, cancelled = MagicMock(), MagicMock()
+        staged.stage.return_value = True
+        cancelled.stage.side_effect = lambda token: token.cancel() or False
+
+        upgraded, _ = blue_green_upgrade([staged, cancelled], restart, token)
+
+        self.assertEqual(upgraded, [])
+        staged.stage.assert_called_once_with(token)
+        staged.activate.assert_not_called()
+        restart.assert_not_called()
@@ -6,14 +6,14 @@ from test.helpers import MockedMMPMEnv
 from unittest.mock import MagicMock, patch
 
 from mmpm.magicmirror.magicmirror import MagicMirror
+from mmpm.utils import BUILD_TIMEOUT, CancellationToken
 
 
 class MagicMirrorTestCase(unittest.TestCase):
     @patch("mmpm.magicmirror.magicmirror.repo_up_to_date")
-    @patch("mmpm.magicmirror.magicmirror.chdir")
+    @patch("mmpm.magicmirror.magicmirror.os.chdir")
     def test_update(self, mock_chdir, mock_repo_up_to_date):
         mock_repo_up_to_date.return_value = True
-        mock_chdir.return_value = None
 
         mm = MagicMirror()
         mm.env = MockedMMPMEnv()
@@ -21,10 +21,12 @@ class MagicMirrorTestCase(unittest.TestCase):
         root: PosixPath = mm.env.MMPM_MAGICMIRROR_ROOT.get()
         (root / ".git").mkdir(parents=True, exist_ok=True)
 
-        can_upgrade = mm.update()
+        token = CancellationToken()
+        can_upgrade = mm.update(token=token)
 
-        mock_chdir.assert_called_once_with(root)
-        mock_repo_up_to_date.assert_called_with(root)
+        # runs alongside other update checks, so it must not change the working directory of the process
+        mock_chdir.assert_not_called()
+        mock_repo_up_to_date.assert_called_with(root, token=token)
         self.assertTrue(can_upgrade)
         shutil.rmtree(root)
 
@@ -40,12 +42,12 @@ class MagicMirrorTestCase(unittest.TestCase):
 
         success = mm.upgrade()
 
-        mock_run_cmd.assert_called_with(["npm", "install"], progress=True)
+        mock_run_cmd.assert_called_with(["npm", "install"], progress=True, timeout=BUILD_TIMEOUT, token=None)
         self.assertEqual(success, True)
         shutil.rmtree(root)
 
     @patch("mmpm.magicmirror.magicmirror.run_cmd")
-    @patch("mmpm.magicmirror.magicmirror.chdir")
+    @patch("mmpm.magicmirror.magicmirror.os.chdir")
     def test_install(self, mock_chdir, mock_run_cmd):
         mock_run_cmd.return_value = (0, "", "")
         mock_chdir.return_value = None
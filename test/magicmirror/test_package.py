@@ -1,12 +1,15 @@
 #!/usr/bin/env python3
+import time
 import unittest
 from pathlib import Path
+from tempfile import TemporaryDirectory
 from unittest.mock import MagicMock, patch
 
 from faker import Faker
 
 from mmpm.env import MMPM_DEFAULT_ENV, MMPMEnv
-from mmpm.magicmirror.package import MagicMirrorPackage, __sanitize__
+from mmpm.magicmirror.package import STAGING_DIR, TRASH_DIR, MagicMirrorPackage, __sanitize__, empty_trash
+from mmpm.utils import GIT_TIMEOUT
 
 fake = Faker()
 
@@ -40,6 +43,17 @@ class TestMagicMirrorPackage(unittest.TestCase):
         self.assertTrue("is_installed" not in serialized_data)
         self.assertTrue("is_upgradable" not in serialized_data)
 
+    def test_enrich(self):
+        self.assertNotIn("stars", self.package.serialize())
+
+        self.package.enrich({"stars": 7, "forks": "N/A", "last_updated": "2021-01-01"})
+        serialized_data = self.package.serialize()
+
+        self.assertEqual(serialized_data["stars"], 7)
+        self.assertEqual(serialized_data["last_updated"], "2021-01-01")
+        self.assertNotIn("forks", serialized_data)
+        self.assertEqual(MagicMirrorPackage(**serialized_data).stars, 7)
+
     def test_equality(self):
         package1 = MagicMirrorPackage(
             title="Test Title",
@@ -82,13 +96,24 @@ class TestMagicMirrorPackage(unittest.TestCase):
         self.package.install()
         mock_install.install.assert_called_once()
 
-    @patch("mmpm.magicmirror.package.run_cmd")
-    def test_remove(self, mock_run_cmd):
-        self.package.env = MMPMEnv()
-        mock_run_cmd.return_value = (0, "", "")
-        success = self.package.remove()
-        self.assertTrue(success)
-        mock_run_cmd.assert_called()
+    def test_remove(self):
+        with TemporaryDirectory() as root:
+            modules_dir = Path(root) / "modules"
+            (modules_dir / self.package.directory / "node_modules").mkdir(parents=True)
+            (modules_dir / STAGING_DIR / self.package.directory).mkdir(parents=True)
+
+            self.package.env = MagicMock()
+            self.package.env.MMPM_MAGICMIRROR_ROOT.get.return_value = Path(root)
+
+            self.assertTrue(self.package.remove())
+            self.assertFalse((modules_dir / self.package.directory).exists())
+            self.assertFalse((modules_dir / STAGING_DIR / self.package.directory).exists())
+            self.assertEqual(len(list((modules_dir / TRASH_DIR).iterdir())), 2)
+
+            with patch("mmpm.magicmirror.package.MMPMEnv", return_value=self.package.env):
+                self.assertEqual(empty_trash(), 3)
+
+            self.assertEqual(list((modules_dir / TRASH_DIR).iterdir()), [])
 
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_clone(self, mock_run_cmd):
@@ -103,29 +128,52 @@ class TestMagicMirrorPackage(unittest.TestCase):
                 str(modules / self.package.directory),
             ],
             message="Downloading",
+            timeout=GIT_TIMEOUT,
+            token=None,
         )
 
-    @patch("os.chdir")
-    @patch("mmpm.magicmirror.package.repo_up_to_date")
+    @patch("mmpm.magicmirror.package.UpdateCheckCache")
+    @patch("mmpm.magicmirror.package.repo_heads")
     @patch("pathlib.PosixPath.exists")
-    def test_update(self, mock_exists, mock_repo_up_to_date, mock_chdir):
+    def test_update(self, mock_exists, mock_repo_heads, mock_checks):
         mock_exists.return_value = True
-        mock_repo_up_to_date.return_value = True
+        mock_repo_heads.return_value = ("local", "remote")
         self.package.env = MMPMEnv()
         expected_dir = MMPM_DEFAULT_ENV.get("MMPM_MAGICMIRROR_ROOT") / "modules" / self.package.directory
-        self.package.update()
-        mock_chdir.assert_called_with(expected_dir)
+        self.assertTrue(self.package.update())
+        mock_repo_heads.assert_called_once_with(expected_dir)
+        mock_checks.return_value.set.assert_called_once_with(str(expected_dir), "local", "remote")
         self.assertTrue(self.package.is_upgradable)
 
-    @patch("os.chdir")
-    @patch("mmpm.magicmirror.package.repo_up_to_date")
+    @patch("mmpm.magicmirror.package.UpdateCheckCache")
+    @patch("mmpm.magicmirror.package.repo_heads")
     @patch("pathlib.PosixPath.exists")
-    def test_update_no_changes(self, mock_exists, mock_repo_up_to_date, mock_chdir):
-        mock_repo_up_to_date.return_value = False
+    def test_update_no_changes(self, mock_exists, mock_repo_heads, mock_checks):
+        mock_repo_heads.return_value = ("local", "local")
         self.package.env = MMPMEnv()
-        expected_dir = MMPM_DEFAULT_ENV.get("MMPM_MAGICMIRROR_ROOT") / "modules" / self.package.directory
         self.package.update()
-        mock_chdir.assert_called_with(expected_dir)
+        self.assertFalse(self.package.is_upgradable)
+
+    @patch("mmpm.magicmirror.package.UpdateCheckCache")
+    @patch("mmpm.magicmirror.package.repo_heads")
+    @patch("pathlib.PosixPath.exists")
+    def test_update_recently_checked(self, mock_exists, mock_repo_heads, mock_checks):
+        mock_repo_heads.return_value = ("local", None)
+        mock_checks.return_value.get.return_value = {"local": "local", "remote": "remote", "timestamp": time.time()}
+        self.package.env = MMPMEnv()
+
+        self.assertFalse(self.package.update(max_age=60))
+
+        # only the local HEAD is read, the remote isn't fetched
+        mock_repo_heads.assert_called_once()
+        self.assertEqual(mock_repo_heads.call_args.kwargs, {"fetch": False})
+        self.assertTrue(self.package.is_upgradable)
+
+        mock_checks.return_value.get.return_value["timestamp"] = 0
+        mock_repo_heads.return_value = ("local", "local")
+        self.package.update(max_age=60)
+
+        self.assertEqual(mock_repo_heads.call_count, 3)
         self.assertFalse(self.package.is_upgradable)
 
     @patch("os.chdir")
@@ -139,6 +187,23 @@ class TestMagicMirrorPackage(unittest.TestCase):
         self.package.upgrade()
         mock_chdir.assert_called_with(expected_dir)
 
+    @patch("os.chdir")
+    @patch("mmpm.magicmirror.package.run_cmd")
+    def test_upgrade_without_prefetch(self, mock_run_cmd, mock_chdir):
+        mock_run_cmd.side_effect = [(0, "Already up to date.", ""), (0, "", "")]
+        self.package.env = MMPMEnv()
+        self.assertTrue(self.package.upgrade())
+        mock_run_cmd.assert_called_with(["git", "pull"], message="Retrieving changes", timeout=GIT_TIMEOUT, token=None)
+
+    @patch("mmpm.magicmirror.package.run_cmd")
+    @patch("pathlib.PosixPath.exists")
+    def test_prefetch(self, mock_exists, mock_run_cmd):
+        mock_exists.return_value = True
+        self.package.env = MMPMEnv()
+        expected_dir = MMPM_DEFAULT_ENV.get("MMPM_MAGICMIRROR_ROOT") / "modules" / self.package.directory
+        self.package.prefetch()
+        mock_run_cmd.assert_called_once_with(["git", "-C", str(expected_dir), "fetch", "--quiet", "origin"], background=True)
+
     @patch("os.chdir")
     @patch("mmpm.magicmirror.package.run_cmd")
     def test_upgrade_failure(self, mock_run_cmd, mock_chdir):
@@ -8,20 +8,22 @@ from unittest.mock import MagicMock, patch
 import requests
 from faker import Faker
 
-from mmpm.magicmirror.package import MagicMirrorPackage, RemotePackage
+from mmpm.magicmirror.package import MagicMirrorPackage, RemotePackage, fetch_remote_details
 
 fake = Faker()
 
 
 class TestRemotePackage(unittest.TestCase):
-    @patch("mmpm.magicmirror.package.requests.head")
-    @patch("mmpm.magicmirror.package.requests.Response")
+    @patch("mmpm.magicmirror.package.RemoteMetadataCache")
+    @patch("mmpm.magicmirror.package.HTTPClient.head")
+    @patch("mmpm.magicmirror.package.safe_get_request")
     @patch("mmpm.magicmirror.package.json.loads")
-    def test_health(self, mock_json_loads, mock_response, mock_head):
+    def test_health(self, mock_json_loads, mock_safe_get_request, mock_head, mock_cache):
         data = {"rate": {"reset": 1234567890, "remaining": 5}}
 
-        mock_response.status_code = 200
-        mock_response.text = json.dumps(data)
+        mock_cache.return_value.get_health.return_value = None
+        mock_cache.return_value.rate_limit.return_value = None
+        mock_safe_get_request.return_value = MagicMock(status_code=200, text=json.dumps(data))
         mock_json_loads.return_value = data
         mock_head.side_effect = [
             MagicMock(status_code=200),
@@ -36,6 +38,24 @@ class TestRemotePackage(unittest.TestCase):
         )
         self.assertEqual(health["gitlab"]["error"], "")
         self.assertEqual(health["bitbucket"]["error"], "")
+        mock_cache.return_value.set_health.assert_called_once()
+        mock_cache.return_value.track_rate_limit.assert_called_once_with("github", {"X-RateLimit-Remaining": 5, "X-RateLimit-Reset": 1234567890})
+
+    @patch("mmpm.magicmirror.package.RemoteMetadataCache")
+    @patch("mmpm.magicmirror.package.HTTPClient.head")
+    @patch("mmpm.magicmirror.package.safe_get_request")
+    def test_health_cached(self, mock_safe_get_request, mock_head, mock_cache):
+        cached = {"gitlab": {"error": "", "warning": ""}, "bitbucket": {"error": "", "warning": ""}}
+
+        mock_cache.return_value.get_health.return_value = cached
+        mock_cache.return_value.rate_limit.return_value = {"reset": 1234567890, "remaining": 0}
+
+        health = RemotePackage.health()
+
+        mock_head.assert_not_called()
+        mock_safe_get_request.assert_not_called()
+        self.assertTrue(health["github"]["error"].startswith("Unable to use `--verbose` option"))
+        self.assertEqual(health["gitlab"], cached["gitlab"])
 
     @patch("mmpm.magicmirror.package.requests.Response")
     @patch("mmpm.magicmirror.package.safe_get_request")
@@ -43,6 +63,8 @@ class TestRemotePackage(unittest.TestCase):
         package = MagicMock()
         package.repository = "https://github.com/user/repo.git"
         remote_package = RemotePackage(package)
+        remote_package.cache = MagicMock()
+        remote_package.cache.get.return_value = None
 
         stars = fake.pyint()
         open_issues = fake.pyint()
@@ -73,6 +95,27 @@ class TestRemotePackage(unittest.TestCase):
             },
         )
 
+    @patch("mmpm.magicmirror.package.safe_get_request")
+    def test_serialize_cached(self, mock_safe_get_request):
+        remote_package = RemotePackage(MagicMirrorPackage(repository="https://github.com/user/repo.git"))
+        remote_package.cache = MagicMock()
+        remote_package.cache.get.return_value = {"details": {"stars": 5}, "timestamp": 0}
+        remote_package.cache.is_stale.return_value = False
+
+        self.assertEqual(remote_package.serialize(), {"stars": 5})
+        mock_safe_get_request.assert_not_called()
+
+    @patch("mmpm.magicmirror.package.Thread")
+    def test_serialize_stale(self, mock_thread):
+        remote_package = RemotePackage(MagicMirrorPackage(repository="https://github.com/user/repo.git"))
+        remote_package.cache = MagicMock()
+        remote_package.cache.get.return_value = {"details": {"stars": 5}, "timestamp": 0}
+        remote_package.cache.is_stale.return_value = True
+        remote_package.cache.claim.return_value = True
+
+        self.assertEqual(remote_package.serialize(), {"stars": 5})
+        mock_thread.assert_called_once_with(target=remote_package.refresh, daemon=True)
+
     def test_format_bitbucket_api_details(self):
         remote_package = RemotePackage(MagicMirrorPackage())
         data = {
@@ -96,3 +139,60 @@ class TestRemotePackage(unittest.TestCase):
                 "forks": 5,
             },
         )
+
+    @patch("mmpm.magicmirror.package.RemotePackage.refresh")
+    @patch("mmpm.magicmirror.package.RemoteMetadataCache")
+    def test_fetch_remote_details(self, mock_cache, mock_refresh):
+        cache = mock_cache.return_value
+        fresh = MagicMirrorPackage(title="fresh", repository="https://github.com/user/fresh")
+        stale = MagicMirrorPackage(title="stale", repository="https://gitlab.com/user/stale")
+        unknown = MagicMirrorPackage(title="unknown", repository="https://example.com/user/unknown")
+
+        cache.get.side_effect = lambda repository: {"details": {"stars": 1}} if repository == fresh.repository else None
+        cache.is_stale.side_effect = lambda repository: repository != fresh.repository
+        cache.claim.return_value = True
+        mock_refresh.return_value = {"stars": 2}
+
+        details = fetch_remote_details([fresh, stale, unknown])
+
+        self.assertEqual(details, {fresh.repository: {"stars": 1}, stale.repository: {"stars": 2}, unknown.repository: {}})
+        mock_refresh.assert_called_once()
+
+    @patch("mmpm.magicmirror.package.RemotePackage.refresh")
+    @patch("mmpm.magicmirror.package.RemoteMetadataCache")
+    def test_fetch_remote_details_quota_exhausted(self, mock_cache, mock_refresh):
+        cache = mock_cache.return_value
+        package = MagicMirrorPackage(title="stale", repository="https://github.com/user/stale")
+
+        cache.get.return_value = {"details": {"stars": 1}}
+        cache.is_stale.return_value = True
+        cache.claim.return_value = True
+        cache.rate_limit.return_value = {"remaining": 0, "reset": 0}
+
+        self.assertEqual(fetch_remote_details([package]), {package.repository: {"stars": 1}})
+        mock_refresh.assert_not_called()
+        cache.release.assert_called_once_with(package.repository)
+
+    @patch("mmpm.magicmirror.package.safe_get_request")
+    def test_refresh_not_modified(self, mock_safe_get_request):
+        package = MagicMock()
+        package.repository = "https://github.com/user/repo"
+        remote_package = RemotePackage(package)
+        remote_package.cache = MagicMock()
+        remote_package.cache.get.return_value = {"details": {"stars": 5}, "timestamp": 0, "etag": 'W/"abc"'}
+
+        response = requests.Response()
+        response.status_code = 304
+        response.headers["ETag"] = 'W/"abc"'
+        mock_safe_get_request.return_value = response
+
+        self.assertEqual(remote_package.refresh(), {"stars": 5})
+        self.assertEqual(mock_safe_get_request.call_args.kwargs["headers"]["If-None-Match"], 'W/"abc"')
+        remote_package.cache.set.assert_called_once_with(package.repository, {"stars": 5}, etag='W/"abc"')
+
+    def test_github_token_is_read_from_the_process_environment(self):
+        with patch.dict("os.environ", {"MMPM_GITHUB_TOKEN": "ghp_secret"}):
+            self.assertEqual(RemotePackage.__github_headers__()["Authorization"], "Bearer ghp_secret")
+
+        with patch.dict("os.environ", clear=True):
+            self.assertNotIn("Authorization", RemotePackage.__github_headers__())
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+import json
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from mmpm.subcommands import completers
+
+
+class TestCompleters(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.modules = Path(directory.name) / "modules"
+        (self.modules / "MMM-Installed").mkdir(parents=True)
+        self.index_file = Path(directory.name) / "mmpm-completion-index.json"
+
+        patcher = patch("mmpm.constants.paths.MMPM_COMPLETION_INDEX_FILE", self.index_file)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.write_index(installed=["MMM-Installed"], modules_mtime=self.modules.stat().st_mtime)
+
+    def write_index(self, installed, modules_mtime):
+        index = {
+            "packages": {"MMM-Installed": "MMM-Installed", "MMM-Available": "MMM-Available", "Other": "Other"},
+            "installed": installed,
+            "modules": str(self.modules),
+            "modules_mtime": modules_mtime,
+        }
+
+        self.index_file.write_text(json.dumps(index), encoding="utf-8")
+
+    def test_packages(self):
+        self.assertEqual(completers.packages("MMM"), ["MMM-Installed", "MMM-Available"])
+
+    def test_installed_packages(self):
+        self.assertEqual(completers.installed_packages(""), ["MMM-Installed"])
+
+    def test_available_packages(self):
+        self.assertEqual(completers.available_packages("MMM"), ["MMM-Available"])
+
+    def test_installed_packages_after_modules_changed(self):
+        (self.modules / "MMM-Available").mkdir()
+        self.write_index(installed=["MMM-Installed"], modules_mtime=0)
+
+        self.assertEqual(completers.installed_packages("MMM"), ["MMM-Installed", "MMM-Available"])
+
+    def test_missing_index(self):
+        os.remove(self.index_file)
+        self.assertEqual(completers.packages(""), [])
+        self.assertEqual(completers.installed_packages(""), [])
@@ -2,7 +2,9 @@
 import unittest
 from unittest.mock import MagicMock, patch
 
-from mmpm.subcommands.loader import Loader
+import mmpm.subcommands
+from mmpm.subcommands.loader import LazyLoader, Loader
+from mmpm.subcommands.manifest import SUBCOMMANDS
 
 
 class TestLoader(unittest.TestCase):
@@ -26,3 +28,76 @@ class TestLoader(unittest.TestCase):
     def test_loader_fail(self):
         loader = Loader([], "non_existent_python_module", "app_name", "test_prefix_")
         self.assertEqual(len(loader.objects.keys()), 0)
+
+
+class TestLazyLoader(unittest.TestCase):
+    def setUp(self):
+        self.manifest = {
+            "first": ("_sub_cmd_first", "First", "First subcommand of {app_name}"),
+            "second": ("_sub_cmd_second", "Second", "Second subcommand"),
+        }
+        self.loader = LazyLoader(self.manifest, "module_name", "app_name")
+
+    def test_invoked(self):
+        self.assertEqual(self.loader.invoked(["second", "--flag"]), "second")
+        self.assertEqual(self.loader.invoked(["--help"]), None)
+        self.assertEqual(self.loader.invoked(["unknown", "first"]), None)
+
+    @patch.dict("os.environ", {"_ARGCOMPLETE": "1", "COMP_LINE": "mmpm first --fl", "COMP_POINT": "12"})
+    def test_argv_when_completing(self):
+        self.assertEqual(LazyLoader.argv(), ["first", "-"])
+
+    @patch("mmpm.subcommands.loader.import_module")
+    def test_register_only_imports_invoked_subcommand(self, mock_import_module):
+        FakeClass = MagicMock()
+        FakeClass.return_value.name = "second"
+        mock_import_module.return_value = MagicMock(Second=FakeClass)
+        subparser = MagicMock()
+
+        self.loader.register(subparser, ["second"])
+
+        mock_import_module.assert_called_once_with("module_name._sub_cmd_second")
+        FakeClass.return_value.register.assert_called_once_with(subparser)
+        subparser.add_parser.assert_called_once_with("first", help="First subcommand of app_name")
+        self.assertEqual(list(self.loader.objects.keys()), ["second"])
+
+    @patch("mmpm.subcommands.loader.import_module")
+    def test_register_help_imports_nothing(self, mock_import_module):
+        subparser = MagicMock()
+        self.loader.register(subparser, ["--help"])
+
+        mock_import_module.assert_not_called()
+        self.assertEqual(subparser.add_parser.call_count, 2)
+        self.assertEqual(self.loader.objects, {})
+
+    @patch.dict("os.environ", {"_ARGCOMPLETE": "1", "COMP_LINE": "mmpm second MMM", "COMP_POINT": "15"})
+    @patch("mmpm.subcommands.loader.import_module")
+    def test_register_package_completion_imports_nothing(self, mock_import_module):
+        completer = MagicMock()
+        loader = LazyLoader(self.manifest, "module_name", "app_name", completers={"second": completer})
+        subparser = MagicMock()
+
+        loader.register(subparser, ["second", "MMM"])
+
+        mock_import_module.assert_not_called()
+        subparser.add_parser.return_value.add_argument.assert_called_once_with("packages", nargs="*")
+        self.assertEqual(subparser.add_parser.return_value.add_argument.return_value.completer, completer)
+
+    @patch.dict("os.environ", {"_ARGCOMPLETE": "1", "COMP_LINE": "mmpm second --", "COMP_POINT": "14"})
+    @patch("mmpm.subcommands.loader.import_module")
+    def test_register_option_completion_imports_subcommand(self, mock_import_module):
+        loader = LazyLoader(self.manifest, "module_name", "app_name", completers={"second": MagicMock()})
+        loader.register(MagicMock(), ["second", "--"])
+
+        mock_import_module.assert_called_once_with("module_name._sub_cmd_second")
+
+    def test_manifest_matches_subcommand_modules(self):
+        loader = Loader(mmpm.subcommands.__path__, "mmpm.subcommands", "app_name", "_sub_cmd")
+
+        self.assertEqual(sorted(loader.objects.keys()), sorted(SUBCOMMANDS.keys()))
+
+        for name, (module, class_name, help_text) in SUBCOMMANDS.items():
+            subcommand = loader.objects[name]
+            self.assertEqual(type(subcommand).__module__, f"mmpm.subcommands.{module}")
+            self.assertEqual(type(subcommand).__name__, class_name)
+            self.assertEqual(subcommand.help, help_text.format(app_name="app_name"))
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+import json
+import tempfile
+import unittest
+from argparse import Namespace
+from pathlib import Path
+from unittest.mock import patch
+
+from mmpm.__version__ import version
+from mmpm.subcommands._sub_cmd_upgrade import Upgrade
+from mmpm.utils import update_available
+
+
+@patch("mmpm.subcommands._sub_cmd_upgrade.MagicMirrorController")
+@patch("mmpm.subcommands._sub_cmd_upgrade.MagicMirror")
+class TestUpgrade(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+
+        self.upgrades_file = Path(directory.name) / "mmpm-available-upgrades.json"
+        self.upgrades_file.write_text(json.dumps({"mmpm": False, "MagicMirror": False, "packages": []}), encoding="utf-8")
+
+        for patcher in (
+            patch("mmpm.constants.paths.MMPM_AVAILABLE_UPGRADES_FILE", self.upgrades_file),
+            patch("mmpm.constants.paths.MMPM_VERSION_CHECK_FILE", Path(directory.name) / "mmpm-version-check.json"),
+            patch("mmpm.magicmirror.database.MagicMirrorDatabase.is_initialized", return_value=True),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @patch("mmpm.utils.HTTPClient.get")
+    def test_up_to_date_after_version_check(self, mock_get, mock_magicmirror, mock_controller):
+        mock_get.return_value.json.return_value = {"info": {"version": version}}
+        self.assertFalse(update_available())
+
+        args = Namespace(packages=[], rollback=False, force=False, blue_green=False, assume_yes=True)
+
+        with patch("mmpm.subcommands._sub_cmd_upgrade.logger") as mock_logger:
+            Upgrade("mmpm").exec(args, [])
+
+        mock_logger.info.assert_called_once_with("All packages and applications are up to date.\n ")
+        mock_magicmirror.return_value.upgrade.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,46 @@
 #!/usr/bin/env python3
 import json
+import os
 import random
+import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import MagicMock, mock_open, patch
+from unittest.mock import patch
 
 from faker import Faker
 
-from mmpm.env import MMPM_DEFAULT_ENV, EnvVar, MMPMEnv
+from mmpm.env import MMPM_DEFAULT_ENV, MMPM_SECRET_ENV, EnvSnapshot, EnvVar, MMPMEnv
 from mmpm.singleton import Singleton
 
 fake = Faker()
 
 
-class TestEnvVar(unittest.TestCase):
+class EnvFileTestCase(unittest.TestCase):
+    """Points the MMPM_ENV_FILE at a temporary file, and gives every test a fresh snapshot that checks the file on each read"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env_file = Path(self.tmp.name) / "mmpm-env.json"
+        self.env_file.write_text("{}", encoding="utf-8")
+
+        self.snapshot = EnvSnapshot(interval=0)
+
+        for patcher in (patch("mmpm.constants.paths.MMPM_ENV_FILE", self.env_file), patch("mmpm.env.snapshot", self.snapshot)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_env(self, env_vars: dict):
+        self.env_file.write_text(json.dumps(env_vars), encoding="utf-8")
+        # make sure the modification is noticed, even on filesystems with a coarse mtime resolution
+        stat = os.stat(self.env_file)
+        os.utime(self.env_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+class TestEnvVar(EnvFileTestCase):
     def setUp(self):
+        super().setUp()
         self.key = random.choice([key for key in MMPM_DEFAULT_ENV])
         self.default_value = MMPM_DEFAULT_ENV[self.key]
 
@@ -26,38 +52,86 @@ class TestEnvVar(unittest.TestCase):
         elif isinstance(value_type, bool):
             return fake.pybool()
 
-    @patch("mmpm.env.open", new_callable=mock_open)
-    def test_get_existing_variable(self, mock_file):
+    def test_get_existing_variable(self):
         random_value = self.generate_random_value(self.default_value)
         env_var = EnvVar(name=self.key, default=self.default_value)
 
         primitive = random_value if isinstance(random_value, bool) else str(random_value)
-        mock_file.return_value.read.return_value = json.dumps({self.key: primitive})
+        self.write_env({self.key: primitive})
 
         self.assertEqual(env_var.get(), random_value)
 
     def test_get_nonexistent_variable_with_default(self):
         env_var = EnvVar(name="MMPM_NONEXISTENT_VAR", default=fake.pystr())
+        self.assertEqual(env_var.get(), env_var.default)
 
-        with patch("mmpm.env.open", mock_open(read_data="{}")):
-            value = env_var.get()
-            self.assertEqual(value, env_var.default)
-
-    @patch("mmpm.env.open", new_callable=mock_open)
-    def test_modified_file_detection(self, mock_file):
+    def test_modified_file_detection(self):
         env_var = EnvVar(name=self.key, default=self.default_value)
-        new_value = self.generate_random_value(self.default_value)
+        self.assertEqual(env_var.get(), self.default_value)
 
+        new_value = self.generate_random_value(self.default_value)
         primitive = new_value if isinstance(new_value, bool) else str(new_value)
-        mock_file.return_value.read.return_value = json.dumps({self.key: primitive})
+        self.write_env({self.key: primitive})
+
+        self.assertEqual(env_var.get(), new_value)
+
+    def test_file_is_parsed_once_per_change(self):
+        env_vars = [EnvVar(name=key, default=value) for key, value in MMPM_DEFAULT_ENV.items()]
+
+        with patch("mmpm.env.json.load", wraps=json.load) as mock_load:
+            for _ in range(3):
+                for env_var in env_vars:
+                    env_var.get()
+
+            self.assertEqual(mock_load.call_count, 1)
+
+            self.write_env({"MMPM_LOG_LEVEL": "DEBUG"})
+
+            for env_var in env_vars:
+                env_var.get()
+
+            self.assertEqual(mock_load.call_count, 2)
+
+    def test_file_is_not_checked_within_interval(self):
+        self.snapshot.interval = 3600
+        env_var = EnvVar(name="MMPM_LOG_LEVEL", default="INFO")
+        self.assertEqual(env_var.get(), "INFO")
+
+        self.write_env({"MMPM_LOG_LEVEL": "DEBUG"})
+
+        with patch("mmpm.env.os.stat") as mock_stat:
+            self.assertEqual(env_var.get(), "INFO")
+            mock_stat.assert_not_called()
+
+    def test_invalid_file_uses_default(self):
+        self.env_file.write_text("{invalid_json", encoding="utf-8")
+        env_var = EnvVar(name=self.key, default=self.default_value)
+        self.assertEqual(env_var.get(), self.default_value)
 
-        with patch("mmpm.env.getmtime", return_value=12345):
-            self.assertEqual(env_var.get(), new_value)
+    def test_empty_file_is_not_a_warning(self):
+        env_var = EnvVar(name=self.key, default=self.default_value)
+
+        for contents in ("", " \n"):
+            self.write_env({})
+            self.env_file.write_text(contents, encoding="utf-8")
+
+            with patch("mmpm.env.print", create=True) as mock_print:
+                self.assertEqual(env_var.get(), self.default_value)
+                mock_print.assert_not_called()
 
+    def test_invalid_file_is_a_warning(self):
+        self.env_file.write_text("{invalid_json", encoding="utf-8")
 
-class TestMMPMEnv(unittest.TestCase):
+        with patch("mmpm.env.print", create=True) as mock_print:
+            EnvVar(name=self.key, default=self.default_value).get()
+            mock_print.assert_called_once()
+
+
+class TestMMPMEnv(EnvFileTestCase):
     def setUp(self):
-        Singleton._instances = {}
+        super().setUp()
+        Singleton._instances.pop(MMPMEnv, None)
+        self.addCleanup(Singleton._instances.pop, MMPMEnv, None)
 
     def test_singleton_instance(self):
         env1 = MMPMEnv()
@@ -70,23 +144,68 @@ class TestMMPMEnv(unittest.TestCase):
         self.assertIsInstance(env.MMPM_MAGICMIRROR_URI, EnvVar)
         # Test other environment variables similarly
 
+    def test_missing_defaults_are_written(self):
+        self.write_env({"MMPM_MAGICMIRROR_URI": "http://example.com:8080"})
+        MMPMEnv()
+
+        written = json.loads(self.env_file.read_text(encoding="utf-8"))
+        self.assertEqual(written["MMPM_MAGICMIRROR_URI"], "http://example.com:8080")
+        self.assertEqual(written["MMPM_MAGICMIRROR_ROOT"], str(MMPM_DEFAULT_ENV["MMPM_MAGICMIRROR_ROOT"]))
+        self.assertEqual(set(written), set(MMPM_DEFAULT_ENV))
+
+    def test_complete_file_is_not_rewritten(self):
+        self.write_env({key: str(value) if isinstance(value, Path) else value for key, value in MMPM_DEFAULT_ENV.items()})
+        mtime = os.stat(self.env_file).st_mtime_ns
+
+        with patch("mmpm.env.MMPMEnv.write") as mock_write:
+            MMPMEnv()
+            mock_write.assert_not_called()
+
+        self.assertEqual(os.stat(self.env_file).st_mtime_ns, mtime)
+
     def test_environment_variable_update(self):
         env = MMPMEnv()
         new_uri = "http://example.com:8080"
-        with patch(
-            "mmpm.env.open",
-            mock_open(read_data=json.dumps({"MMPM_MAGICMIRROR_URI": new_uri})),
-        ):
-            self.assertEqual(env.MMPM_MAGICMIRROR_URI.get(), new_uri)
+        self.write_env({**env.get(), "MMPM_MAGICMIRROR_URI": new_uri})
+        self.assertEqual(env.MMPM_MAGICMIRROR_URI.get(), new_uri)
+
+    def test_write_updates_snapshot_immediately(self):
+        env = MMPMEnv()
+        self.snapshot.interval = 3600
+        self.assertEqual(env.MMPM_LOG_LEVEL.get(), "INFO")
+
+        env.write({**env.get(), "MMPM_LOG_LEVEL": "DEBUG"})
+
+        self.assertEqual(env.MMPM_LOG_LEVEL.get(), "DEBUG")
+        self.assertEqual(json.loads(self.env_file.read_text(encoding="utf-8"))["MMPM_LOG_LEVEL"], "DEBUG")
+
+    def test_write_is_atomic(self):
+        env = MMPMEnv()
+
+        with patch("mmpm.env.os.replace", wraps=os.replace) as mock_replace:
+            env.write({**env.get(), "MMPM_LOG_LEVEL": "DEBUG"})
+            self.assertEqual(mock_replace.call_args.args[1], self.env_file)
+
+        self.assertEqual(list(Path(self.tmp.name).iterdir()), [self.env_file])  # no temporary file is left behind
+        self.assertEqual(json.loads(self.env_file.read_text(encoding="utf-8"))["MMPM_LOG_LEVEL"], "DEBUG")
+
+    def test_secrets_are_never_read_from_or_written_to_the_file(self):
+        env = MMPMEnv()
+        self.write_env({**env.get(), "MMPM_GITHUB_TOKEN": "ghp_secret"})
+
+        self.assertNotIn("MMPM_GITHUB_TOKEN", env.get())
+
+        env.write({**env.get(), "MMPM_GITHUB_TOKEN": "ghp_secret"})
+        self.assertFalse(set(MMPM_SECRET_ENV) & set(json.loads(self.env_file.read_text(encoding="utf-8"))))
 
     def test_environment_file_error_handling(self):
-        with patch("mmpm.env.open", mock_open(read_data="{invalid_json")):
-            env = MMPMEnv()
-            # Test default values are used in case of JSON error
-            self.assertEqual(
-                env.MMPM_MAGICMIRROR_ROOT.get(),
-                MMPM_DEFAULT_ENV["MMPM_MAGICMIRROR_ROOT"],
-            )
+        self.env_file.write_text("{invalid_json", encoding="utf-8")
+        env = MMPMEnv()
+        # Test default values are used in case of JSON error
+        self.assertEqual(
+            env.MMPM_MAGICMIRROR_ROOT.get(),
+            MMPM_DEFAULT_ENV["MMPM_MAGICMIRROR_ROOT"],
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+import unittest
+
+from mmpm.profiling import parse_import_times
+
+
+class TestProfiling(unittest.TestCase):
+    def test_parse_import_times(self):
+        output = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |     mmpm.constants.paths\n"
+            "import time:       300 |        420 |   mmpm.constants\n"
+            "[ERROR] something else\n"
+        )
+
+        timings, other = parse_import_times(output)
+
+        self.assertEqual(timings["mmpm.constants.paths"], {"self": 120, "cumulative": 120})
+        self.assertEqual(timings["mmpm.constants"], {"self": 300, "cumulative": 420})
+        self.assertEqual(other, ["[ERROR] something else\n"])
@@ -1,10 +1,14 @@
 #!/usr/bin/env python3
 import json
 import os
+import time
 import unittest
+from contextlib import contextmanager
 from pathlib import Path, PosixPath
 from shutil import rmtree
 from subprocess import DEVNULL
+from tempfile import TemporaryDirectory
+from threading import Event, Thread, Timer
 from unittest.mock import MagicMock, mock_open, patch
 from uuid import uuid4
 
@@ -12,7 +16,26 @@ import requests
 from faker import Faker
 
 from mmpm.__version__ import major, version
-from mmpm.utils import get_host_ip, get_pids, kill_pids_of_process, run_cmd, safe_get_request, update_available
+from mmpm.singleton import Singleton
+from mmpm.utils import (
+    GIT_TIMEOUT,
+    CancellationToken,
+    CircuitBreaker,
+    CircuitOpenError,
+    HostScheduler,
+    HTTPClient,
+    TokenBucket,
+    cancel_operation,
+    get_host_ip,
+    get_pids,
+    kill_pids_of_process,
+    operation,
+    repo_heads,
+    run_cmd,
+    run_phases,
+    safe_get_request,
+    update_available,
+)
 
 fake = Faker()
 
@@ -25,30 +48,83 @@ class TestUtils(unittest.TestCase):
         host_ip = get_host_ip()
         self.assertEqual(host_ip, ip)
 
-    @patch("mmpm.utils.subprocess.Popen")
     @patch("mmpm.utils.yaspin")
-    def test_run_cmd_progress(self, mock_yaspin, mock_popen):
-        process_mock = MagicMock()
-        process_mock.communicate.return_value = (b"output", b"error")
-        process_mock.returncode = 0
-        mock_popen.return_value.__enter__.return_value = process_mock
-        return_code, stdout, stderr = run_cmd(["echo", "hello"], progress=True)
+    def test_run_cmd_progress(self, mock_yaspin):
+        return_code, stdout, stderr = run_cmd(["sh", "-c", "echo output; echo error >&2"], progress=True)
 
         self.assertEqual(return_code, 0)
-        self.assertEqual(stdout, "output")
-        self.assertEqual(stderr, "error")
+        self.assertEqual(stdout, "output\n")
+        self.assertTrue(stderr.endswith("error\n"))
+        mock_yaspin.assert_called_once()
 
-    @patch("mmpm.utils.subprocess.Popen")
-    def test_run_cmd_no_progress(self, mock_popen):
-        process_mock = MagicMock()
-        process_mock.communicate.return_value = (b"output", b"error")
-        process_mock.returncode = 0
-        mock_popen.return_value.__enter__.return_value = process_mock
-        return_code, stdout, stderr = run_cmd(["echo", "hello"], progress=False)
+    def test_run_cmd_no_progress(self):
+        return_code, stdout, stderr = run_cmd(["sh", "-c", "echo output; echo error >&2; exit 3"], progress=False)
+
+        self.assertEqual(return_code, 3)
+        self.assertEqual(stdout, "output\n")
+        self.assertTrue(stderr.endswith("error\n"))
+
+    @patch("mmpm.utils.logger")
+    def test_run_cmd_metrics(self, mock_logger):
+        run_cmd(["true"], progress=False)
+        metrics = mock_logger.debug.call_args.kwargs["extra"]["metrics"]
+
+        self.assertEqual(metrics["command"], ["true"])
+        self.assertEqual(metrics["returncode"], 0)
+        self.assertGreaterEqual(metrics["wall_time"], 0)
+        self.assertGreater(metrics["max_rss_kb"], 0)
+
+    def test_run_cmd_timeout(self):
+        return_code, _, stderr = run_cmd(["sleep", "10"], progress=False, timeout=0.1)
+
+        self.assertNotEqual(return_code, 0)
+        self.assertIn("timed out", stderr)
+
+    def test_run_cmd_cancelled(self):
+        token = CancellationToken()
+        Timer(0.1, token.cancel).start()
+        return_code, _, stderr = run_cmd(["sleep", "10"], progress=False, token=token)
+
+        self.assertNotEqual(return_code, 0)
+        self.assertIn("cancelled", stderr)
+
+    def test_cancel_operation(self):
+        with operation("install") as token, operation("upgrade") as other:
+            Timer(0.1, cancel_operation, args=("install",)).start()
+            return_code, _, stderr = run_cmd(["sleep", "10"], progress=False, token=token)
+
+            self.assertNotEqual(return_code, 0)
+            self.assertIn("cancelled", stderr)
+            self.assertFalse(other.cancelled)
+
+        # the operation is no longer running
+        self.assertFalse(cancel_operation("install"))
+
+    def test_operations_sharing_an_id(self):
+        with operation("install") as token:
+            with operation("install") as other:
+                self.assertIs(token, other)
+
+            self.assertTrue(cancel_operation("install"))
+
+        self.assertFalse(cancel_operation("install"))
+
+    def test_run_cmd_not_killed_once_reaped(self):
+        token = CancellationToken()
+        cancelling = Thread(target=token.cancel)
+        wait4 = os.wait4
+
+        def reap(pid, options):
+            result = wait4(pid, options)
+            cancelling.start()  # the pid is free to be reused from here on
+            return result
+
+        with patch("mmpm.utils.os.wait4", side_effect=reap), patch("os.kill") as mock_kill:
+            return_code, _, _ = run_cmd(["true"], progress=False, token=token)
+            cancelling.join(5)
 
         self.assertEqual(return_code, 0)
-        self.assertEqual(stdout, "output")
-        self.assertEqual(stderr, "error")
+        mock_kill.assert_not_called()
 
     @patch("mmpm.utils.subprocess.Popen")
     def test_get_pids(self, mock_popen):
@@ -68,30 +144,225 @@ class TestUtils(unittest.TestCase):
         kill_pids_of_process(process_name)
         mock_system.assert_called_with(f"for process in $(pgrep {process_name}); do kill -9 $process; done")
 
-    @patch("mmpm.utils.requests.get")
+    @patch("mmpm.utils.HTTPClient.get")
     def test_safe_get_request_success(self, mock_get):
         mock_response = mock_get.return_value
         data = safe_get_request(fake.url())
         self.assertEqual(data, mock_response)
 
-    @patch("mmpm.utils.requests.get", side_effect=requests.exceptions.RequestException)
+    @patch("mmpm.utils.HTTPClient.get", side_effect=requests.exceptions.RequestException)
     def test_safe_get_request_failure(self, mock_get):
         data = safe_get_request(fake.url())
         self.assertIsInstance(data, requests.Response)
 
-    @patch("mmpm.utils.urllib.request.urlopen")
-    def test_no_update_available(self, mock_urlopen):
-        latest_version_data = {"info": {"version": version}}
+    @patch("mmpm.utils.HTTPClient.get")
+    def test_no_update_available(self, mock_get):
+        mock_get.return_value.json.return_value = {"info": {"version": version}}
+
+        with self.version_check_file():
+            self.assertFalse(update_available())
+
+    @patch("mmpm.utils.HTTPClient.get")
+    def test_update_available(self, mock_get):
+        mock_get.return_value.json.return_value = {"info": {"version": f"{major + 1}.0.0"}}
+
+        with self.version_check_file() as version_check_file:
+            self.assertTrue(update_available())
+            self.assertEqual(json.loads(version_check_file.read_text())["remote"], f"{major + 1}.0.0")
+
+            # the stored result is reused without contacting PyPi again
+            mock_get.reset_mock()
+            self.assertTrue(update_available())
+            mock_get.assert_not_called()
+
+    @patch("mmpm.utils.Thread")
+    @patch("mmpm.utils.HTTPClient.get")
+    def test_update_available_stale(self, mock_get, mock_thread):
+        with self.version_check_file() as version_check_file:
+            version_check_file.write_text(json.dumps({"remote": f"{major + 1}.0.0", "timestamp": 0}))
+
+            self.assertTrue(update_available())
+            mock_get.assert_not_called()
+            mock_thread.return_value.start.assert_called_once()
+            self.assertTrue(mock_thread.call_args.kwargs["daemon"])
+
+    @patch("mmpm.utils.HTTPClient.get")
+    def test_update_available_cancelled(self, mock_get):
+        mock_get.return_value.json.return_value = {"info": {"version": f"{major + 1}.0.0"}}
+        token = CancellationToken()
+        token.cancel()
+
+        with self.version_check_file() as version_check_file:
+            self.assertFalse(update_available(token=token))
+            self.assertEqual(version_check_file.read_text(), "")
+
+    @patch("mmpm.utils.HTTPClient.get", side_effect=requests.exceptions.ConnectionError)
+    def test_update_available_failure(self, mock_get):
+        with self.version_check_file():
+            self.assertFalse(update_available())
+
+    @patch("mmpm.utils.HTTPClient.get")
+    def test_update_available_malformed_version(self, mock_get):
+        mock_get.return_value.json.return_value = {"info": {"version": None}}
+
+        with self.version_check_file() as version_check_file:
+            # a version check file without a version is ignored, and PyPi is checked instead
+            version_check_file.write_text(json.dumps({"remote": 1, "timestamp": time.time()}))
+
+            self.assertFalse(update_available())
+            mock_get.assert_called_once()
+            self.assertEqual(json.loads(version_check_file.read_text())["remote"], 1)
+
+    @patch("mmpm.utils.run_cmd", return_value=(0, "", ""))
+    @patch("mmpm.utils.git.Repo")
+    def test_repo_heads(self, mock_repo, mock_run_cmd):
+        repo = mock_repo.return_value
+        repo.bare = False
+        repo.head.commit.hexsha = "local"
+        repo.refs["origin/HEAD"].commit.hexsha = "remote"
+        repo.remotes.origin.url = "https://github.com/user/repo"
+        token = CancellationToken()
+
+        self.assertEqual(repo_heads(Path("/tmp/repo"), token=token), ("local", "remote"))
+        mock_run_cmd.assert_called_once_with(["git", "-C", "/tmp/repo", "fetch", "origin"], progress=False, timeout=GIT_TIMEOUT, token=token)
+
+        mock_run_cmd.return_value = (1, "", "cancelled")
+        self.assertEqual(repo_heads(Path("/tmp/repo"), token=token), (None, None))
+
+    def test_run_phases(self):
+        def fail(token):
+            raise RuntimeError("failed")
+
+        phases = run_phases({"fast": lambda token: 1, "slow": lambda token: time.sleep(5), "failing": fail}, deadline=0.2)
+
+        self.assertEqual(phases["fast"]["result"], 1)
+        self.assertTrue(phases["fast"]["completed"])
+        self.assertFalse(phases["fast"]["timed_out"])
+        self.assertTrue(phases["slow"]["timed_out"])
+        self.assertEqual(phases["slow"]["seconds"], 0.2)
+        self.assertFalse(phases["failing"]["completed"])
+        self.assertFalse(phases["failing"]["timed_out"])
+
+    def test_run_phases_cancels_late_phases(self):
+        release, finished = Event(), Event()
+        state, tokens = [], []
+
+        def slow(token):
+            tokens.append(token)
+            release.wait(5)
+
+            if not token.cancelled:
+                state.append("written")
+
+            finished.set()
+            return "late"
+
+        phases = run_phases({"slow": slow}, deadline=0.1)
+        release.set()
+        self.assertTrue(finished.wait(5))
+
+        self.assertTrue(tokens[0].cancelled)
+        self.assertEqual(state, [])
+        self.assertTrue(phases["slow"]["timed_out"])
+        self.assertIsNone(phases["slow"]["result"])
+
+    @contextmanager
+    def version_check_file(self):
+        with TemporaryDirectory() as temp_dir:
+            version_check_file = Path(temp_dir) / "mmpm-version-check.json"
+            version_check_file.touch()
+
+            with patch("mmpm.utils.paths.MMPM_VERSION_CHECK_FILE", version_check_file):
+                yield version_check_file
+
+
+class TestHTTPClient(unittest.TestCase):
+    def setUp(self):
+        Singleton._instances.pop(HTTPClient, None)
+        self.client = HTTPClient(retries=2, backoff=0)
+
+    def tearDown(self):
+        Singleton._instances.pop(HTTPClient, None)
+
+    @patch("mmpm.utils.requests.Session.request")
+    def test_retry_then_success(self, mock_request):
+        mock_request.side_effect = [requests.exceptions.ConnectionError, MagicMock(status_code=503), MagicMock(status_code=200)]
+
+        response = self.client.get("https://example.com/data")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(self.client.breakers["example.com"].failures, 0)
+
+    @patch("mmpm.utils.requests.Session.request", side_effect=requests.exceptions.Timeout)
+    def test_retries_exhausted(self, mock_request):
+        with self.assertRaises(requests.exceptions.Timeout):
+            self.client.get("https://example.com/data")
+
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch("mmpm.utils.requests.Session.request", side_effect=requests.exceptions.ConnectionError)
+    def test_circuit_breaker(self, mock_request):
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.ConnectionError):
+                self.client.get("https://example.com/data")
+
+        # the breaker opened after five consecutive failures, so the sixth attempt is never sent
+        self.assertEqual(mock_request.call_count, 5)
+
+        with self.assertRaises(CircuitOpenError):
+            self.client.get("https://example.com/data")
+
+        self.assertEqual(mock_request.call_count, 5)
+
+    def test_circuit_breaker_cooldown(self):
+        breaker = CircuitBreaker(threshold=1, cooldown=0)
+        breaker.record(False)
+
+        self.assertTrue(breaker.allow())
+        breaker.record(True)
+        self.assertIsNone(breaker.opened)
+
+
+class TestHostScheduler(unittest.TestCase):
+    def test_host(self):
+        self.assertEqual(HostScheduler.host("https://github.com/user/repo.git"), "github.com")
+        self.assertEqual(HostScheduler.host("git@GitLab.com:user/repo.git"), "gitlab.com")
+        self.assertEqual(HostScheduler.host("https://api.github.com/repos/user/repo"), "api.github.com")
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(rate=20.0, capacity=2)
+        started = time.monotonic()
+
+        for _ in range(4):
+            bucket.acquire()
+
+        # the first two are a burst, the next two wait ~0.05s each for a token
+        self.assertGreaterEqual(time.monotonic() - started, 0.08)
+
+    @patch.object(HostScheduler, "LIMITS", {"example.com": (1, 1000.0, 1000)})
+    def test_slot_limits_concurrency(self):
+        Singleton._instances.pop(HostScheduler, None)
+        scheduler = HostScheduler()
+        active, peak = [], []
+
+        def work():
+            with scheduler.slot("https://example.com/repo.git"):
+                active.append(1)
+                peak.append(len(active))
+                time.sleep(0.02)
+                active.pop()
+
+        threads = [Thread(target=work) for _ in range(3)]
 
-        mock_urlopen.return_value = MagicMock(read=MagicMock(return_value=json.dumps(latest_version_data)))
-        self.assertFalse(update_available())
+        for thread in threads:
+            thread.start()
 
-    @patch("mmpm.utils.urllib.request.urlopen")
-    def test_update_available(self, mock_urlopen):
-        latest_version_data = {"info": {"version": f"{major + 1}.0.0"}}
+        for thread in threads:
+            thread.join()
 
-        mock_urlopen.return_value = MagicMock(read=MagicMock(return_value=json.dumps(latest_version_data)))
-        self.assertTrue(update_available())
+        self.assertEqual(max(peak), 1)
+        Singleton._instances.pop(HostScheduler, None)
 
 
 if __name__ == "__main__":
@@ -17,6 +17,7 @@ export class LogStreamViewerComponent implements OnInit, OnDestroy {
 
   public socket: any;
   public logs = "";
+  public replayed = false;
   public fontSize = Number(getCookie("mmpm-log-stream-font-size", "12"));
 
   public options = {
@@ -47,6 +48,12 @@ export class LogStreamViewerComponent implements OnInit, OnDestroy {
 
     this.socket.on("connect", () => {
       console.log("Connected to Socket.IO log server");
+
+      // catch up on what was logged before the viewer was opened, but only once, reconnecting would repeat it
+      if (!this.replayed) {
+        this.replayed = true;
+        this.socket.emit("replay", {});
+      }
     });
 
     this.socket.on("connect_error", () => {